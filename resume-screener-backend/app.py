@@ -1,31 +1,165 @@
 
-from flask import Flask
+from flask import Flask, Response, g, request
 from flask_cors import CORS
 from config import Config
 from auth.routes import auth_bp
 from candidate.routes import candidate_bp
 from hr.routes import hr_bp
+from models import update_task, cached_suggestions, ensure_indexes, init_db, get_db
+from utils.task_queue import analysis_queue, suggestion_queue
+from utils.suggestion_cache import suggestion_cache, MongoSuggestionStore
+from utils.job_cache import job_cache
+from utils.parser_pool import parser_pool
+from utils.metrics import registry, REQUEST_SECONDS, server_timing_header
+from utils.json_provider import FastJSONProvider
+from utils.job_index import get_job_index, open_job_index
+from utils.nlp_analyzer import get_text_scorer, get_gemini_model, set_gemini_model
+from utils.fake_llm import FakeGenerativeModel
 import os
+import time
+
+def register_metrics():
+    """Expose counters kept by the caches, parsers and task queue"""
+    registry.callback('resume_screener_suggestion_cache_hits_total', 'Gemini suggestions served from cache',
+                      'counter', lambda: suggestion_cache.hits)
+    registry.callback('resume_screener_suggestion_cache_misses_total', 'Gemini suggestions not found in cache',
+                      'counter', lambda: suggestion_cache.misses)
+    registry.callback('resume_screener_gemini_fallbacks_total', 'Static suggestions returned instead of Gemini ones',
+                      'counter', lambda: {'timeout': suggestion_cache.timeouts, 'error': suggestion_cache.errors},
+                      'reason')
+    registry.callback('resume_screener_job_cache_hits_total', 'Job responses served from cache',
+                      'counter', lambda: job_cache.hits)
+    registry.callback('resume_screener_job_cache_misses_total', 'Job responses loaded from the database',
+                      'counter', lambda: job_cache.misses)
+    registry.callback('resume_screener_parse_results_total', 'Documents parsed, by result',
+                      'counter', parser_pool.stats, 'status')
+
+def warm_up():
+    """
+    Connect to MongoDB, load the job index and text scorer, and start the
+    parser processes, so the first request does not pay for it. Called by
+    create_app when WARM_UP is set, which gunicorn.conf.py does for its
+    workers; not safe before a fork.
+    """
+    steps = [
+        ('database', lambda: get_db().command('ping')),
+        ('job index', get_job_index),
+        ('text scorer', get_text_scorer),
+        ('parsers', parser_pool.warm_up)
+    ]
+    if Config.GEMINI_API_KEY:
+        steps.append(('Gemini client', get_gemini_model))
+    
+    for name, step in steps:
+        try:
+            step()
+        except Exception as e:
+            print(f"Error warming up {name}: {e}")
 
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
     
+    # Encode responses with orjson, including ObjectId and datetime values
+    app.json = FastJSONProvider(app)
+    
     # Enable CORS
     CORS(app, resources={r"/*": {"origins": "*"}})
     
     # Create upload directory if it doesn't exist
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
     
+    # Connect to MongoDB in this process
+    init_db(app.config['MONGO_URI'])
+    
+    # Create database indexes; data migrations run once with python -m migrate
+    if app.config['ENSURE_INDEXES']:
+        try:
+            ensure_indexes()
+        except Exception as e:
+            print(f"Error creating database indexes: {e}")
+    
+    # Configure the isolated document parsers
+    parser_pool.configure(
+        max_workers=app.config['PARSER_WORKERS'],
+        timeout=app.config['PARSER_TIMEOUT'],
+        memory_limit=app.config['PARSER_MEMORY_LIMIT']
+    )
+    
+    # Configure the background analysis workers
+    analysis_queue.configure(
+        max_workers=app.config['ANALYSIS_WORKERS'],
+        max_pending=app.config['ANALYSIS_QUEUE_SIZE'],
+        max_retries=app.config['ANALYSIS_MAX_RETRIES'],
+        on_update=update_task
+    )
+    
+    # Configure the workers adding Gemini suggestions to saved analyses
+    suggestion_queue.configure(
+        max_workers=app.config['SUGGESTION_WORKERS'],
+        max_pending=app.config['SUGGESTION_QUEUE_SIZE'],
+        max_retries=app.config['ANALYSIS_MAX_RETRIES']
+    )
+    
+    # Canned suggestions instead of Gemini, e.g. for load tests
+    if app.config['LLM_BACKEND'] == 'fake':
+        set_gemini_model(FakeGenerativeModel(delay=app.config['FAKE_LLM_DELAY']))
+    
+    # Configure the Gemini suggestion cache
+    suggestion_store = None
+    if app.config['SUGGESTION_CACHE_BACKEND'] == 'mongo':
+        suggestion_store = MongoSuggestionStore(cached_suggestions, app.config['SUGGESTION_CACHE_TTL'])
+    
+    suggestion_cache.configure(
+        max_entries=app.config['SUGGESTION_CACHE_SIZE'],
+        ttl=app.config['SUGGESTION_CACHE_TTL'],
+        store=suggestion_store
+    )
+    
+    # Configure the job catalogue cache
+    job_cache.configure(check_interval=app.config['JOB_CACHE_CHECK_INTERVAL'])
+    
+    # Map the job index snapshot, so every worker shares its pages through the OS cache
+    try:
+        open_job_index()
+    except Exception as e:
+        print(f"Error opening job index: {e}")
+    
+    # Register metrics exposed at /metrics
+    register_metrics()
+    
     # Register blueprints
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(candidate_bp, url_prefix='/api/candidate')
     app.register_blueprint(hr_bp, url_prefix='/api/hr')
     
+    # Optionally load everything now instead of on the first request
+    if app.config['WARM_UP']:
+        warm_up()
+    
     @app.route('/health')
     def health_check():
         return {"status": "healthy"}, 200
     
+    # Request timing: latency histogram and a Server-Timing header with the time per stage
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+    
+    @app.after_request
+    def record_request_time(response):
+        started = g.get('request_started')
+        if started is not None:
+            elapsed = time.perf_counter() - started
+            endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+            REQUEST_SECONDS.observe(elapsed, method=request.method, endpoint=endpoint, status=response.status_code)
+            response.headers['Server-Timing'] = server_timing_header(elapsed)
+        return response
+    
+    @app.route('/metrics')
+    def metrics():
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+    
     return app
 
 if __name__ == '__main__':
@@ -0,0 +1 @@
+# This file is required to make the directory a package
@@ -0,0 +1,47 @@
+"""
+Run the analysis benchmarks or compare two result files.
+
+Run from the backend directory:
+    python -m benchmarks run --output results.json [--filter analyze] [--quick]
+    python -m benchmarks compare baseline.json results.json [--threshold 0.1]
+
+compare exits with status 1 if any case got slower than the threshold.
+"""
+import argparse
+import sys
+from benchmarks.runner import run_cases, compare_results, load_results, save_results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='run the benchmark cases')
+    run_parser.add_argument('--output', default='benchmark-results.json', help='JSON results file')
+    run_parser.add_argument('--filter', help='only run cases whose name contains this text')
+    run_parser.add_argument('--quick', action='store_true', help='fewer rounds, for a smoke check')
+
+    compare_parser = commands.add_parser('compare', help='compare two results files')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.1,
+                                help='slowdown of the median, as a fraction, reported as a regression')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        # Importing the cases registers them
+        import benchmarks.cases
+
+        document = run_cases(args.filter, args.quick)
+        save_results(args.output, document)
+        print(f"Wrote {len(document['results'])} results to {args.output}")
+        return 0
+
+    regressions = compare_results(load_results(args.baseline), load_results(args.current), args.threshold)
+    if regressions:
+        print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
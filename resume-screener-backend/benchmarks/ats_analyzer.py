@@ -0,0 +1,84 @@
+"""
+Micro-benchmark of the ATS analyzer against the previous multi-pass version.
+
+Run from the backend directory:
+    python -m benchmarks.ats_analyzer
+"""
+import random
+import re
+import timeit
+from utils.ats_analyzer import ats_analyzer
+
+def legacy_analyze_ats_friendliness(resume_text):
+    """
+    Multi-pass implementation that ATSAnalyzer replaced, kept for comparison
+    """
+    score = 100
+    issues = []
+    
+    table_patterns = [r'[\|\t]{2,}', r'\+[-+]+\+', r'┌[─┬]+┐', r'╔[═╦]+╗']
+    for pattern in table_patterns:
+        if re.search(pattern, resume_text):
+            score -= 15
+            issues.append("Detected possible table structures which may not parse correctly in ATS systems")
+            break
+    
+    header_footer_patterns = [r'Page \d+ of \d+', r'\d+/\d+']
+    for pattern in header_footer_patterns:
+        if re.search(pattern, resume_text):
+            score -= 5
+            issues.append("Detected possible headers or footers which may interfere with ATS parsing")
+            break
+    
+    standard_headings = ['experience', 'education', 'skills', 'summary', 'objective', 'projects', 'certifications']
+    found_standard_headings = False
+    for heading in standard_headings:
+        heading_pattern = r'\b' + re.escape(heading) + r'\b'
+        if re.search(heading_pattern, resume_text.lower()):
+            found_standard_headings = True
+            break
+    
+    if not found_standard_headings:
+        score -= 10
+        issues.append("No standard section headings detected (like 'Experience', 'Education', 'Skills')")
+    
+    acronyms = re.findall(r'\b[A-Z]{2,}\b', resume_text)
+    if len(acronyms) > 10:
+        score -= 5
+        issues.append("Excessive use of acronyms may reduce ATS score")
+    
+    word_count = len(resume_text.split())
+    if word_count > 1000:
+        score -= 5
+        issues.append("Resume is quite long, consider making it more concise")
+    
+    score = max(0, min(100, score))
+    
+    return score, issues
+
+def make_resume(word_count, seed=0):
+    """
+    Build a deterministic resume of roughly word_count words
+    """
+    rng = random.Random(seed)
+    vocabulary = ['developed', 'managed', 'team', 'python', 'services', 'customers', 'improved',
+                  'latency', 'designed', 'AWS', 'API', 'pipelines', 'data', 'reporting', 'led']
+    lines = ['John Doe', 'Summary']
+    while sum(len(line.split()) for line in lines) < word_count:
+        lines.append(' '.join(rng.choice(vocabulary) for _ in range(12)))
+    lines.insert(len(lines) // 2, 'Experience')
+    return '\n'.join(lines)
+
+def main():
+    for word_count in (300, 3000, 30000):
+        resume_text = make_resume(word_count)
+        assert ats_analyzer.analyze(resume_text) == legacy_analyze_ats_friendliness(resume_text)
+        
+        number = max(1, 30000 // word_count)
+        legacy = min(timeit.repeat(lambda: legacy_analyze_ats_friendliness(resume_text), number=number, repeat=5)) / number
+        current = min(timeit.repeat(lambda: ats_analyzer.analyze(resume_text), number=number, repeat=5)) / number
+        print(f"{word_count:>6} words: legacy {legacy * 1000:8.3f} ms  "
+              f"analyzer {current * 1000:8.3f} ms  speedup {legacy / current:5.2f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark cases for the resume analysis hot path.
+
+Gemini is replaced by FakeGenerativeModel and the job index is fitted on
+synthetic jobs, so no network or database is needed.
+"""
+import atexit
+import shutil
+import tempfile
+from flask import Flask
+from benchmarks.corpus import make_job, make_resume, make_analyses, write_resume_file, SKILL_POOL
+from benchmarks.runner import bench_case
+from benchmarks.startup import run_probe
+from models import serialize_doc
+from utils.json_provider import FastJSONProvider
+from utils.fake_llm import FakeGenerativeModel
+from utils.job_index import get_job_index
+from utils.nlp_analyzer import (preprocess_text, extract_skills_from_text, analyze_ats_friendliness,
+                                analyze_resume, extract_resume_features, set_gemini_model, set_text_scorer)
+from utils.rescorer import rescore_batch
+from utils.suggestion_cache import suggestion_cache
+from utils.text_parser import extract_text_from_pdf, extract_text_from_docx, extract_text_from_txt
+from utils.text_scorer import TfidfScorer
+import utils.job_index
+import utils.json_provider
+
+RESUME_SIZES = [300, 1000, 5000]
+SKILL_COUNTS = [5, 20, len(SKILL_POOL)]
+RESCORE_SIZES = [500, 2000]
+# Default and maximum /api/hr/candidates page sizes, and a full unpaginated job
+PAGE_SIZES = [50, 500, 5000]
+
+_corpus_dir = None
+
+def corpus_dir():
+    """Directory holding the generated resume files, removed at exit"""
+    global _corpus_dir
+    if _corpus_dir is None:
+        _corpus_dir = tempfile.mkdtemp(prefix='resume-bench-')
+        atexit.register(shutil.rmtree, _corpus_dir, True)
+    return _corpus_dir
+
+def setup_analysis():
+    """Stub out Gemini and fit the job index on synthetic jobs instead of the database"""
+    set_gemini_model(FakeGenerativeModel())
+    set_text_scorer(TfidfScorer())
+    if not utils.job_index._job_index.loaded:
+        jobs = [dict(make_job(20, seed), _id=f'job-{seed}') for seed in range(50)]
+        resumes = [preprocess_text(make_resume(1000, seed=seed)) for seed in range(200)]
+        utils.job_index._job_index.fit(jobs, resumes)
+    return get_job_index()
+
+@bench_case('preprocess_text', words=RESUME_SIZES)
+def bench_preprocess_text(benchmark, words):
+    benchmark(preprocess_text, make_resume(words))
+
+@bench_case('extract_skills_from_text', words=RESUME_SIZES, skills=SKILL_COUNTS)
+def bench_extract_skills(benchmark, words, skills):
+    job = make_job(skills)
+    benchmark(extract_skills_from_text, make_resume(words, job['skills'][::2]), job['skills'])
+
+@bench_case('analyze_ats_friendliness', words=RESUME_SIZES)
+def bench_ats(benchmark, words):
+    benchmark(analyze_ats_friendliness, make_resume(words))
+
+@bench_case('analyze_resume', words=RESUME_SIZES, skills=SKILL_COUNTS)
+def bench_analyze_resume(benchmark, words, skills):
+    setup_analysis()
+    job = make_job(skills)
+    resume_text = make_resume(words, job['skills'][::2])
+
+    # Clear cached suggestions so every call goes through the (fake) model
+    benchmark.pedantic(analyze_resume, (resume_text, job['description'], job['skills']),
+                       setup=suggestion_cache.clear)
+
+@bench_case('extract_text_from_txt', words=RESUME_SIZES)
+def bench_extract_txt(benchmark, words):
+    benchmark(extract_text_from_txt, write_resume_file(corpus_dir(), 'txt', words))
+
+@bench_case('extract_text_from_docx', words=RESUME_SIZES)
+def bench_extract_docx(benchmark, words):
+    benchmark(extract_text_from_docx, write_resume_file(corpus_dir(), 'docx', words))
+
+@bench_case('extract_text_from_pdf', words=RESUME_SIZES)
+def bench_extract_pdf(benchmark, words):
+    benchmark(extract_text_from_pdf, write_resume_file(corpus_dir(), 'pdf', words))
+
+@bench_case('rescore_batch', analyses=RESCORE_SIZES)
+def bench_rescore_batch(benchmark, analyses):
+    setup_analysis()
+    job = dict(make_job(20), _id='job-0', version=2)
+    texts = {str(i): make_resume(1000, SKILL_POOL[i % 7::7], seed=i) for i in range(analyses)}
+    batch = [{
+        '_id': i,
+        'resume_id': resume_id,
+        'matched_skills': [],
+        'missing_skills': [],
+        'features': extract_resume_features(text)
+    } for i, (resume_id, text) in enumerate(texts.items())]
+
+    # Phrase skills not scored before are matched against the resume text
+    benchmark(rescore_batch, batch, job, load_texts=lambda resume_ids: {i: texts[i] for i in resume_ids})
+
+@bench_case('candidates_response', analyses=PAGE_SIZES, provider=['stock', 'fast', 'fallback'])
+def bench_candidates_response(benchmark, analyses, provider):
+    app = Flask(__name__)
+    docs = make_analyses(analyses)
+
+    with app.app_context():
+        if provider == 'stock':
+            # The previous path: serialize_doc on freshly loaded documents, then Flask's provider
+            fresh = []
+
+            def load():
+                fresh[:] = [dict(doc) for doc in docs]
+
+            benchmark.pedantic(lambda: app.json.response(serialize_doc(fresh)), setup=load)
+            return
+
+        app.json = FastJSONProvider(app)
+        orjson = utils.json_provider.orjson
+        if provider == 'fallback':
+            utils.json_provider.orjson = None
+        try:
+            benchmark(app.json.response, docs)
+        finally:
+            utils.json_provider.orjson = orjson
+
+@bench_case('startup')
+def bench_startup(benchmark):
+    # One fresh interpreter per round: import the app and run create_app
+    benchmark.pedantic(run_probe, rounds=5, iterations=1)
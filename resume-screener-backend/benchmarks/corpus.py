@@ -0,0 +1,163 @@
+"""
+Deterministic synthetic resumes and jobs for benchmarks.
+
+The same seed always gives the same text, so timings from different
+commits are measured on identical inputs.
+"""
+import os
+import random
+import docx
+from bson import ObjectId
+
+SKILL_POOL = [
+    'Python', 'Java', 'JavaScript', 'TypeScript', 'Go', 'Rust', 'C++', 'C#', 'SQL', 'NoSQL',
+    'MongoDB', 'PostgreSQL', 'MySQL', 'Redis', 'Kafka', 'RabbitMQ', 'Docker', 'Kubernetes',
+    'AWS', 'Azure', 'GCP', 'Terraform', 'Ansible', 'Linux', 'Git', 'CI/CD', 'Jenkins',
+    'Flask', 'Django', 'FastAPI', 'Spring', 'Node.js', 'React', 'Angular', 'Vue',
+    'Machine Learning', 'Deep Learning', 'TensorFlow', 'PyTorch', 'scikit-learn', 'Pandas',
+    'NumPy', 'Spark', 'Hadoop', 'Airflow', 'Tableau', 'Power BI', 'Excel', 'REST APIs',
+    'GraphQL', 'Microservices', 'Agile', 'Scrum', 'Jira', 'Communication', 'Leadership'
+]
+
+FILLER_WORDS = [
+    'designed', 'built', 'maintained', 'improved', 'led', 'delivered', 'migrated', 'automated',
+    'services', 'platform', 'pipeline', 'team', 'customers', 'latency', 'reliability', 'features',
+    'reporting', 'infrastructure', 'data', 'product', 'the', 'a', 'for', 'with', 'and', 'across',
+    'of', 'to', 'in', 'by', 'from', 'using', 'our', 'new', 'legacy', 'internal', 'scalable'
+]
+
+SECTIONS = ['Summary', 'Experience', 'Education', 'Skills', 'Projects', 'Certifications']
+
+def make_job(skill_count, seed=0):
+    """
+    Make a job posting with skill_count required skills
+    """
+    rng = random.Random(f'job-{skill_count}-{seed}')
+    skills = rng.sample(SKILL_POOL, min(skill_count, len(SKILL_POOL)))
+    sentences = [
+        f"We are looking for an engineer with experience in {skill} to join our team."
+        for skill in skills
+    ]
+    sentences += [' '.join(rng.choices(FILLER_WORDS, k=12)) + '.' for _ in range(10)]
+    rng.shuffle(sentences)
+    return {
+        'title': 'Software Engineer',
+        'company': 'Example Corp',
+        'description': ' '.join(sentences),
+        'skills': skills
+    }
+
+def make_resume(word_count, skills=(), seed=0):
+    """
+    Make a resume of about word_count words with section headings, contact
+    details and every skill in skills mentioned at least once
+    """
+    rng = random.Random(f'resume-{word_count}-{seed}')
+    lines = ['Jane Doe', 'jane.doe@example.com | (555) 123-4567 | linkedin.com/in/janedoe', '']
+    sections = SECTIONS[:]
+    words_per_section = max(1, word_count // len(sections))
+    for section in sections:
+        lines.append(section)
+        written = 0
+        while written < words_per_section:
+            sentence = rng.choices(FILLER_WORDS, k=rng.randint(8, 16))
+            if rng.random() < 0.3:
+                sentence.insert(rng.randrange(len(sentence)), rng.choice(SKILL_POOL))
+            lines.append('- ' + ' '.join(sentence).capitalize() + '.')
+            written += len(sentence)
+        lines.append('')
+    lines.append('Skills: ' + ', '.join(skills))
+    return '\n'.join(lines)
+
+def write_txt(path, text):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+def write_docx(path, text):
+    document = docx.Document()
+    for line in text.split('\n'):
+        document.add_paragraph(line)
+    document.save(path)
+
+def _pdf_escape(line):
+    return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+def write_pdf(path, text, lines_per_page=50):
+    """
+    Write text as a plain PDF with one Helvetica text object per page.
+    Only ASCII text is supported, which is all the generator produces.
+    """
+    lines = text.split('\n')
+    pages = [lines[start:start + lines_per_page] for start in range(0, len(lines), lines_per_page)] or [[]]
+
+    # Objects: 1 catalog, 2 page tree, 3 font, then a page and a content stream per page
+    objects = [None, None, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    page_ids = []
+    for page in pages:
+        commands = ['BT', '/F1 10 Tf', '12 TL', '50 780 Td']
+        commands += [f'({_pdf_escape(line)}) Tj T*' for line in page]
+        commands.append('ET')
+        stream = '\n'.join(commands).encode('latin-1', 'replace')
+        objects.append(b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream')
+        content_id = len(objects)
+        objects.append(
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+            b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>' % content_id
+        )
+        page_ids.append(len(objects))
+    objects[0] = b'<< /Type /Catalog /Pages 2 0 R >>'
+    objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+        b' '.join(b'%d 0 R' % page_id for page_id in page_ids), len(page_ids)
+    )
+
+    output = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+    xref = len(output)
+    output += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    output += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    output += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+
+    with open(path, 'wb') as f:
+        f.write(bytes(output))
+
+WRITERS = {
+    'txt': write_txt,
+    'docx': write_docx,
+    'pdf': write_pdf
+}
+
+def write_resume_file(directory, extension, word_count, skills=(), seed=0):
+    """
+    Write a synthetic resume in the given format and return its path
+    """
+    path = os.path.join(directory, f'resume-{word_count}-{seed}.{extension}')
+    if not os.path.exists(path):
+        WRITERS[extension](path, make_resume(word_count, skills, seed))
+    return path
+
+def make_analyses(count, seed=0):
+    """
+    Make count candidate analyses shaped like a /api/hr/candidates page,
+    as they come from MongoDB (ObjectId _id, no suggestions)
+    """
+    rng = random.Random(f'analyses-{count}-{seed}')
+    analyses = []
+    for i in range(count):
+        skills = rng.sample(SKILL_POOL, 12)
+        matched = rng.randint(0, len(skills))
+        analyses.append({
+            '_id': ObjectId(f'{seed:08x}{i:016x}'),
+            'user_id': 'default_user_id',
+            'resume_id': str(ObjectId(f'{seed + 1:08x}{i:016x}')),
+            'job_id': str(ObjectId(f'{seed + 2:08x}{0:016x}')),
+            'job_title': 'Software Engineer',
+            'company': 'Example Corp',
+            'match_percentage': round(rng.uniform(0, 100), 2),
+            'ats_score': rng.randint(40, 100),
+            'matched_skills': skills[:matched],
+            'missing_skills': skills[matched:]
+        })
+    return analyses
@@ -0,0 +1,144 @@
+"""
+Memory of the job index per worker: fitted in memory by every worker, as
+before snapshots, against memory-mapped from one shared snapshot.
+
+Run from the backend directory:
+    python -m benchmarks.job_index [--workers 4] [--jobs 2000] [--resumes 10000]
+
+Each worker is a fresh interpreter that loads the index and ranks a few
+resumes, like a gunicorn worker after its first requests. All workers of
+a mode are measured while running together, so PSS (shared pages split
+between the processes mapping them) shows what each one really costs.
+Needs Linux for /proc/self/smaps_rollup.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from benchmarks.corpus import SKILL_POOL
+from benchmarks.startup import BACKEND_DIR
+
+SYLLABLES = ['ka', 'lo', 'mi', 'ne', 'ru', 'ta', 'vo', 'zi', 'pe', 'so', 'an', 'er', 'ix', 'ul', 'om', 'sy']
+
+PROBE = '''
+import json, sys, time
+mode, directory = sys.argv[1], sys.argv[2]
+started = time.perf_counter()
+from utils.job_index import JobIndex
+if mode == 'mapped':
+    index = JobIndex(directory=directory)
+    index.open()
+else:
+    with open(directory + '/corpus.json') as f:
+        corpus = json.load(f)
+    index = JobIndex()
+    index.fit(corpus['jobs'], corpus['resumes'])
+    del corpus
+with open(directory + '/queries.json') as f:
+    for text in json.load(f):
+        index.rank_jobs(text, 10)
+loaded = time.perf_counter() - started
+print('ready', flush=True)
+sys.stdin.readline()
+memory = {}
+with open('/proc/self/smaps_rollup') as f:
+    for line in f:
+        key, _, value = line.partition(':')
+        if value.strip().endswith('kB'):
+            memory[key] = int(value.split()[0])
+print(json.dumps({
+    'load_seconds': loaded,
+    'rss_mb': memory['Rss'] / 1024,
+    'pss_mb': memory['Pss'] / 1024,
+    'uss_mb': (memory['Private_Clean'] + memory['Private_Dirty']) / 1024
+}))
+'''
+
+def make_corpus(job_count, resume_count, vocabulary_size=100000, seed=0):
+    """
+    Jobs and preprocessed resumes drawn from a Zipf-distributed vocabulary
+    of made-up words, so the index has a realistically large vocabulary;
+    job skills come from the benchmark skill pool
+    """
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < vocabulary_size:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 5))))
+    words = sorted(words)
+    rng.shuffle(words)
+    cum_weights = []
+    total = 0.0
+    for rank in range(len(words)):
+        total += 1.0 / (rank + 1)
+        cum_weights.append(total)
+
+    def text(count):
+        return ' '.join(rng.choices(words, cum_weights=cum_weights, k=count))
+
+    jobs = [{
+        '_id': f'job-{number}',
+        'description': text(300),
+        'skills': rng.sample(SKILL_POOL, rng.randint(5, 15))
+    } for number in range(job_count)]
+    resumes = [text(600) for _ in range(resume_count)]
+    return jobs, resumes
+
+def run_workers(mode, directory, workers):
+    """
+    Start the workers together and return their measurements
+    """
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR)
+    processes = [subprocess.Popen([sys.executable, '-c', PROBE, mode, directory], cwd=BACKEND_DIR, env=env,
+                                  stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+                 for _ in range(workers)]
+    for process in processes:
+        line = process.stdout.readline().strip()
+        if line != 'ready':
+            raise RuntimeError(f'worker failed to load the index: {line!r}')
+    results = []
+    for process in processes:
+        process.stdin.write('\n')
+        process.stdin.flush()
+        results.append(json.loads(process.stdout.readline()))
+        process.wait()
+    return results
+
+def main(argv=None):
+    from utils.job_index import JobIndex, save_snapshot
+
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.job_index')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--jobs', type=int, default=2000)
+    parser.add_argument('--resumes', type=int, default=10000)
+    args = parser.parse_args(argv)
+
+    directory = tempfile.mkdtemp(prefix='job-index-bench-')
+    try:
+        jobs, resumes = make_corpus(args.jobs, args.resumes)
+        with open(os.path.join(directory, 'corpus.json'), 'w') as f:
+            json.dump({'jobs': jobs, 'resumes': resumes}, f)
+        with open(os.path.join(directory, 'queries.json'), 'w') as f:
+            json.dump(resumes[:20], f)
+
+        index = JobIndex()
+        index.fit(jobs, resumes)
+        save_snapshot(directory, index._state, 0)
+        print(f"{args.jobs} jobs, {args.resumes} resumes, {len(index._state.vocabulary)} terms, "
+              f"{args.workers} workers")
+
+        for mode in ('fitted', 'mapped'):
+            results = run_workers(mode, directory, args.workers)
+            print(f"{mode:<7} load {statistics.median(r['load_seconds'] for r in results):6.2f} s  "
+                  f"per worker: RSS {statistics.median(r['rss_mb'] for r in results):7.1f} MB  "
+                  f"PSS {statistics.median(r['pss_mb'] for r in results):7.1f} MB  "
+                  f"USS {statistics.median(r['uss_mb'] for r in results):7.1f} MB")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Gemini prompt sizes: the previous full-text prompt against the compacted
+one, and requests and tokens for bulk suggestions with and without
+batching. Gemini is replaced by FakeGenerativeModel, which records every
+prompt, so no API key or network is needed.
+
+Run from the backend directory:
+    python -m benchmarks.prompts
+"""
+from config import Config
+from benchmarks.corpus import make_job, make_resume
+from utils.fake_llm import FakeGenerativeModel
+from utils.nlp_analyzer import get_gemini_suggestions_many, set_gemini_model
+from utils.prompt_builder import build_suggestion_prompt, estimate_tokens
+from utils.suggestion_cache import suggestion_cache
+
+def legacy_prompt(resume_text, job_description, matched_skills, missing_skills):
+    """
+    Prompt that build_suggestion_prompt replaced, kept for comparison
+    """
+    return f"""
+    As a resume optimization expert, analyze this resume against the job description and provide
+    5 specific improvement suggestions. Focus on how to better emphasize existing skills
+    and incorporate missing skills if applicable.
+
+    Resume:
+    {resume_text}
+
+    Job Description:
+    {job_description}
+
+    Matched Skills: {', '.join(matched_skills)}
+    Missing Skills: {', '.join(missing_skills)}
+
+    Provide ONLY 5 short, specific, actionable suggestions as a list, each 1-2 sentences:
+    """
+
+def pad_like_pdf(resume_text):
+    """
+    Add the spacing and page furniture that PDF extraction leaves behind
+    """
+    lines = []
+    for number, line in enumerate(resume_text.split('\n')):
+        lines.append('   '.join(line.split(' ')) + '   ')
+        if number % 40 == 39:
+            lines += ['', 'Jane Doe - Resume', f'Page {number // 40 + 1}', '', '']
+    return '\n'.join(lines)
+
+def bulk_prompts(resume_count, batch_size, job, resumes):
+    """
+    Return (requests, total prompt tokens) for the suggestions of resume_count resumes
+    """
+    model = FakeGenerativeModel()
+    set_gemini_model(model)
+    suggestion_cache.clear()
+    previous = Config.SUGGESTION_BATCH_SIZE
+    Config.SUGGESTION_BATCH_SIZE = batch_size
+    try:
+        items = [(resume_text, job['skills'][::2], job['skills'][1::2]) for resume_text in resumes[:resume_count]]
+        results = get_gemini_suggestions_many(items, job['description'])
+    finally:
+        Config.SUGGESTION_BATCH_SIZE = previous
+
+    # Every resume gets an answer from the model, none falls back to the static suggestions
+    assert all('from the fake model' in suggestions[0] for suggestions in results)
+    return model.calls, sum(model.prompt_tokens)
+
+def main():
+    job = make_job(20)
+    matched, missing = job['skills'][::2], job['skills'][1::2]
+
+    print("single prompt tokens (resume words: legacy -> compacted)")
+    for word_count in (300, 1000, 5000):
+        resume_text = pad_like_pdf(make_resume(word_count, job['skills'][::2]))
+        legacy = estimate_tokens(legacy_prompt(resume_text, job['description'], matched, missing))
+        compacted = estimate_tokens(build_suggestion_prompt(resume_text, job['description'], matched, missing,
+                                                            Config.PROMPT_RESUME_TOKENS, Config.PROMPT_JOB_TOKENS))
+        print(f"{word_count:>6} words: {legacy:7d} -> {compacted:6d} tokens  ({compacted / legacy:6.1%})")
+
+    resumes = [pad_like_pdf(make_resume(600, job['skills'][seed % 3::3], seed=seed)) for seed in range(50)]
+    print(f"\nbulk suggestions for 50 resumes (batch size {Config.SUGGESTION_BATCH_SIZE})")
+    for batch_size in (1, Config.SUGGESTION_BATCH_SIZE):
+        requests, tokens = bulk_prompts(50, batch_size, job, resumes)
+        print(f"batch size {batch_size:>2}: {requests:3d} requests, {tokens:7d} prompt tokens")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""
+Minimal benchmark runner with a pytest-benchmark style API.
+
+Cases are plain functions registered with @bench_case that receive a
+Benchmark and call it with the code to time:
+
+    @bench_case('preprocess_text', size=[300, 3000])
+    def bench_preprocess(benchmark, size):
+        text = make_resume(size)
+        benchmark(preprocess_text, text)
+
+Each parameter combination is a separate case. Results are written as
+JSON and two result files can be compared to flag regressions.
+"""
+import itertools
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+CASES = []
+
+class Benchmark:
+    """
+    Times a callable: calibrates how many calls make up one round, then
+    runs several rounds and keeps per-call statistics
+    """
+    def __init__(self, min_time=0.2, max_rounds=50, min_rounds=5, round_time=0.02):
+        self.min_time = min_time
+        self.max_rounds = max_rounds
+        self.min_rounds = min_rounds
+        self.round_time = round_time
+        self.stats = None
+        self.result = None
+
+    def __call__(self, fn, *args, **kwargs):
+        return self.pedantic(fn, args, kwargs)
+
+    def pedantic(self, fn, args=(), kwargs=None, setup=None, rounds=None, iterations=None):
+        """
+        Time fn(*args, **kwargs). setup, if given, runs untimed before every
+        call; rounds and iterations override the calibration.
+        """
+        kwargs = kwargs or {}
+
+        def run(count):
+            elapsed = 0.0
+            for _ in range(count):
+                if setup:
+                    setup()
+                started = time.perf_counter()
+                self.result = fn(*args, **kwargs)
+                elapsed += time.perf_counter() - started
+            return elapsed
+
+        # Warm up once, and size rounds so each takes about round_time
+        first = run(1)
+        if iterations is None:
+            iterations = max(1, int(self.round_time / first)) if first > 0 else 1000
+        if rounds is None:
+            rounds = int(self.min_time / max(first * iterations, 1e-9))
+            rounds = max(self.min_rounds, min(self.max_rounds, rounds))
+
+        timings = [run(iterations) / iterations for _ in range(rounds)]
+        self.stats = {
+            'min': min(timings),
+            'max': max(timings),
+            'mean': statistics.mean(timings),
+            'median': statistics.median(timings),
+            'stddev': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+            'rounds': rounds,
+            'iterations': iterations
+        }
+        return self.result
+
+def bench_case(name, **params):
+    """
+    Register a benchmark case, run once for every combination of params
+    """
+    def decorator(fn):
+        keys = list(params)
+        for values in itertools.product(*(params[key] for key in keys)):
+            case_params = dict(zip(keys, values))
+            label = ','.join(f'{key}={value}' for key, value in case_params.items())
+            CASES.append((f'{name}[{label}]' if label else name, fn, case_params))
+        return fn
+    return decorator
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def run_cases(name_filter=None, quick=False):
+    """
+    Run the registered cases whose name contains name_filter and return
+    the results document
+    """
+    results = {}
+    for name, fn, params in CASES:
+        if name_filter and name_filter not in name:
+            continue
+        benchmark = Benchmark(min_time=0.05, max_rounds=10, min_rounds=3) if quick else Benchmark()
+        try:
+            fn(benchmark, **params)
+        except Exception as e:
+            print(f"{name:<60} error: {e}")
+            continue
+        if benchmark.stats is None:
+            continue
+        results[name] = benchmark.stats
+        print(f"{name:<60} median {benchmark.stats['median'] * 1000:10.3f} ms  "
+              f"(min {benchmark.stats['min'] * 1000:.3f} ms, {benchmark.stats['rounds']} rounds)")
+
+    return {
+        'created_at': datetime.utcnow().isoformat(),
+        'commit': git_revision(),
+        'machine': {'python': sys.version.split()[0], 'platform': platform.platform()},
+        'results': results
+    }
+
+def compare_results(baseline, current, threshold=0.1):
+    """
+    Compare medians of two results documents. Returns the names of cases
+    that got slower by more than threshold (a fraction).
+    """
+    regressions = []
+    for name in sorted(set(baseline['results']) | set(current['results'])):
+        if name not in current['results']:
+            print(f"{name:<60} removed")
+            continue
+        if name not in baseline['results']:
+            print(f"{name:<60} new")
+            continue
+        before = baseline['results'][name]['median']
+        after = current['results'][name]['median']
+        change = (after - before) / before if before else 0.0
+        flag = ''
+        if change > threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        elif change < -threshold:
+            flag = '  improved'
+        print(f"{name:<60} {before * 1000:10.3f} -> {after * 1000:10.3f} ms  {change:+7.1%}{flag}")
+    return regressions
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+def save_results(path, document):
+    with open(path, 'w') as f:
+        json.dump(document, f, indent=2, sort_keys=True)
@@ -0,0 +1,76 @@
+"""
+Startup benchmark: how long a fresh worker takes to import the app and
+run create_app, and which imports dominate.
+
+Run from the backend directory:
+    python -m benchmarks.startup [--runs 5]
+
+create_app runs with ENSURE_INDEXES=false, so no database is needed.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that should not be imported by "import app"
+HEAVY_MODULES = ['numpy', 'scipy', 'sklearn', 'google.generativeai', 'pdfminer', 'docx', 'sentence_transformers']
+
+PROBE = '''
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app()
+created = time.perf_counter()
+print(json.dumps({
+    'import_app': imported - started,
+    'create_app': created - imported,
+    'heavy_modules': [name for name in %r if name in sys.modules]
+}))
+''' % (HEAVY_MODULES,)
+
+def run_probe():
+    """
+    Import the app and call create_app in a fresh interpreter and return its timings
+    """
+    env = dict(os.environ, ENSURE_INDEXES='false', WARM_UP='false')
+    output = subprocess.run([sys.executable, '-c', PROBE], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def slowest_imports(limit=10):
+    """
+    Return the (cumulative microseconds, module) pairs of the slowest imports of the app
+    """
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=BACKEND_DIR,
+                            capture_output=True, text=True, check=True).stderr
+    timings = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        timings.append((int(cumulative), name.strip()))
+    return sorted(timings, reverse=True)[:limit]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.startup')
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    runs = [run_probe() for _ in range(args.runs)]
+    for stage in ('import_app', 'create_app'):
+        timings = [run[stage] for run in runs]
+        print(f"{stage:<12} median {statistics.median(timings) * 1000:8.1f} ms  "
+              f"(min {min(timings) * 1000:.1f} ms over {len(timings)} runs)")
+    print(f"heavy modules imported at startup: {', '.join(runs[-1]['heavy_modules']) or 'none'}")
+
+    print("\nslowest imports (cumulative):")
+    for cumulative, name in slowest_imports():
+        print(f"{cumulative / 1000:8.1f} ms  {name}")
+
+if __name__ == '__main__':
+    main()
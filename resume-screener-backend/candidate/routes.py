@@ -1,18 +1,25 @@
 
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from werkzeug.utils import secure_filename
-from utils.text_parser import extract_text_from_pdf, extract_text_from_docx, extract_text_from_txt
-from utils.nlp_analyzer import analyze_resume
-from models import save_resume, get_user_resumes, save_analysis, get_user_analyses, get_job, get_all_jobs, get_analysis, delete_resume, delete_analysis
+from bson import ObjectId
+from utils.helpers import allowed_file, get_file_size
+from utils.blob_store import save_blob, hash_text
+from utils.job_index import get_job_index
+from utils.job_cache import job_cache
+from utils.resume_index import remove_from_resume_index
+from utils.task_queue import analysis_queue, QueueFullError
+from utils.metrics import timed
+from utils.suggestion_tasks import suggestion_notifier, sweep_stale_suggestions
+from utils.nlp_analyzer import get_text_scorer
+from candidate.tasks import analyze_uploaded_resume
+from models import get_user_resumes, get_user_analyses, get_job, get_all_jobs, get_analysis, get_analysis_suggestions, delete_resume, delete_resume_analyses, get_resume, get_jobs_by_ids, get_job_descriptions, create_task, update_task, get_task, find_analysis, find_active_task, count_resumes_with_hash
 import os
+import threading
+import time
 import uuid
 
 candidate_bp = Blueprint('candidate', __name__)
 
-def allowed_file(filename):
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
-
 @candidate_bp.route('/upload', methods=['POST'])
 def upload_resume():
     # Hardcoded user_id since we removed authentication
@@ -25,7 +32,8 @@ def upload_resume():
     job_id = request.form['job_id']
     
     # Get job from database
-    job = get_job(job_id)
+    with timed('job_lookup'):
+        job = get_job(job_id)
     if not job:
         return jsonify({'error': 'Job not found'}), 404
     
@@ -48,65 +56,88 @@ def upload_resume():
         if not allowed_file(file.filename):
             return jsonify({'error': 'File type not allowed'}), 400
         
-        # Generate a unique filename
-        filename = str(uuid.uuid4()) + '_' + secure_filename(file.filename)
-        file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-        original_filename = secure_filename(file.filename)
-        
-        # Save file
-        file.save(file_path)
+        # Check file size
+        if get_file_size(file) > current_app.config['MAX_RESUME_SIZE']:
+            return jsonify({'error': 'File too large'}), 413
         
-        # Extract text from file
+        original_filename = secure_filename(file.filename)
         extension = file.filename.rsplit('.', 1)[1].lower()
-        if extension == 'pdf':
-            resume_text = extract_text_from_pdf(file_path)
-        elif extension == 'docx':
-            resume_text = extract_text_from_docx(file_path)
-        elif extension == 'txt':
-            resume_text = extract_text_from_txt(file_path)
-        else:
-            # Remove the saved file
-            if os.path.exists(file_path):
-                os.remove(file_path)
-            return jsonify({'error': 'Unsupported file type'}), 400
+        
+        # Save file under its content hash, so identical uploads share one file
+        with timed('save_file'):
+            resume_hash, file_path = save_blob(file.stream, current_app.config['UPLOAD_FOLDER'], extension)
     else:
         resume_text = request.form['text']
+        resume_hash = hash_text(resume_text)
+    
+    # Identical content was already analyzed against this version of the job
+    job_version = job.get('version', 1)
+    with timed('dedup_lookup'):
+        analysis = find_analysis(resume_hash, job_id, job_version, user_id)
+    if analysis:
+        return jsonify({
+            'resume_id': analysis['resume_id'],
+            'analysis_id': analysis['_id'],
+            'message': 'Resume already analyzed'
+        }), 200
     
-    # Save resume to database
-    resume_data = {
-        'user_id': user_id,
-        'job_id': job_id,
-        'file_path': file_path,
-        'original_filename': original_filename,
-        'resume_text': resume_text
-    }
-    
-    resume_id = save_resume(resume_data)
-    
-    # Analyze resume
-    analysis_result = analyze_resume(resume_text, job['description'], job['skills'])
-    
-    # Save analysis to database
-    analysis_data = {
-        'user_id': user_id,
-        'resume_id': resume_id,
-        'job_id': job_id,
-        'job_title': job['title'],
-        'company': job['company'],
-        'match_percentage': analysis_result['match_percentage'],
-        'ats_score': analysis_result['ats_score'],
-        'matched_skills': analysis_result['matched_skills'],
-        'missing_skills': analysis_result['missing_skills'],
-        'suggestions': analysis_result['suggestions']
-    }
-    
-    analysis_id = save_analysis(analysis_data)
+    # Identical content is being analyzed right now
+    with timed('dedup_lookup'):
+        task = find_active_task(resume_hash, job_id, job_version, user_id)
+    if task:
+        return jsonify({
+            'task_id': task['_id'],
+            'status_url': f"/api/candidate/analysis-status/{task['_id']}",
+            'message': 'Resume uploaded, analysis in progress'
+        }), 202
+    
+    # Parse and analyze in the background
+    task_id = uuid.uuid4().hex
+    with timed('create_task'):
+        create_task({
+            '_id': task_id,
+            'user_id': user_id,
+            'job_id': job_id,
+            'job_version': job_version,
+            'resume_hash': resume_hash,
+            'status': 'queued',
+            'progress': 0,
+            'stage': 'queued'
+        })
+    
+    try:
+        analysis_queue.submit(
+            analyze_uploaded_resume, user_id, job, file_path, original_filename, resume_text, resume_hash,
+            task_id=task_id
+        )
+    except QueueFullError:
+        update_task(task_id, {'status': 'rejected', 'error': 'Too many analyses in progress'})
+        response = jsonify({'error': 'Too many analyses in progress, please try again shortly'})
+        response.headers['Retry-After'] = '5'
+        return response, 503
     
     return jsonify({
-        'resume_id': resume_id,
-        'analysis_id': analysis_id,
-        'message': 'Resume uploaded and analyzed successfully'
-    }), 201
+        'task_id': task_id,
+        'status_url': f'/api/candidate/analysis-status/{task_id}',
+        'message': 'Resume uploaded, analysis in progress'
+    }), 202
+
+@candidate_bp.route('/analysis-status/<task_id>', methods=['GET'])
+def get_analysis_status(task_id):
+    task = get_task(task_id)
+    
+    if not task:
+        return jsonify({'error': 'Task not found'}), 404
+    
+    return jsonify({
+        'task_id': task['_id'],
+        'status': task['status'],
+        'progress': task.get('progress', 0),
+        'stage': task.get('stage'),
+        'resume_id': task.get('resume_id'),
+        'analysis_id': task.get('analysis_id'),
+        'error': task.get('error')
+    }), 200
 
 @candidate_bp.route('/resumes', methods=['GET'])
 def get_resumes():
@@ -128,12 +159,13 @@ def get_analyses():
 
 @candidate_bp.route('/jobs', methods=['GET'])
 def get_jobs():
-    jobs = get_all_jobs()
-    
-    return jsonify(jobs), 200
+    # Served from the job cache, with a 304 if the client's copy is current
+    return job_cache.response('jobs', get_all_jobs)
 
 @candidate_bp.route('/analysis/<analysis_id>', methods=['GET'])
 def get_analysis_details(analysis_id):
+    # Suggestions lost with a worker that exited are reported as failed
+    sweep_stale_suggestions()
     analysis = get_analysis(analysis_id)
     
     if not analysis:
@@ -141,24 +173,156 @@ def get_analysis_details(analysis_id):
     
     return jsonify(analysis), 200
 
+def sse_event(event, data):
+    return f"event: {event}\ndata: {current_app.json.dumps(data)}\n\n"
+
+# Streams waiting for suggestions in this process; each holds a server thread
+_open_streams = {'count': 0}
+_open_streams_lock = threading.Lock()
+
+# Milliseconds a client waits before reconnecting to a busy worker
+STREAM_BUSY_RETRY = 5000
+
+def stream_analysis(analysis):
+    """
+    Server-sent events for an analysis: the scores at once, then the
+    suggestions when they are ready, with keep-alive comments meanwhile.
+    At most SUGGESTION_STREAM_LIMIT streams wait at once, so they cannot
+    take every thread of the worker; beyond it a 'busy' event asks the
+    client to reconnect later.
+    """
+    analysis_id = analysis['_id']
+    yield sse_event('analysis', {key: value for key, value in analysis.items() if key != 'suggestions'})
+    
+    status = analysis.get('suggestions_status', 'ready')
+    if status != 'pending':
+        yield sse_event('suggestions', {'analysis_id': analysis_id, 'suggestions': analysis['suggestions'],
+                                        'status': status})
+        return
+    
+    with _open_streams_lock:
+        busy = _open_streams['count'] >= current_app.config['SUGGESTION_STREAM_LIMIT']
+        if not busy:
+            _open_streams['count'] += 1
+    if busy:
+        yield f"retry: {STREAM_BUSY_RETRY}\n" + sse_event('busy', {'analysis_id': analysis_id})
+        return
+    try:
+        yield from wait_for_suggestions(analysis_id)
+    finally:
+        with _open_streams_lock:
+            _open_streams['count'] -= 1
+
+def wait_for_suggestions(analysis_id):
+    """Events of a stream whose analysis is pending, until its suggestions are saved or the stream times out"""
+    poll = current_app.config['SUGGESTION_STREAM_POLL']
+    deadline = time.monotonic() + current_app.config['SUGGESTION_STREAM_TIMEOUT']
+    status = 'pending'
+    while status == 'pending':
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            yield sse_event('timeout', {'analysis_id': analysis_id})
+            return
+        
+        # Woken early when this process saves the suggestions; otherwise check the database
+        suggestion_notifier.wait(analysis_id, min(poll, remaining))
+        sweep_stale_suggestions()
+        current = get_analysis_suggestions(analysis_id)
+        if not current:
+            return
+        status = current.get('suggestions_status', 'ready')
+        suggestions = current['suggestions']
+        if status == 'pending':
+            yield ': keep-alive\n\n'
+    
+    yield sse_event('suggestions', {'analysis_id': analysis_id, 'suggestions': suggestions, 'status': status})
+
+@candidate_bp.route('/analysis/<analysis_id>/stream', methods=['GET'])
+def stream_analysis_details(analysis_id):
+    if not ObjectId.is_valid(analysis_id):
+        return jsonify({'error': 'Analysis not found'}), 404
+    analysis = get_analysis(analysis_id)
+    
+    if not analysis:
+        return jsonify({'error': 'Analysis not found'}), 404
+    
+    # Scores are sent at once and suggestions as soon as Gemini returns them
+    return Response(stream_with_context(stream_analysis(analysis)), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def job_text_scorer(resume_text):
+    """
+    score_text for rank_jobs when TEXT_SCORER is not TF-IDF: the configured
+    scorer compares the resume with every job's description, as analyses
+    do. Similarity is symmetric, so the jobs are scored as the batch and
+    the resume as the single text. Returns None for the job index's own
+    TF-IDF scores.
+    """
+    scorer = get_text_scorer()
+    if scorer.name == 'tfidf':
+        return None
+    
+    def score_text(job_ids):
+        descriptions = get_job_descriptions(job_ids)
+        return scorer.score_many([descriptions.get(job_id, '') for job_id in job_ids], resume_text)
+    
+    return score_text
+
+@candidate_bp.route('/resume/<resume_id>/recommended-jobs', methods=['GET'])
+def get_recommended_jobs(resume_id):
+    # Number of jobs to return
+    try:
+        k = int(request.args.get('k', 10))
+    except ValueError:
+        return jsonify({'error': 'k must be an integer'}), 400
+    k = max(1, min(k, 100))
+    
+    # Get resume from database
+    if not ObjectId.is_valid(resume_id):
+        return jsonify({'error': 'Resume not found'}), 404
+    resume = get_resume(resume_id)
+    if not resume:
+        return jsonify({'error': 'Resume not found'}), 404
+    
+    # Rank every job in one vectorized pass, with the same text scorer as analyses
+    resume_text = resume.get('resume_text') or ''
+    ranked_jobs = get_job_index().rank_jobs(resume_text, k, job_text_scorer(resume_text))
+    
+    # Attach job details for the top k only
+    jobs = get_jobs_by_ids([ranked['job_id'] for ranked in ranked_jobs])
+    recommendations = []
+    for ranked in ranked_jobs:
+        job = jobs.get(ranked['job_id'])
+        if not job:
+            continue
+        recommendations.append({
+            **ranked,
+            'job_title': job['title'],
+            'company': job['company']
+        })
+    
+    return jsonify(recommendations), 200
+
 @candidate_bp.route('/resume/<resume_id>', methods=['DELETE'])
 def delete_resume_endpoint(resume_id):
     # Hardcoded user_id since we removed authentication
     user_id = "default_user_id"
     
     # Get resume from database
-    resume = get_user_resumes(user_id)
-    if not resume:
+    resume = get_resume(resume_id)
+    if not resume or resume['user_id'] != user_id:
         return jsonify({'error': 'Resume not found'}), 404
     
-    # Delete file if exists
-    if resume['file_path'] and os.path.exists(resume['file_path']):
+    # Delete file if exists and no other resume shares its content
+    shared = resume.get('resume_hash') and count_resumes_with_hash(resume['resume_hash']) > 1
+    if resume['file_path'] and os.path.exists(resume['file_path']) and not shared:
         os.remove(resume['file_path'])
     
-    # Delete resume from database
+    # Delete resume from database and from the similar resume index
     delete_resume(resume_id)
+    remove_from_resume_index(resume_id)
     
-    # Delete associated analysis from database
-    delete_analysis(resume_id)
+    # Delete associated analyses from database
+    delete_resume_analyses(resume_id)
     
     return jsonify({'message': 'Resume and analysis deleted successfully'}), 200
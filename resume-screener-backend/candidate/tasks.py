@@ -0,0 +1,71 @@
+from utils.blob_store import parse_blob
+from utils.task_queue import PermanentTaskError
+from utils.nlp_analyzer import score_resumes
+from utils.suggestion_tasks import queue_suggestions
+from utils.resume_index import index_resumes
+from utils.metrics import timed
+from models import save_resume, save_analysis
+
+def analyze_uploaded_resume(user_id, job, file_path, original_filename, resume_text, resume_hash, report, state):
+    """
+    Background task: parse, save and analyze an uploaded resume.
+    Steps already completed in a previous attempt are skipped on retry.
+    """
+    job_id = job['_id']
+    
+    # Extract text from file
+    if resume_text is None and 'resume_text' not in state:
+        report(10, 'parsing')
+        result = parse_blob(resume_hash, file_path)
+        if not result.ok:
+            raise PermanentTaskError(f'Could not extract text ({result.status}): {result.error}')
+        state['resume_text'] = result.text
+    elif 'resume_text' not in state:
+        state['resume_text'] = resume_text
+    
+    # Save resume to database
+    if 'resume_id' not in state:
+        report(30, 'saving_resume')
+        with timed('save_resume'):
+            state['resume_id'] = save_resume({
+                'user_id': user_id,
+                'job_id': job_id,
+                'file_path': file_path,
+                'original_filename': original_filename,
+                'resume_hash': resume_hash,
+                'resume_text': state['resume_text']
+            })
+        index_resumes([state['resume_id']], [state['resume_text']])
+    
+    # Score the resume; Gemini suggestions follow once the analysis is saved
+    if 'analysis_result' not in state:
+        report(50, 'analyzing')
+        state['analysis_result'] = score_resumes([state['resume_text']], job['description'], job['skills'], job_id)[0]
+    
+    # Save analysis to database
+    if 'analysis_id' not in state:
+        report(90, 'saving_analysis')
+        analysis_result = state['analysis_result']
+        with timed('save_analysis'):
+            state['analysis_id'] = save_analysis({
+                'user_id': user_id,
+                'resume_id': state['resume_id'],
+                'resume_hash': resume_hash,
+                'job_id': job_id,
+                'job_version': job.get('version', 1),
+                'job_title': job['title'],
+                'company': job['company'],
+                'match_percentage': analysis_result['match_percentage'],
+                'ats_score': analysis_result['ats_score'],
+                'matched_skills': analysis_result['matched_skills'],
+                'missing_skills': analysis_result['missing_skills'],
+                'suggestions': analysis_result['suggestions'],
+                'suggestions_status': 'pending',
+                'features': analysis_result['features']
+            })
+        queue_suggestions(state['analysis_id'], state['resume_text'], job['description'], analysis_result)
+    
+    return {
+        'resume_id': state['resume_id'],
+        'analysis_id': state['analysis_id']
+    }
@@ -9,6 +9,10 @@ class Config:
     
     # MongoDB settings
     MONGO_URI = os.environ.get('MONGO_URI', 'mongodb://localhost:27017/resume_screener')
+    ENSURE_INDEXES = os.environ.get('ENSURE_INDEXES', 'True').lower() == 'true'  # Create indexes in create_app
+    
+    # Load models and start parsers in create_app instead of on the first request (gunicorn.conf.py turns it on)
+    WARM_UP = os.environ.get('WARM_UP', 'False').lower() == 'true'
     
     # JWT settings
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'jwt-secret-key-please-change')
@@ -16,8 +20,77 @@ class Config:
     
     # File upload settings
     UPLOAD_FOLDER = os.path.join(os.getcwd(), 'uploads')
-    MAX_CONTENT_LENGTH = 5 * 1024 * 1024  # 5 MB max upload size
+    MAX_CONTENT_LENGTH = 50 * 1024 * 1024  # 50 MB max request size (bulk screening)
+    MAX_RESUME_SIZE = 5 * 1024 * 1024  # 5 MB max size of a single resume
     ALLOWED_EXTENSIONS = {'pdf', 'docx', 'txt'}
     
+    # Candidate list pagination
+    CANDIDATES_PAGE_SIZE = 50
+    CANDIDATES_MAX_PAGE_SIZE = 500
+    LEADERBOARD_SIZE = 100  # Best analyses kept per job for /job/<id>/top, the largest k allowed
+    
+    # Match scoring settings
+    TEXT_SCORER = os.environ.get('TEXT_SCORER', 'tfidf')  # 'tfidf', 'embedding' or 'hashing'
+    EMBEDDING_MODEL_PATH = os.environ.get('EMBEDDING_MODEL_PATH', os.path.join(os.getcwd(), 'models', 'all-MiniLM-L6-v2'))
+    EMBEDDING_BATCH_SIZE = 32
+    EMBEDDING_CACHE_DIR = os.environ.get('EMBEDDING_CACHE_DIR', os.path.join(os.getcwd(), 'embeddings'))
+    HASHING_DIMENSIONS = 384
+    SKILLS_WEIGHT = float(os.environ.get('SKILLS_WEIGHT', 0.6))  # Share of the final score from skill coverage
+    TEXT_WEIGHT = float(os.environ.get('TEXT_WEIGHT', 0.4))  # Share of the final score from text similarity
+    
+    # Job index snapshot, memory-mapped by every worker (empty to fit in memory per worker)
+    JOB_INDEX_DIR = os.environ.get('JOB_INDEX_DIR', os.path.join(os.getcwd(), 'job_index'))
+    JOB_INDEX_CHECK_INTERVAL = float(os.environ.get('JOB_INDEX_CHECK_INTERVAL', 5.0))  # Seconds between checks for a rebuilt snapshot
+    
+    # Similar resume index settings
+    RESUME_INDEX_DIR = os.environ.get('RESUME_INDEX_DIR', os.path.join(os.getcwd(), 'resume_index'))
+    RESUME_INDEX_EXACT_LIMIT = 50000  # Resumes scored exactly before switching to an inverted file
+    RESUME_INDEX_PROBES = 8  # Inverted lists searched per query
+    
+    # Document parser settings
+    PARSER_WORKERS = int(os.environ.get('PARSER_WORKERS', 2))  # Concurrent parser processes per web worker
+    PARSER_TIMEOUT = 30  # Seconds per document
+    PARSER_MEMORY_LIMIT = 512 * 1024 * 1024  # Resident bytes per parser process
+    
+    # Background analysis settings
+    ANALYSIS_WORKERS = int(os.environ.get('ANALYSIS_WORKERS', 4))  # Concurrent analyses per process
+    ANALYSIS_QUEUE_SIZE = int(os.environ.get('ANALYSIS_QUEUE_SIZE', 100))  # Max queued or running analyses
+    ANALYSIS_MAX_RETRIES = 2
+    RESCORE_BATCH_SIZE = 2000  # Analyses re-scored per batch when a job changes
+    
+    # Bulk screening settings
+    MAX_SCREEN_FILES = 500  # Max resumes per screening request
+    MAX_SCREEN_TOTAL_SIZE = 100 * 1024 * 1024  # Max bytes saved per screening request, archives extracted
+    
+    # Bulk ingest settings (python -m ingest)
+    INGEST_WORKERS = int(os.environ.get('INGEST_WORKERS', os.cpu_count() or 2))  # Parser processes
+    INGEST_BATCH_SIZE = int(os.environ.get('INGEST_BATCH_SIZE', 500))  # Files per database write and checkpoint
+    
     # Google Gemini API Key
     GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY', '')
+    GEMINI_MODEL = os.environ.get('GEMINI_MODEL', 'gemini-2.0-flash-lite')
+    GEMINI_TIMEOUT = float(os.environ.get('GEMINI_TIMEOUT', 10))  # Seconds before falling back to static suggestions
+    GEMINI_REQUEST_TIMEOUT = float(os.environ.get('GEMINI_REQUEST_TIMEOUT', 30))  # Seconds before a Gemini request is abandoned
+    LLM_BACKEND = os.environ.get('LLM_BACKEND', 'gemini')  # 'gemini' or 'fake' (canned suggestions, for load tests)
+    FAKE_LLM_DELAY = float(os.environ.get('FAKE_LLM_DELAY', 0))  # Seconds each fake suggestion call takes
+    PROMPT_RESUME_TOKENS = int(os.environ.get('PROMPT_RESUME_TOKENS', 1200))  # Resume tokens sent per resume
+    PROMPT_JOB_TOKENS = int(os.environ.get('PROMPT_JOB_TOKENS', 500))  # Job description tokens sent per prompt
+    SUGGESTION_BATCH_SIZE = int(os.environ.get('SUGGESTION_BATCH_SIZE', 5))  # Resumes per Gemini request in bulk screening
+    SUGGESTION_BATCH_TOKENS = 6000  # Max resume tokens per batched Gemini request
+    
+    # Progressive results: suggestions are generated after the scores are saved
+    SUGGESTION_WORKERS = int(os.environ.get('SUGGESTION_WORKERS', 4))  # Concurrent Gemini calls per process
+    SUGGESTION_QUEUE_SIZE = int(os.environ.get('SUGGESTION_QUEUE_SIZE', 500))  # Max queued suggestion calls
+    SUGGESTION_STREAM_POLL = 1.0  # Seconds between checks of a streamed analysis
+    SUGGESTION_STREAM_TIMEOUT = 60  # Seconds a stream waits for suggestions
+    SUGGESTION_STREAM_LIMIT = int(os.environ.get('SUGGESTION_STREAM_LIMIT', 4))  # Open streams per worker, below its threads
+    SUGGESTION_PENDING_TIMEOUT = 600  # Seconds after which pending suggestions are marked failed
+    SUGGESTION_SWEEP_INTERVAL = 60  # Seconds between checks for stale pending suggestions per process
+    
+    # Gemini suggestion cache settings
+    SUGGESTION_CACHE_SIZE = 1024  # Entries kept in memory per process
+    SUGGESTION_CACHE_TTL = 7 * 24 * 3600  # Seconds
+    SUGGESTION_CACHE_BACKEND = os.environ.get('SUGGESTION_CACHE_BACKEND', 'memory')  # 'memory' or 'mongo'
+    
+    # Job catalogue cache: seconds between checks of the shared job version
+    JOB_CACHE_CHECK_INTERVAL = float(os.environ.get('JOB_CACHE_CHECK_INTERVAL', 1.0))
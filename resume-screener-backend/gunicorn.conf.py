@@ -0,0 +1,10 @@
+# Gunicorn settings, e.g. gunicorn "app:create_app()"
+import os
+
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+# Threads per worker, so open suggestion streams do not block other requests
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+# Load models and start parsers in each worker's create_app before it takes
+# requests. The app is not preloaded, so this runs after the fork.
+os.environ.setdefault('WARM_UP', 'true')
@@ -1,42 +1,266 @@
 
-from flask import Blueprint, request, jsonify
-from models import get_candidate_analyses, get_analysis, save_job, get_all_jobs, get_job
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
+from werkzeug.utils import secure_filename
+from bson import ObjectId
+from models import get_candidate_analyses, get_analysis, save_job, get_all_jobs, get_job, save_resumes, save_analyses, find_analysis, get_blob, count_resumes_with_hash, iter_job_analyses, get_resume, get_resumes_by_ids, update_job, update_job_analyses, create_task, update_task, get_task, get_top_candidates, rebuild_leaderboard
+from utils.job_index import get_job_index
+from utils.job_cache import job_cache
+from utils.resume_index import get_resume_index, index_resumes
+from utils.nlp_analyzer import score_resumes
+from utils.blob_store import save_blob, parse_blobs
+from utils.helpers import allowed_file, get_file_size
+from utils.metrics import timed
+from utils.rescorer import rescore_job
+from utils.suggestion_tasks import queue_suggestions_many
+from utils.task_queue import analysis_queue, QueueFullError
+import csv
+import io
+import os
+import uuid
+import zipfile
 
 hr_bp = Blueprint('hr', __name__)
 
+class ScreeningError(Exception):
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+class LimitedReader:
+    """
+    Reads a stream while counting its bytes, raising ScreeningError once
+    the file is over max_size or the request is over its remaining budget.
+    Archive members are counted as they are extracted, whatever size their
+    headers declare.
+    """
+    def __init__(self, stream, filename, max_size, budget):
+        self.stream = stream
+        self.filename = filename
+        self.max_size = max_size
+        self.budget = budget
+        self.size = 0
+
+    def read(self, size=-1):
+        chunk = self.stream.read(size)
+        self.size += len(chunk)
+        self.budget['remaining'] -= len(chunk)
+        if self.size > self.max_size:
+            raise ScreeningError(f'File too large: {self.filename}', 413)
+        if self.budget['remaining'] < 0:
+            raise ScreeningError('Resumes too large in total', 413)
+        return chunk
+
+def save_screening_file(filename, stream, budget):
+    """
+    Save a resume to the upload folder under its content hash.
+    Returns (original_filename, resume_hash, file_path).
+    """
+    extension = filename.rsplit('.', 1)[1].lower()
+    reader = LimitedReader(stream, filename, current_app.config['MAX_RESUME_SIZE'], budget)
+    resume_hash, file_path = save_blob(reader, current_app.config['UPLOAD_FOLDER'], extension)
+    return secure_filename(filename), resume_hash, file_path
+
+def remove_unused_file(resume_hash, file_path):
+    """
+    Remove a saved resume file unless a resume or cached text (other than
+    blank text) refers to it
+    """
+    blob = get_blob(resume_hash)
+    if blob is not None and (blob.get('resume_text') or '').strip():
+        return
+    if count_resumes_with_hash(resume_hash) == 0 and os.path.exists(file_path):
+        os.remove(file_path)
+
+def collect_screening_files(files):
+    """
+    Save uploaded resumes, including the ones inside zip archives.
+    Returns a list of (original_filename, resume_hash, file_path) tuples.
+    """
+    collected = []
+    budget = {'remaining': current_app.config['MAX_SCREEN_TOTAL_SIZE']}
+    
+    try:
+        for file in files:
+            if file.filename == '':
+                continue
+            
+            if file.filename.lower().endswith('.zip'):
+                collect_zip_file(file, collected, budget)
+            else:
+                if not allowed_file(file.filename):
+                    raise ScreeningError(f'File type not allowed: {file.filename}')
+                if get_file_size(file) > current_app.config['MAX_RESUME_SIZE']:
+                    raise ScreeningError(f'File too large: {file.filename}', 413)
+                
+                check_screening_count(collected)
+                collected.append(save_screening_file(file.filename, file.stream, budget))
+    except ScreeningError:
+        # Remove files saved before the error, unless identical content was stored before
+        for _, resume_hash, file_path in collected:
+            remove_unused_file(resume_hash, file_path)
+        raise
+    
+    return collected
+
+def collect_zip_file(file, collected, budget):
+    """
+    Save every supported resume inside an uploaded zip archive
+    """
+    try:
+        archive = zipfile.ZipFile(file.stream)
+    except zipfile.BadZipFile:
+        raise ScreeningError(f'Invalid zip archive: {file.filename}')
+    
+    with archive:
+        for info in archive.infolist():
+            name = os.path.basename(info.filename)
+            
+            # Skip directories, macOS metadata and unsupported files
+            if info.is_dir() or name.startswith('.') or '__MACOSX' in info.filename:
+                continue
+            if not allowed_file(name):
+                continue
+            
+            # Reject oversized members before extracting; the bytes actually
+            # extracted are counted too, as the declared size can lie
+            if info.file_size > current_app.config['MAX_RESUME_SIZE']:
+                raise ScreeningError(f'File too large: {name}', 413)
+            
+            check_screening_count(collected)
+            with archive.open(info) as stream:
+                collected.append(save_screening_file(name, stream, budget))
+
+def screening_result(original_filename, analysis_id, analysis, reused=False):
+    return {
+        'analysis_id': analysis_id,
+        'resume_id': analysis['resume_id'],
+        'filename': original_filename,
+        'match_percentage': analysis['match_percentage'],
+        'ats_score': analysis['ats_score'],
+        'matched_skills': analysis['matched_skills'],
+        'missing_skills': analysis['missing_skills'],
+        'suggestions': analysis['suggestions'],
+        'suggestions_status': analysis.get('suggestions_status', 'ready'),
+        'reused': reused
+    }
+
+def check_screening_count(collected):
+    max_files = current_app.config['MAX_SCREEN_FILES']
+    if len(collected) >= max_files:
+        raise ScreeningError(f'At most {max_files} resumes can be screened at once', 413)
+
+def parse_score(value):
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+def encode_cursor(analysis):
+    return f"{analysis['match_percentage']}_{analysis['_id']}"
+
+def decode_cursor(cursor):
+    score, analysis_id = cursor.split('_', 1)
+    if not ObjectId.is_valid(analysis_id):
+        raise ValueError(f'Invalid analysis ID: {analysis_id}')
+    return float(score), analysis_id
+
 @hr_bp.route('/candidates', methods=['GET'])
 def get_candidates():
     # Get query parameters for filtering
     job_id = request.args.get('job_id')
-    min_score = request.args.get('min_score')
-    max_score = request.args.get('max_score')
+    min_score = parse_score(request.args.get('min_score'))
+    max_score = parse_score(request.args.get('max_score'))
     
-    # Get all analyses
-    analyses = get_candidate_analyses()
+    # Skill filter, e.g. ?skills=kubernetes,go&mode=all, answered from the skill index
+    skills = [skill for skill in request.args.get('skills', '').split(',') if skill.strip()]
+    mode = request.args.get('mode', 'all')
+    if mode not in ('all', 'any'):
+        return jsonify({'error': "mode must be 'all' or 'any'"}), 400
     
-    # Filter by job_id if specified
-    if job_id:
-        analyses = [a for a in analyses if a['job_id'] == job_id]
-    
-    # Filter by match_percentage if specified
-    if min_score:
+    # Keyset pagination when 'limit' or 'after' is given: the cursor of the
+    # next page is sent in X-Next-Cursor. Without them every match is returned.
+    limit = None
+    after = None
+    if 'limit' in request.args or 'after' in request.args:
         try:
-            min_score = float(min_score)
-            analyses = [a for a in analyses if a['match_percentage'] >= min_score]
+            limit = int(request.args.get('limit', current_app.config['CANDIDATES_PAGE_SIZE']))
+            after = request.args.get('after')
+            after = decode_cursor(after) if after else None
         except ValueError:
-            pass
+            return jsonify({'error': 'Invalid limit or cursor'}), 400
+        limit = max(1, min(limit, current_app.config['CANDIDATES_MAX_PAGE_SIZE']))
     
-    if max_score:
-        try:
-            max_score = float(max_score)
-            analyses = [a for a in analyses if a['match_percentage'] <= max_score]
-        except ValueError:
-            pass
+    # Filter and sort by match_percentage in descending order in the database
+    analyses = get_candidate_analyses(job_id, min_score, max_score, after, limit, skills, mode == 'all')
     
-    # Sort by match_percentage in descending order
-    analyses.sort(key=lambda a: a['match_percentage'], reverse=True)
+    response = jsonify(analyses)
+    if limit is not None and len(analyses) == limit:
+        response.headers['X-Next-Cursor'] = encode_cursor(analyses[-1])
+    return response, 200
+
+@hr_bp.route('/job/<job_id>/top', methods=['GET'])
+def get_top_job_candidates(job_id):
+    job = get_job(job_id) if ObjectId.is_valid(job_id) else None
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    try:
+        k = int(request.args.get('k', 20))
+    except ValueError:
+        return jsonify({'error': 'k must be an integer'}), 400
+    k = max(1, min(k, current_app.config['LEADERBOARD_SIZE']))
+    
+    # Read from the job's leaderboard document instead of sorting its analyses
+    return jsonify(get_top_candidates(job_id, k)), 200
+
+# Columns of the CSV export; list fields are joined with EXPORT_LIST_SEPARATOR
+EXPORT_COLUMNS = ['_id', 'user_id', 'resume_id', 'job_id', 'job_title', 'company',
+                  'match_percentage', 'ats_score', 'matched_skills', 'missing_skills']
+EXPORT_LIST_SEPARATOR = '; '
+
+def export_ndjson(analyses):
+    for analysis in analyses:
+        yield current_app.json.dumps(analysis) + '\n'
+
+def export_csv(analyses):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    
+    def flush():
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+    
+    writer.writerow(EXPORT_COLUMNS)
+    yield flush()
+    for analysis in analyses:
+        writer.writerow([
+            EXPORT_LIST_SEPARATOR.join(value) if isinstance(value, list) else value
+            for value in (analysis.get(column) for column in EXPORT_COLUMNS)
+        ])
+        yield flush()
+
+EXPORT_FORMATS = {
+    'ndjson': (export_ndjson, 'application/x-ndjson'),
+    'csv': (export_csv, 'text/csv')
+}
+
+@hr_bp.route('/job/<job_id>/candidates/export', methods=['GET'])
+def export_candidates(job_id):
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f'Unsupported export format: {export_format}'}), 400
+    
+    if not ObjectId.is_valid(job_id) or not get_job(job_id):
+        return jsonify({'error': 'Job not found'}), 404
     
-    return jsonify(analyses), 200
+    # Stream rows straight from the cursor so memory does not grow with the export
+    write_rows, mimetype = EXPORT_FORMATS[export_format]
+    response = Response(stream_with_context(write_rows(iter_job_analyses(job_id))), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=candidates-{job_id}.{export_format}'
+    return response
 
 @hr_bp.route('/candidate/<analysis_id>', methods=['GET'])
 def get_candidate_analysis(analysis_id):
@@ -47,6 +271,42 @@ def get_candidate_analysis(analysis_id):
     
     return jsonify(analysis), 200
 
+@hr_bp.route('/resume/<resume_id>/similar', methods=['GET'])
+def get_similar_resumes(resume_id):
+    # Number of resumes to return
+    try:
+        k = int(request.args.get('k', 10))
+    except ValueError:
+        return jsonify({'error': 'k must be an integer'}), 400
+    k = max(1, min(k, 100))
+    
+    # Get resume from database
+    if not ObjectId.is_valid(resume_id):
+        return jsonify({'error': 'Resume not found'}), 404
+    resume = get_resume(resume_id)
+    if not resume:
+        return jsonify({'error': 'Resume not found'}), 404
+    
+    # Ask for a few extra neighbours to make up for copies of the same file and deleted resumes
+    neighbours = get_resume_index().search(resume.get('resume_text') or '', 2 * k, exclude=[resume_id])
+    
+    # Attach resume details, skipping copies of this resume's own content
+    found = get_resumes_by_ids([neighbour_id for neighbour_id, _ in neighbours])
+    similar = []
+    for neighbour_id, similarity in neighbours:
+        neighbour = found.get(neighbour_id)
+        if not neighbour or (resume.get('resume_hash') and neighbour.get('resume_hash') == resume['resume_hash']):
+            continue
+        similar.append({
+            'resume_id': neighbour_id,
+            'user_id': neighbour.get('user_id'),
+            'job_id': neighbour.get('job_id'),
+            'original_filename': neighbour.get('original_filename'),
+            'similarity': round(similarity, 4)
+        })
+    
+    return jsonify(similar[:k]), 200
+
 @hr_bp.route('/job', methods=['POST'])
 def create_job():
     data = request.get_json()
@@ -58,6 +318,10 @@ def create_job():
     
     # Create job
     job_id = save_job(data)
+    job_cache.invalidate()
+    
+    # Precompute the job vector so resumes can be scored against it right away
+    get_job_index().add_job(job_id, data['description'], data['skills'])
     
     return jsonify({
         'job_id': job_id,
@@ -66,15 +330,237 @@ def create_job():
 
 @hr_bp.route('/jobs', methods=['GET'])
 def get_jobs():
-    jobs = get_all_jobs()
-    
-    return jsonify(jobs), 200
+    # Served from the job cache, with a 304 if the client's copy is current
+    return job_cache.response('jobs', get_all_jobs)
 
 @hr_bp.route('/job/<job_id>', methods=['GET'])
 def get_job_by_id(job_id):
-    job = get_job(job_id)
+    if not ObjectId.is_valid(job_id):
+        return jsonify({'error': 'Job not found'}), 404
+    response = job_cache.response(f'job:{job_id}', lambda: get_job(job_id))
+    
+    if response is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    return response
+
+# Job fields HR can edit; changing the description or skills makes a new job version
+JOB_FIELDS = ['title', 'company', 'description', 'skills']
+SCORED_JOB_FIELDS = ['description', 'skills']
+
+def start_rescore(job):
+    """
+    Queue re-scoring of the job's analyses against its current version.
+    Returns the task id, or None if the queue is full.
+    """
+    task_id = uuid.uuid4().hex
+    create_task({
+        '_id': task_id,
+        'type': 'rescore',
+        'job_id': job['_id'],
+        'job_version': job.get('version', 1),
+        'status': 'queued',
+        'progress': 0,
+        'stage': 'queued'
+    })
+    
+    try:
+        analysis_queue.submit(rescore_job, job, task_id=task_id)
+    except QueueFullError:
+        update_task(task_id, {'status': 'rejected', 'error': 'Too many tasks in progress'})
+        return None
+    return task_id
+
+def rescore_response(job, task_id, message):
+    if task_id is None:
+        response = jsonify({'error': 'Too many tasks in progress, please try again shortly', 'job': job})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    
+    return jsonify({
+        'job': job,
+        'task_id': task_id,
+        'status_url': f'/api/hr/task/{task_id}',
+        'message': message
+    }), 202
+
+@hr_bp.route('/job/<job_id>', methods=['PUT'])
+def edit_job(job_id):
+    data = request.get_json() or {}
+    
+    job = get_job(job_id) if ObjectId.is_valid(job_id) else None
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    fields = {field: data[field] for field in JOB_FIELDS if field in data}
+    for field in ('title', 'company', 'description'):
+        if field in fields and not isinstance(fields[field], str):
+            return jsonify({'error': f'{field} must be a string'}), 400
+    if 'skills' in fields and not (isinstance(fields['skills'], list) and all(isinstance(skill, str) for skill in fields['skills'])):
+        return jsonify({'error': 'skills must be a list of strings'}), 400
+    if not fields:
+        return jsonify({'error': f"Nothing to update, expected one of: {', '.join(JOB_FIELDS)}"}), 400
+    
+    # Existing analyses are stale only if what they were scored on changed
+    rescore = any(field in fields and fields[field] != job.get(field) for field in SCORED_JOB_FIELDS)
+    job = update_job(job_id, fields, new_version=rescore)
+    job_cache.invalidate()
+    
+    if not rescore:
+        # Analyses keep a copy of the job title and company
+        update_job_analyses(job_id, {'job_title': job['title'], 'company': job['company']})
+        rebuild_leaderboard(job_id)
+        return jsonify({'job': job, 'message': 'Job updated successfully'}), 200
+    
+    # Re-project the job vector, then re-score its analyses in the background
+    get_job_index().add_job(job_id, job['description'], job['skills'])
+    return rescore_response(job, start_rescore(job), 'Job updated, re-scoring candidates')
+
+@hr_bp.route('/job/<job_id>/rescore', methods=['POST'])
+def rescore_candidates(job_id):
+    job = get_job(job_id) if ObjectId.is_valid(job_id) else None
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    # Only analyses scored against an older version of the job are re-scored
+    return rescore_response(job, start_rescore(job), 'Re-scoring candidates')
+
+@hr_bp.route('/task/<task_id>', methods=['GET'])
+def get_task_status(task_id):
+    task = get_task(task_id)
     
+    if not task:
+        return jsonify({'error': 'Task not found'}), 404
+    
+    return jsonify({
+        'task_id': task['_id'],
+        'type': task.get('type'),
+        'job_id': task.get('job_id'),
+        'status': task['status'],
+        'progress': task.get('progress', 0),
+        'stage': task.get('stage'),
+        'rescored': task.get('rescored'),
+        'skipped': task.get('skipped'),
+        'error': task.get('error')
+    }), 200
+
+@hr_bp.route('/job/<job_id>/screen', methods=['POST'])
+def screen_resumes(job_id):
+    # Get job from database
+    job = get_job(job_id) if ObjectId.is_valid(job_id) else None
     if not job:
         return jsonify({'error': 'Job not found'}), 404
     
-    return jsonify(job), 200
+    # Resumes can be sent as several 'files' parts, zip archives or both
+    files = request.files.getlist('files')
+    if not files:
+        return jsonify({'error': 'At least one file must be provided'}), 400
+    
+    # Gemini suggestions are slow, so they are only generated on request,
+    # in the background once the scores are saved
+    include_suggestions = request.form.get('suggestions', 'false').lower() == 'true'
+    
+    try:
+        with timed('save_files'):
+            screening_files = collect_screening_files(files)
+    except ScreeningError as e:
+        return jsonify({'error': e.message}), e.status_code
+    
+    if not screening_files:
+        return jsonify({'error': 'No supported resumes found'}), 400
+    
+    job_version = job.get('version', 1)
+    
+    # Group files by content, so identical resumes are parsed and scored once
+    filenames_by_hash = {}
+    file_paths = {}
+    for original_filename, resume_hash, file_path in screening_files:
+        filenames_by_hash.setdefault(resume_hash, []).append(original_filename)
+        file_paths[resume_hash] = file_path
+    
+    results = []
+    documents = []
+    failed = []
+    unscreened = []
+    for resume_hash, filenames in filenames_by_hash.items():
+        # Identical content was already screened against this version of the job
+        analysis = find_analysis(resume_hash, job_id, job_version, None)
+        if analysis:
+            for original_filename in filenames:
+                results.append(screening_result(original_filename, analysis['_id'], analysis, reused=True))
+        else:
+            unscreened.append(resume_hash)
+    
+    # Extract text in parallel, reusing the text cached for identical files
+    parse_results = parse_blobs([(resume_hash, file_paths[resume_hash]) for resume_hash in unscreened])
+    for resume_hash, result in zip(unscreened, parse_results):
+        filenames = filenames_by_hash[resume_hash]
+        if result.ok and result.text.strip():
+            documents.append((resume_hash, result.text))
+        else:
+            remove_unused_file(resume_hash, file_paths[resume_hash])
+            for original_filename in filenames:
+                failed.append({
+                    'filename': original_filename,
+                    'error': result.error or 'Could not extract text',
+                    'status': result.status if not result.ok else 'empty'
+                })
+    
+    if documents:
+        # Score the whole batch in one pass
+        analysis_results = score_resumes(
+            [resume_text for _, resume_text in documents],
+            job['description'],
+            job['skills'],
+            job_id
+        )
+        
+        # Save resumes and analyses to database
+        with timed('save_resumes'):
+            resume_ids = save_resumes([{
+                'user_id': None,
+                'job_id': job_id,
+                'file_path': file_paths[resume_hash],
+                'original_filename': filenames_by_hash[resume_hash][0],
+                'resume_hash': resume_hash,
+                'resume_text': resume_text
+            } for resume_hash, resume_text in documents])
+        index_resumes(resume_ids, [resume_text for _, resume_text in documents])
+        
+        analysis_list = [{
+            'user_id': None,
+            'resume_id': resume_id,
+            'resume_hash': resume_hash,
+            'job_id': job_id,
+            'job_version': job_version,
+            'job_title': job['title'],
+            'company': job['company'],
+            'match_percentage': analysis_result['match_percentage'],
+            'ats_score': analysis_result['ats_score'],
+            'matched_skills': analysis_result['matched_skills'],
+            'missing_skills': analysis_result['missing_skills'],
+            'suggestions': analysis_result['suggestions'],
+            'suggestions_status': 'pending' if include_suggestions else 'ready',
+            'features': analysis_result['features']
+        } for (resume_hash, _), resume_id, analysis_result in zip(documents, resume_ids, analysis_results)]
+        
+        with timed('save_analyses'):
+            analysis_ids = save_analyses(analysis_list)
+        
+        if include_suggestions:
+            queue_suggestions_many(analysis_ids, [resume_text for _, resume_text in documents],
+                                   job['description'], analysis_results)
+        
+        for analysis_id, analysis in zip(analysis_ids, analysis_list):
+            for original_filename in filenames_by_hash[analysis['resume_hash']]:
+                results.append(screening_result(original_filename, analysis_id, analysis))
+    
+    # Sort by match_percentage in descending order
+    results.sort(key=lambda r: r['match_percentage'], reverse=True)
+    
+    return jsonify({
+        'job_id': job_id,
+        'count': len(results),
+        'results': results,
+        'failed': failed
+    }), 201
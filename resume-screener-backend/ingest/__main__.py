@@ -0,0 +1,51 @@
+"""
+Bulk ingest job postings and resumes into MongoDB.
+
+Run from the backend directory:
+    python -m ingest --jobs job_descriptions --resumes /data/resumes [--workers 8] [--batch-size 500]
+        [--checkpoint ingest-checkpoint.jsonl] [--no-index]
+
+Job postings are plain-text (or PDF/DOCX) files with the title and the
+company on their first two lines. Resumes are copied to the upload folder
+like uploaded ones. An interrupted run continues from its checkpoint when
+started again with the same arguments, and retries the files that failed.
+Exits with status 1 if any file could not be ingested.
+"""
+import argparse
+import sys
+from config import Config
+from models import init_db, ensure_indexes
+from ingest.runner import run_ingest, rebuild_job_index, rebuild_resume_index, PARSE_OK
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m ingest')
+    parser.add_argument('--jobs', help='directory of job postings')
+    parser.add_argument('--resumes', help='directory of resumes, searched recursively')
+    parser.add_argument('--workers', type=int, default=Config.INGEST_WORKERS, help='parser processes')
+    parser.add_argument('--batch-size', type=int, default=Config.INGEST_BATCH_SIZE,
+                        help='files per database write and checkpoint')
+    parser.add_argument('--checkpoint', default='ingest-checkpoint.jsonl',
+                        help="file recording the ingested files ('' to disable)")
+    parser.add_argument('--no-index', action='store_true', help='do not rebuild the job and resume index snapshots')
+    args = parser.parse_args(argv)
+
+    if not args.jobs and not args.resumes:
+        parser.error('nothing to ingest: give --jobs, --resumes or both')
+
+    init_db(Config.MONGO_URI)
+    if Config.ENSURE_INDEXES:
+        ensure_indexes()
+
+    reports = run_ingest(args.jobs, args.resumes, args.checkpoint, args.workers, args.batch_size)
+
+    if not args.no_index and any(progress.counts[PARSE_OK] for progress in reports):
+        print("Rebuilding the job index")
+        rebuild_job_index()
+        if any(progress.kind == 'resumes' and progress.counts[PARSE_OK] for progress in reports):
+            print("Adding the new resumes to the resume index")
+            rebuild_resume_index()
+
+    return 1 if any(progress.failed for progress in reports) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+Parsing of job postings and resume files for the bulk ingester. These
+functions run in its parser processes and never touch the database: each
+returns a result dict that the parent process writes in batches.
+"""
+import os
+import re
+import signal
+from utils.blob_store import save_blob
+from utils.parser_pool import limit_address_space, PARSE_OK, PARSE_UNSUPPORTED, PARSE_ERROR, PARSE_TIMEOUT, PARSE_MEMORY
+from utils.prompt_builder import compact_lines, find_sections
+from utils.skill_matcher import get_skill_matcher
+from utils.text_parser import READERS, get_extension
+
+# Statuses of files that were not parsed, besides the parser pool's
+PARSE_EMPTY = 'empty'
+PARSE_TOO_LARGE = 'too_large'
+
+# 'Heading:' or 'Heading: content' lines that start a section of a job posting
+JOB_HEADING_PATTERN = re.compile(r'^([A-Z][A-Za-z /&-]{1,40}):\s*(.*)$')
+
+# Phrasing around the skill names in a skills section, e.g. 'Strong knowledge of'
+SKILL_LEAD_IN_PATTERN = re.compile(
+    r'^(?:(?:strong|solid|excellent|good|proven|deep|working|hands-on)\s+)?'
+    r'(?:(?:proficiency|experience|knowledge|familiarity|understanding|expertise)\s+(?:in|with|of)\s+)?',
+    re.IGNORECASE
+)
+
+# Words after a skill name that describe it rather than name it, e.g. 'Git
+# version control' or 'communication skills'
+SKILL_QUALIFIER_PATTERN = re.compile(
+    r'\s+(?:version control|skills?|abilities|ability|knowledge|methodolog(?:y|ies)|principles|'
+    r'concepts|fundamentals|systems|tools|technologies|frameworks?|platforms?)$',
+    re.IGNORECASE
+)
+
+# Longer list items are sentences rather than skills
+MAX_SKILL_WORDS = 4
+
+# Settings of this parser process, set by init_worker
+_settings = {}
+
+class ParseTimeout(Exception):
+    pass
+
+def _on_timeout(signum, frame):
+    raise ParseTimeout()
+
+def init_worker(upload_folder, skills, max_size, timeout, memory_limit):
+    """
+    Initializer of each parser process. skills are the job skills looked
+    for in resumes.
+    """
+    _settings.update(upload_folder=upload_folder, skills=tuple(skills), max_size=max_size, timeout=timeout)
+    limit_address_space(memory_limit)
+    signal.signal(signal.SIGALRM, _on_timeout)
+
+def read_text(file_path):
+    """
+    Read the text of a file, giving up after the worker's timeout
+    """
+    signal.setitimer(signal.ITIMER_REAL, _settings['timeout'])
+    try:
+        return READERS[get_extension(file_path)](file_path)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+def _parse(file_path, build):
+    """
+    Read file_path and build its document with build(text). Failures are
+    returned as a status and error rather than raised.
+    """
+    result = {'path': file_path, 'status': PARSE_OK, 'error': None, 'size': 0, 'document': None}
+    try:
+        if get_extension(file_path) not in READERS:
+            result.update(status=PARSE_UNSUPPORTED, error='Unsupported file type')
+            return result
+        result['size'] = os.path.getsize(file_path)
+        if result['size'] > _settings['max_size']:
+            result.update(status=PARSE_TOO_LARGE, error='File too large')
+            return result
+
+        text = read_text(file_path)
+        if not text or not text.strip():
+            result.update(status=PARSE_EMPTY, error='Could not extract text')
+            return result
+        result['document'] = build(text)
+    except ParseTimeout:
+        result.update(status=PARSE_TIMEOUT, error=f"Parsing took longer than {_settings['timeout']}s")
+    except MemoryError:
+        result.update(status=PARSE_MEMORY, error='Parser ran out of memory')
+    except Exception as e:
+        result.update(status=PARSE_ERROR, error=f'{type(e).__name__}: {e}')
+    return result
+
+def extract_listed_skills(lines):
+    """
+    Skill names from the lines of a skills section, e.g. 'Proficiency in
+    Python, JavaScript, and React' or 'Knowledge of databases (SQL and
+    NoSQL)'. Items in parentheses are taken as the skills they illustrate,
+    and qualifiers such as 'skills' or 'version control' are dropped.
+    """
+    skills = []
+    seen = set()
+    for line in lines:
+        item = SKILL_LEAD_IN_PATTERN.sub('', line.lstrip('-*•·– ').rstrip('.;'))
+        examples = re.search(r'\(([^)]*)\)', item)
+        if examples:
+            parts = re.split(r',|\s+(?:and|or)\s+', examples.group(1))
+        else:
+            parts = item.split(',')
+
+        for part in parts:
+            skill = SKILL_QUALIFIER_PATTERN.sub('', re.sub(r'^(?:and|or)\s+', '', part.strip()))
+            if skill and len(skill.split()) <= MAX_SKILL_WORDS and skill.lower() not in seen:
+                seen.add(skill.lower())
+                skills.append(skill)
+    return skills
+
+def parse_job_text(text):
+    """
+    Build a job document from a plain-text posting: the title and company
+    on the first two lines, then sections started by 'Heading:' lines.
+    Skills are taken from the sections whose heading mentions skills.
+    """
+    lines = compact_lines(text)
+    if len(lines) < 3:
+        raise ValueError('Expected a title, a company and a description')
+
+    sections = {}
+    current = None
+    for line in lines[2:]:
+        match = JOB_HEADING_PATTERN.match(line)
+        if match:
+            current = match.group(1)
+            sections[current] = [match.group(2)] if match.group(2) else []
+        elif current is not None:
+            sections[current].append(line)
+
+    skills = []
+    for heading, section_lines in sections.items():
+        if 'skill' in heading.lower():
+            skills += [skill for skill in extract_listed_skills(section_lines) if skill not in skills]
+
+    return {
+        'title': lines[0],
+        'company': lines[1],
+        'description': text.strip(),
+        'skills': skills,
+        'sections': {heading: '\n'.join(section_lines) for heading, section_lines in sections.items()}
+    }
+
+def parse_job_file(file_path):
+    """
+    Parse a job posting file; the document has no source_file yet
+    """
+    return _parse(file_path, parse_job_text)
+
+def parse_resume_file(file_path):
+    """
+    Parse a resume file and store a copy in the upload folder under its
+    content hash, like an uploaded resume. The document lists the known
+    job skills and the section headings found in it.
+    """
+    def build(text):
+        with open(file_path, 'rb') as stream:
+            resume_hash, stored_path = save_blob(stream, _settings['upload_folder'], get_extension(file_path))
+        return {
+            'user_id': None,
+            'job_id': None,
+            'file_path': stored_path,
+            'original_filename': os.path.basename(file_path),
+            'resume_hash': resume_hash,
+            'resume_text': text,
+            'skills': get_skill_matcher(_settings['skills']).match(text),
+            'sections': find_sections(text)
+        }
+
+    return _parse(file_path, build)
@@ -0,0 +1,265 @@
+"""
+Bulk ingestion of job postings and resumes from directories.
+
+Files are parsed in a pool of parser processes, a batch at a time, while
+the previous batch is written to MongoDB with one bulk write per
+collection. Writes are upserts keyed by the job's source file and the
+resume's content hash, so ingesting a file twice stores it once. After
+each batch is written, its files are appended to a checkpoint file, and a
+run that was interrupted skips the ones that were stored when it is started
+again; files that failed are retried.
+"""
+import json
+import os
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from config import Config
+from ingest.documents import init_worker, parse_job_file, parse_resume_file
+from models import get_all_jobs, save_blob_texts, save_ingested_jobs, save_ingested_resumes
+from utils.parser_pool import get_parser_context, PARSE_OK
+
+# Status of a parsed file whose job or resume content was stored before
+DUPLICATE = 'duplicate'
+
+# Statuses of files a later run does not ingest again
+DONE_STATUSES = (PARSE_OK, DUPLICATE)
+
+# Seconds between progress lines
+REPORT_INTERVAL = 5.0
+
+def find_files(directory):
+    """
+    Paths of the files with an allowed extension under directory, in a
+    stable order, skipping hidden files and directories
+    """
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(name for name in dirs if not name.startswith('.'))
+        for name in sorted(files):
+            if not name.startswith('.') and name.rsplit('.', 1)[-1].lower() in Config.ALLOWED_EXTENSIONS:
+                paths.append(os.path.abspath(os.path.join(root, name)))
+    return paths
+
+class Checkpoint:
+    """
+    Append-only record of the files already ingested, one JSON line per
+    file with its status. Only files that were stored (or found stored)
+    count as done, so a run started again retries the files that failed,
+    e.g. on a parser timeout. A line cut short by a crash is ignored.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        self._file = None
+        if not path:
+            return
+
+        ends_cleanly = True
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    ends_cleanly = line.endswith('\n')
+                    try:
+                        entry = json.loads(line)
+                        if entry['status'] in DONE_STATUSES:
+                            self.done.add(entry['path'])
+                    except (ValueError, KeyError, TypeError):
+                        continue
+        self._file = open(path, 'a', encoding='utf-8')
+        if not ends_cleanly:
+            self._file.write('\n')
+
+    def record(self, results):
+        """
+        Append the files of a written batch and flush them to disk
+        """
+        if self._file is None:
+            return
+        for result in results:
+            self._file.write(json.dumps({'path': result['path'], 'status': result['status']}) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+class Progress:
+    """
+    Counts ingested files by status and prints the throughput
+    """
+    def __init__(self, kind, total, skipped=0):
+        self.kind = kind
+        self.total = total
+        self.skipped = skipped
+        self.counts = Counter()
+        self.bytes = 0
+        self.started = time.monotonic()
+        self._last_report = self.started
+
+    @property
+    def done(self):
+        return sum(self.counts.values())
+
+    @property
+    def failed(self):
+        return self.done - self.counts[PARSE_OK] - self.counts[DUPLICATE]
+
+    def update(self, results):
+        for result in results:
+            self.counts[result['status']] += 1
+            self.bytes += result['size']
+            if result['error']:
+                print(f"Error ingesting {result['path']} ({result['status']}): {result['error']}")
+        now = time.monotonic()
+        if now - self._last_report >= REPORT_INTERVAL:
+            self._last_report = now
+            print(self.line(now))
+
+    def line(self, now=None):
+        elapsed = max((now or time.monotonic()) - self.started, 1e-9)
+        return (f"{self.kind}: {self.done}/{self.total} files, {self.done / elapsed:.1f} files/s, "
+                f"{self.bytes / elapsed / 1e6:.2f} MB/s, {self.failed} failed")
+
+    def summary(self):
+        elapsed = time.monotonic() - self.started
+        statuses = ', '.join(f'{count} {status}' for status, count in sorted(self.counts.items()))
+        return (f"{self.line()} - done in {elapsed:.1f} s "
+                f"({statuses or 'nothing to do'}; {self.skipped} skipped from the checkpoint)")
+
+def ingest_files(paths, parse, write, checkpoint, progress, workers, batch_size, skills=()):
+    """
+    Parse paths with parse in a process pool, a batch at a time, and pass
+    each batch of results to write, which may change their status, before
+    it is checkpointed. The next batch is parsed while one is written.
+    """
+    chunk_size = max(1, batch_size // (workers * 4))
+    initargs = (Config.UPLOAD_FOLDER, list(skills), Config.MAX_RESUME_SIZE,
+                Config.PARSER_TIMEOUT, Config.PARSER_MEMORY_LIMIT)
+
+    def finish(batch):
+        results = list(batch)
+        write(results)
+        checkpoint.record(results)
+        progress.update(results)
+
+    with ProcessPoolExecutor(workers, mp_context=get_parser_context(), initializer=init_worker,
+                             initargs=initargs) as executor:
+        pending = deque()
+        for start in range(0, len(paths), batch_size):
+            pending.append(executor.map(parse, paths[start:start + batch_size], chunksize=chunk_size))
+            if len(pending) > 1:
+                finish(pending.popleft())
+        while pending:
+            finish(pending.popleft())
+
+def write_jobs(results, directory):
+    """
+    Save the parsed jobs of a batch, keyed by their path under directory
+    """
+    parsed = [result for result in results if result['status'] == PARSE_OK]
+    for result in parsed:
+        result['document']['source_file'] = os.path.relpath(result['path'], directory)
+    if not parsed:
+        return
+    job_ids = save_ingested_jobs([result['document'] for result in parsed])
+    for result, job_id in zip(parsed, job_ids):
+        if job_id is None:
+            result['status'] = DUPLICATE
+
+def write_resumes(results):
+    """
+    Save the parsed resumes of a batch and the text cached for their
+    stored files; identical content is saved once
+    """
+    parsed = []
+    hashes = set()
+    for result in results:
+        if result['status'] != PARSE_OK:
+            continue
+        if result['document']['resume_hash'] in hashes:
+            result['status'] = DUPLICATE
+            continue
+        hashes.add(result['document']['resume_hash'])
+        parsed.append(result)
+    if not parsed:
+        return
+
+    documents = [result['document'] for result in parsed]
+    save_blob_texts([(document['resume_hash'], document['file_path'], document['resume_text'])
+                     for document in documents])
+    resume_ids = save_ingested_resumes(documents)
+    for result, resume_id in zip(parsed, resume_ids):
+        if resume_id is None:
+            result['status'] = DUPLICATE
+
+def get_known_skills():
+    """
+    The distinct skills of all jobs, looked for in ingested resumes
+    """
+    skills = {}
+    for job in get_all_jobs():
+        for skill in job.get('skills') or []:
+            skills.setdefault(skill.lower(), skill)
+    return list(skills.values())
+
+def rebuild_job_index():
+    """
+    Rebuild the job index snapshot, which running workers switch to within
+    JOB_INDEX_CHECK_INTERVAL seconds
+    """
+    from utils.job_index import JobIndex, read_current
+
+    if Config.JOB_INDEX_DIR:
+        JobIndex(directory=Config.JOB_INDEX_DIR).rebuild(since=read_current(Config.JOB_INDEX_DIR))
+
+def rebuild_resume_index():
+    """
+    Add the new resumes to the resume index snapshot, embedding them into
+    the embedding store on the way, so workers that load it have nothing
+    to catch up with
+    """
+    from utils.resume_index import ResumeIndex, get_resume_embedder
+
+    if Config.RESUME_INDEX_DIR:
+        os.makedirs(Config.RESUME_INDEX_DIR, exist_ok=True)
+        index = ResumeIndex(Config.RESUME_INDEX_DIR, Config.RESUME_INDEX_EXACT_LIMIT, Config.RESUME_INDEX_PROBES)
+        index.load(get_resume_embedder(), catch_up=False)
+        index.sync(force=True)
+        index.save()
+
+def run_ingest(job_directory=None, resume_directory=None, checkpoint_path=None,
+               workers=None, batch_size=None):
+    """
+    Ingest the jobs, then the resumes, so resumes are matched against the
+    skills of the new jobs too. Returns the Progress of each kind.
+    """
+    workers = workers or Config.INGEST_WORKERS
+    batch_size = batch_size or Config.INGEST_BATCH_SIZE
+    checkpoint = Checkpoint(checkpoint_path)
+    reports = []
+
+    try:
+        if job_directory:
+            paths = find_files(job_directory)
+            todo = [path for path in paths if path not in checkpoint.done]
+            progress = Progress('jobs', len(todo), len(paths) - len(todo))
+            ingest_files(todo, parse_job_file, lambda results: write_jobs(results, job_directory),
+                         checkpoint, progress, workers, batch_size)
+            print(progress.summary())
+            reports.append(progress)
+
+        if resume_directory:
+            os.makedirs(Config.UPLOAD_FOLDER, exist_ok=True)
+            paths = find_files(resume_directory)
+            todo = [path for path in paths if path not in checkpoint.done]
+            progress = Progress('resumes', len(todo), len(paths) - len(todo))
+            ingest_files(todo, parse_resume_file, write_resumes, checkpoint, progress, workers, batch_size,
+                         get_known_skills())
+            print(progress.summary())
+            reports.append(progress)
+    finally:
+        checkpoint.close()
+
+    return reports
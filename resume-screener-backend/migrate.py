@@ -0,0 +1,27 @@
+"""
+One-time data migrations, run once after upgrading instead of by every
+worker on start.
+
+Run from the backend directory:
+    python -m migrate
+
+Each migration only updates documents it has not updated yet, so running
+the command again is safe.
+"""
+import sys
+from config import Config
+from models import init_db, ensure_indexes, backfill_skill_keys
+
+MIGRATIONS = [
+    ('skill_keys of analyses saved before the skill index', backfill_skill_keys)
+]
+
+def main():
+    init_db(Config.MONGO_URI)
+    ensure_indexes()
+    for name, migration in MIGRATIONS:
+        print(f"Migrating {name}: {migration()} documents updated")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
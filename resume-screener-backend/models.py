@@ -1,25 +1,85 @@
 
-from pymongo import MongoClient
+from pymongo import MongoClient, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
 from config import Config
 from bson import ObjectId
+from datetime import date, datetime, timedelta, timezone
 import json
+import os
+import threading
 
-# Connect to MongoDB
-client = MongoClient(Config.MONGO_URI)
-db = client.get_database()
+# MongoDB connection, created per process (see init_db and get_db)
+_mongo_uri = Config.MONGO_URI
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+def init_db(mongo_uri):
+    """Set the MongoDB URI and connect; called by create_app"""
+    global _mongo_uri, _client
+    with _client_lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.close()
+        _mongo_uri = mongo_uri
+        _client = None
+    return get_db()
+
+def get_db():
+    """
+    Get the database, creating the client on first use in each process.
+    A client inherited through fork is never reused.
+    """
+    global _client, _client_pid
+    if _client is None or _client_pid != os.getpid():
+        with _client_lock:
+            if _client is None or _client_pid != os.getpid():
+                _client = MongoClient(_mongo_uri)
+                _client_pid = os.getpid()
+    return _client.get_database()
+
+class LazyCollection:
+    """Collection handle that resolves against this process's client on use"""
+    def __init__(self, name):
+        self.name = name
+
+    def __getattr__(self, attr):
+        return getattr(get_db()[self.name], attr)
 
 # Collections
-users = db.users
-resumes = db.resumes
-jobs = db.jobs
-analyses = db.analyses
+users = LazyCollection("users")
+resumes = LazyCollection("resumes")
+jobs = LazyCollection("jobs")
+analyses = LazyCollection("analyses")
+tasks = LazyCollection("tasks")
+cached_suggestions = LazyCollection("cached_suggestions")
+blobs = LazyCollection("blobs")
+meta = LazyCollection("meta")
+leaderboards = LazyCollection("leaderboards")
+
+def ensure_indexes():
+    """Create the indexes used by the application's queries"""
+    analyses.create_index([("resume_hash", 1), ("job_id", 1), ("job_version", 1), ("user_id", 1)])
+    analyses.create_index([("job_id", 1), ("match_percentage", -1), ("_id", -1)])
+    analyses.create_index([("match_percentage", -1), ("_id", -1)])
+    analyses.create_index("user_id")
+    analyses.create_index([("job_id", 1), ("_id", 1)])
+    analyses.create_index([("skill_keys", 1), ("match_percentage", -1), ("_id", -1)])
+    analyses.create_index([("job_id", 1), ("skill_keys", 1), ("match_percentage", -1), ("_id", -1)])
+    analyses.create_index([("suggestions_status", 1), ("_id", 1)])
+    tasks.create_index([("resume_hash", 1), ("job_id", 1), ("job_version", 1), ("status", 1)])
+    resumes.create_index("resume_hash")
+    jobs.create_index("source_file", sparse=True)
 
 class JSONEncoder(json.JSONEncoder):
     def default(self, obj):
         if isinstance(obj, ObjectId):
             return str(obj)
+        if isinstance(obj, (datetime, date)):
+            return obj.isoformat()
         return super(JSONEncoder, self).default(obj)
 
+# List queries return documents unchanged: the app's JSON provider
+# (utils/json_provider.py) encodes ObjectId and datetime values itself
 def serialize_doc(doc):
     """Convert MongoDB document to JSON serializable dict"""
     if isinstance(doc, list):
@@ -57,6 +117,20 @@ def save_resume(resume_data):
     result = resumes.insert_one(resume_data)
     return str(result.inserted_id)
 
+def save_resumes(resume_list):
+    """Save a batch of resume submissions"""
+    result = resumes.insert_many(resume_list)
+    return [str(inserted_id) for inserted_id in result.inserted_ids]
+
+def save_ingested_resumes(resume_list):
+    """Insert a batch of resumes whose content is not stored yet; returns each new ID, or None if it was"""
+    result = resumes.bulk_write(
+        [UpdateOne({"resume_hash": resume["resume_hash"]}, {"$setOnInsert": resume}, upsert=True)
+         for resume in resume_list],
+        ordered=False
+    )
+    return [str(result.upserted_ids[i]) if i in result.upserted_ids else None for i in range(len(resume_list))]
+
 def get_resume(resume_id):
     """Get resume by ID"""
     resume = resumes.find_one({"_id": ObjectId(resume_id)})
@@ -64,43 +138,343 @@ def get_resume(resume_id):
 
 def get_user_resumes(user_id):
     """Get all resumes for a user"""
-    user_resumes = list(resumes.find({"user_id": user_id}))
-    return serialize_doc(user_resumes)
+    return list(resumes.find({"user_id": user_id}))
+
+def get_resumes_by_ids(resume_ids):
+    """Get resumes by ID without their text, keyed by their string ID"""
+    found_resumes = resumes.find(
+        {"_id": {"$in": [ObjectId(resume_id) for resume_id in resume_ids]}},
+        {"resume_text": 0}
+    )
+    return {resume["_id"]: resume for resume in serialize_doc(list(found_resumes))}
+
+def iter_resumes_since(since_id=None, batch_size=1000):
+    """Stream the ID and text of resumes saved after since_id, oldest first"""
+    query = {"_id": {"$gt": since_id}} if since_id else {}
+    return resumes.find(query, {"resume_text": 1}, batch_size=batch_size).sort("_id", 1)
+
+def get_recent_resume_texts(limit):
+    """Get the text of the most recently saved resumes"""
+    cursor = resumes.find({}, {"resume_text": 1}).sort("_id", -1).limit(limit)
+    return [doc["resume_text"] for doc in cursor if doc.get("resume_text")]
+
+def normalize_skill(skill):
+    """Normalized form of a skill name used by the skill index"""
+    return " ".join(skill.lower().split())
+
+def get_skill_keys(skills):
+    """Distinct normalized skills, stored as the multikey-indexed skill_keys field of an analysis"""
+    return sorted({normalize_skill(skill) for skill in skills})
 
 def save_analysis(analysis_data):
     """Save resume analysis"""
+    analysis_data["skill_keys"] = get_skill_keys(analysis_data.get("matched_skills", []))
     result = analyses.insert_one(analysis_data)
+    add_to_leaderboards([analysis_data])
     return str(result.inserted_id)
 
+def save_analyses(analysis_list):
+    """Save a batch of resume analyses"""
+    for analysis_data in analysis_list:
+        analysis_data["skill_keys"] = get_skill_keys(analysis_data.get("matched_skills", []))
+    result = analyses.insert_many(analysis_list)
+    add_to_leaderboards(analysis_list)
+    return [str(inserted_id) for inserted_id in result.inserted_ids]
+
+def backfill_skill_keys(batch_size=1000):
+    """
+    Add skill_keys to analyses saved before the skill index existed and
+    return how many were updated; run by the migrate command
+    """
+    cursor = analyses.find({"skill_keys": {"$exists": False}}, {"matched_skills": 1}, batch_size=batch_size)
+    updates = []
+    count = 0
+    for analysis in cursor:
+        updates.append(UpdateOne({"_id": analysis["_id"]},
+                                 {"$set": {"skill_keys": get_skill_keys(analysis.get("matched_skills") or [])}}))
+        if len(updates) == batch_size:
+            analyses.bulk_write(updates, ordered=False)
+            count += len(updates)
+            updates = []
+    if updates:
+        analyses.bulk_write(updates, ordered=False)
+        count += len(updates)
+    return count
+
 def get_analysis(analysis_id):
     """Get analysis by ID"""
-    analysis = analyses.find_one({"_id": ObjectId(analysis_id)})
+    analysis = analyses.find_one({"_id": ObjectId(analysis_id)}, {"features": 0, "skill_keys": 0})
     return serialize_doc(analysis)
 
+def update_analysis_suggestions(analysis_id, suggestions):
+    """Save the suggestions of an analysis saved with only its fast results"""
+    analyses.update_one({"_id": ObjectId(analysis_id)},
+                        {"$set": {"suggestions": suggestions, "suggestions_status": "ready"}})
+
+def expire_pending_suggestions(max_age):
+    """
+    Mark analyses whose suggestions are still pending max_age seconds after
+    they were saved as failed, e.g. because the worker generating them
+    exited; their ATS suggestions are kept. Returns how many were marked.
+    """
+    cutoff = ObjectId.from_datetime(datetime.now(timezone.utc) - timedelta(seconds=max_age))
+    result = analyses.update_many({"suggestions_status": "pending", "_id": {"$lt": cutoff}},
+                                  {"$set": {"suggestions_status": "failed"}})
+    return result.modified_count
+
+def get_analysis_suggestions(analysis_id):
+    """Get the suggestions of an analysis and whether they are still pending"""
+    return analyses.find_one({"_id": ObjectId(analysis_id)}, {"suggestions": 1, "suggestions_status": 1})
+
 def get_user_analyses(user_id):
     """Get all analyses for a user"""
-    user_analyses = list(analyses.find({"user_id": user_id}))
-    return serialize_doc(user_analyses)
+    return list(analyses.find({"user_id": user_id}, {"features": 0, "skill_keys": 0}))
 
 def get_all_jobs():
     """Get all job descriptions"""
-    all_jobs = list(jobs.find())
-    return serialize_doc(all_jobs)
+    return list(jobs.find())
 
 def get_job(job_id):
     """Get job by ID"""
     job = jobs.find_one({"_id": ObjectId(job_id)})
     return serialize_doc(job)
 
+def get_jobs_by_ids(job_ids):
+    """Get jobs by ID, keyed by their string ID"""
+    found_jobs = jobs.find({"_id": {"$in": [ObjectId(job_id) for job_id in job_ids]}})
+    return {job["_id"]: job for job in serialize_doc(list(found_jobs))}
+
+def get_job_descriptions(job_ids):
+    """Get the descriptions of jobs, keyed by their string ID"""
+    found_jobs = jobs.find({"_id": {"$in": [ObjectId(job_id) for job_id in job_ids]}}, {"description": 1})
+    return {str(job["_id"]): job.get("description") or "" for job in found_jobs}
+
 def save_job(job_data):
     """Save a job description"""
+    job_data.setdefault("version", 1)
     result = jobs.insert_one(job_data)
+    bump_jobs_version()
     return str(result.inserted_id)
 
-def get_candidate_analyses():
-    """Get all candidate analyses (for HR view)"""
-    all_analyses = list(analyses.find())
-    return serialize_doc(all_analyses)
+def update_job(job_id, fields, new_version=False):
+    """Update a job, optionally bumping its version; returns the updated job"""
+    update = {"$set": fields}
+    if new_version:
+        update["$inc"] = {"version": 1}
+    job = jobs.find_one_and_update({"_id": ObjectId(job_id)}, update, return_document=ReturnDocument.AFTER)
+    bump_jobs_version()
+    return serialize_doc(job)
+
+def save_ingested_jobs(job_list):
+    """Insert a batch of jobs not ingested from the same source_file before; returns each new ID, or None"""
+    result = jobs.bulk_write(
+        [UpdateOne({"source_file": job["source_file"]}, {"$setOnInsert": dict(job, version=1)}, upsert=True)
+         for job in job_list],
+        ordered=False
+    )
+    if result.upserted_ids:
+        bump_jobs_version()
+    return [str(result.upserted_ids[i]) if i in result.upserted_ids else None for i in range(len(job_list))]
+
+def get_jobs_version():
+    """Get the counter bumped on every job write, shared by all workers"""
+    doc = meta.find_one({"_id": "jobs"}, {"version": 1})
+    return doc["version"] if doc else 0
+
+def bump_jobs_version():
+    """Mark the job catalogue as changed so cached copies are reloaded"""
+    meta.update_one({"_id": "jobs"}, {"$inc": {"version": 1}}, upsert=True)
+
+# Fields returned when listing candidates; suggestions are left for the detail view
+CANDIDATE_FIELDS = ["user_id", "resume_id", "job_id", "job_title", "company",
+                    "match_percentage", "ats_score", "matched_skills", "missing_skills"]
+
+def get_candidate_analyses(job_id=None, min_score=None, max_score=None, after=None, limit=50,
+                           skills=None, match_all=True):
+    """
+    Get a page of candidate analyses (for HR view), best match first, or all
+    of them if limit is None.
+    after is the (match_percentage, _id) of the last analysis on the previous page.
+    skills keeps candidates with all (or, if match_all is False, any) of the
+    skills, looked up in the skill_keys index.
+    """
+    query = {}
+    if job_id:
+        query["job_id"] = job_id
+    
+    if skills:
+        keys = get_skill_keys(skills)
+        query["skill_keys"] = {"$all": keys} if match_all else {"$in": keys}
+    
+    score_range = {}
+    if min_score is not None:
+        score_range["$gte"] = min_score
+    if max_score is not None:
+        score_range["$lte"] = max_score
+    if score_range:
+        query["match_percentage"] = score_range
+    
+    if after is not None:
+        after_score, after_id = after
+        query = {"$and": [query, {"$or": [
+            {"match_percentage": {"$lt": after_score}},
+            {"match_percentage": after_score, "_id": {"$lt": ObjectId(after_id)}}
+        ]}]}
+    
+    cursor = analyses.find(query, CANDIDATE_FIELDS).sort([("match_percentage", -1), ("_id", -1)])
+    if limit is not None:
+        cursor = cursor.limit(limit)
+    return list(cursor)
+
+def iter_job_analyses(job_id, batch_size=1000):
+    """Stream the analyses of a job, best match first, without loading them all"""
+    cursor = analyses.find({"job_id": job_id}, CANDIDATE_FIELDS, batch_size=batch_size)
+    return cursor.sort([("match_percentage", -1), ("_id", -1)])
+
+# Fields read when re-scoring analyses; see utils/rescorer.py
+RESCORE_FIELDS = ["resume_id", "matched_skills", "missing_skills", "features"]
+
+def count_stale_analyses(job_id, job_version):
+    """Count the analyses of a job scored against another version of it"""
+    return analyses.count_documents({"job_id": job_id, "job_version": {"$ne": job_version}})
+
+def get_stale_analyses(job_id, job_version, after=None, limit=1000):
+    """Get the next batch of analyses scored against another version of a job, by _id"""
+    query = {"job_id": job_id, "job_version": {"$ne": job_version}}
+    if after is not None:
+        query["_id"] = {"$gt": after}
+    return list(analyses.find(query, RESCORE_FIELDS).sort("_id", 1).limit(limit))
+
+def update_rescored_analyses(updates, job_version):
+    """
+    Apply a batch of (analysis _id, fields to set) updates from re-scoring
+    against job_version, skipping analyses already scored against a later version
+    """
+    if updates:
+        analyses.bulk_write([
+            UpdateOne({"_id": analysis_id, "job_version": {"$not": {"$gte": job_version}}}, {"$set": fields})
+            for analysis_id, fields in updates
+        ], ordered=False)
+
+def update_job_analyses(job_id, fields):
+    """Update every analysis of a job, e.g. its copy of the job title"""
+    analyses.update_many({"job_id": job_id}, {"$set": fields})
+
+def get_resume_texts(resume_ids):
+    """Get the text of resumes by ID, keyed by their string ID"""
+    found_resumes = resumes.find(
+        {"_id": {"$in": [ObjectId(resume_id) for resume_id in resume_ids if ObjectId.is_valid(resume_id)]}},
+        {"resume_text": 1}
+    )
+    return {str(resume["_id"]): resume.get("resume_text") or "" for resume in found_resumes}
+
+# Leaderboards: one small document per job holding its best LEADERBOARD_SIZE
+# analyses, best first, and the job's number of analyses. Saves push into
+# it and deletes pull from it atomically, bumping its version; it is rebuilt
+# from analyses when missing, still being built, or when deletes left it
+# shorter than a request needs, and the rebuild is only stored if no push or
+# pull happened meanwhile.
+def _sorted_entries(entries):
+    return {"$each": entries, "$sort": {"match_percentage": -1, "_id": -1}, "$slice": Config.LEADERBOARD_SIZE}
+
+def add_to_leaderboards(analysis_list):
+    """Add newly saved analyses to the leaderboards of their jobs"""
+    by_job = {}
+    for analysis in analysis_list:
+        entry = {field: analysis.get(field) for field in ["_id"] + CANDIDATE_FIELDS}
+        by_job.setdefault(analysis.get("job_id"), []).append(entry)
+    for job_id, entries in by_job.items():
+        # Only existing leaderboards; a missing one is built from analyses when first read
+        leaderboards.update_one({"_id": job_id}, {
+            "$push": {"entries": _sorted_entries(entries)},
+            "$inc": {"total": len(entries), "version": 1}
+        })
+
+def remove_from_leaderboards(analysis_list):
+    """Remove deleted analyses (with _id and job_id) from the leaderboards of their jobs"""
+    by_job = {}
+    for analysis in analysis_list:
+        by_job.setdefault(analysis.get("job_id"), []).append(analysis["_id"])
+    for job_id, analysis_ids in by_job.items():
+        leaderboards.update_one({"_id": job_id}, {
+            "$pull": {"entries": {"_id": {"$in": analysis_ids}}},
+            "$inc": {"total": -len(analysis_ids), "version": 1}
+        })
+
+def rebuild_leaderboard(job_id):
+    """
+    Rebuild the leaderboard of a job from its analyses and return it. A
+    missing leaderboard is first created empty and marked as building, so
+    saves made during the rebuild are pushed into it. The rebuild replaces
+    the stored one only if that is still the version read before the
+    analyses, so a save or delete made meanwhile is not lost; the
+    leaderboard then stays marked and is rebuilt on the next read.
+    """
+    try:
+        leaderboards.update_one({"_id": job_id}, {
+            "$setOnInsert": {"entries": [], "total": 0, "version": 0, "building": True}
+        }, upsert=True)
+    except DuplicateKeyError:
+        pass  # Created by another request meanwhile
+    current = leaderboards.find_one({"_id": job_id}, {"version": 1})
+    entries = list(analyses.find({"job_id": job_id}, CANDIDATE_FIELDS)
+                   .sort([("match_percentage", -1), ("_id", -1)]).limit(Config.LEADERBOARD_SIZE))
+    leaderboard = {"_id": job_id, "entries": entries, "total": analyses.count_documents({"job_id": job_id})}
+    leaderboards.replace_one({"_id": job_id, "version": current.get("version")},
+                             dict(leaderboard, version=current.get("version", 0) + 1))
+    return leaderboard
+
+def get_top_candidates(job_id, k):
+    """Get the k best analyses of a job (k at most LEADERBOARD_SIZE) from its leaderboard"""
+    leaderboard = leaderboards.find_one({"_id": job_id})
+    if leaderboard is None or leaderboard.get("building") \
+            or len(leaderboard["entries"]) < min(k, leaderboard["total"]):
+        leaderboard = rebuild_leaderboard(job_id)
+    return leaderboard["entries"][:k]
+
+def find_analysis(resume_hash, job_id, job_version, user_id):
+    """Get an existing analysis of identical resume content for a job version"""
+    analysis = analyses.find_one({
+        "resume_hash": resume_hash,
+        "job_id": job_id,
+        "job_version": job_version,
+        "user_id": user_id
+    }, {"features": 0, "skill_keys": 0})
+    return serialize_doc(analysis)
+
+def find_active_task(resume_hash, job_id, job_version, user_id):
+    """Get a queued or running analysis task for identical resume content"""
+    return tasks.find_one({
+        "resume_hash": resume_hash,
+        "job_id": job_id,
+        "job_version": job_version,
+        "user_id": user_id,
+        "status": {"$in": ["queued", "running"]}
+    })
+
+def get_blob(resume_hash):
+    """Get a stored file and its cached text by content hash"""
+    return blobs.find_one({"_id": resume_hash})
+
+def save_blob_text(resume_hash, file_path, resume_text):
+    """Cache the extracted text of a stored file"""
+    blobs.update_one(
+        {"_id": resume_hash},
+        {"$set": {"file_path": file_path, "resume_text": resume_text}},
+        upsert=True
+    )
+
+def save_blob_texts(entries):
+    """Cache the extracted text of a batch of stored files, given as (resume_hash, file_path, resume_text)"""
+    blobs.bulk_write(
+        [UpdateOne({"_id": resume_hash}, {"$set": {"file_path": file_path, "resume_text": resume_text}}, upsert=True)
+         for resume_hash, file_path, resume_text in entries],
+        ordered=False
+    )
+
+def count_resumes_with_hash(resume_hash):
+    """Count resumes sharing the same content"""
+    return resumes.count_documents({"resume_hash": resume_hash})
 
 def delete_resume(resume_id):
     """Delete a resume"""
@@ -108,4 +482,25 @@ def delete_resume(resume_id):
     
 def delete_analysis(analysis_id):
     """Delete an analysis"""
-    analyses.delete_one({"_id": ObjectId(analysis_id)})
+    deleted = analyses.find_one_and_delete({"_id": ObjectId(analysis_id)}, {"job_id": 1})
+    if deleted is not None:
+        remove_from_leaderboards([deleted])
+
+def create_task(task_data):
+    """Create a background task status document"""
+    result = tasks.insert_one(task_data)
+    return str(result.inserted_id)
+
+def update_task(task_id, fields):
+    """Update the status of a background task"""
+    tasks.update_one({"_id": task_id}, {"$set": fields})
+
+def get_task(task_id):
+    """Get background task status by ID"""
+    return tasks.find_one({"_id": task_id})
+
+def delete_resume_analyses(resume_id):
+    """Delete all analyses of a resume"""
+    deleted = list(analyses.find({"resume_id": resume_id}, {"job_id": 1}))
+    analyses.delete_many({"_id": {"$in": [analysis["_id"] for analysis in deleted]}})
+    remove_from_leaderboards(deleted)
@@ -0,0 +1,97 @@
+"""
+Shared fixtures. Run from the backend directory:
+    python -m pytest tests
+
+Tests that need MongoDB run against mongomock and are skipped if it is not
+installed; Gemini is replaced with utils.fake_llm.FakeGenerativeModel.
+"""
+import inspect
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import models
+from utils import job_index as job_index_module
+from utils import nlp_analyzer
+from utils.fake_llm import FakeGenerativeModel
+from utils.job_cache import job_cache
+from utils.job_index import JobIndex
+from utils.suggestion_cache import suggestion_cache
+from utils.text_scorer import EmbeddingScorer, HashingEncoder, TfidfScorer
+from utils.embedding_store import EmbeddingStore
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    """A FakeGenerativeModel answering every Gemini call"""
+    model = FakeGenerativeModel()
+    monkeypatch.setattr(nlp_analyzer, '_gemini_model', model)
+    return model
+
+@pytest.fixture(autouse=True)
+def empty_suggestion_cache(monkeypatch):
+    """Every test starts with an empty in-memory suggestion cache"""
+    monkeypatch.setattr(suggestion_cache, 'store', None)
+    suggestion_cache.clear()
+    yield
+    suggestion_cache.clear()
+
+def use_job_index(monkeypatch, jobs, resume_texts=()):
+    """Fit an in-memory job index and make it the process-wide one"""
+    index = JobIndex(refit_ratio=float('inf'))
+    index.fit(jobs, [nlp_analyzer.preprocess_text(text) for text in resume_texts])
+    monkeypatch.setattr(job_index_module, '_job_index', index)
+    return index
+
+@pytest.fixture(params=['tfidf', 'hashing'])
+def text_scorer(request, monkeypatch, tmp_path):
+    """
+    Each text scorer, made the process-wide one: TF-IDF (the test fits the
+    job index with use_job_index) or embeddings from feature hashing,
+    cached on disk
+    """
+    if request.param == 'tfidf':
+        scorer = TfidfScorer()
+    else:
+        encoder = HashingEncoder(256)
+        scorer = EmbeddingScorer(encoder, EmbeddingStore(str(tmp_path / 'embeddings'), encoder.dimensions))
+    monkeypatch.setattr(nlp_analyzer, '_text_scorer', scorer)
+    return scorer
+
+@pytest.fixture
+def db(monkeypatch):
+    """A fresh mongomock database behind the models module"""
+    mongomock = pytest.importorskip('mongomock')
+    monkeypatch.setattr(models, 'MongoClient', mongomock.MongoClient)
+
+    # Newer pymongo than requirements.txt pins passes a sort argument mongomock does not take
+    from mongomock.collection import BulkOperationBuilder
+    add_update = BulkOperationBuilder.add_update
+    if 'sort' not in inspect.signature(add_update).parameters:
+        monkeypatch.setattr(BulkOperationBuilder, 'add_update',
+                            lambda self, *args, sort=None, **kwargs: add_update(self, *args, **kwargs))
+    models.init_db('mongodb://localhost:27017/resume_screener_test')
+    yield models.get_db()
+    models.init_db(models.Config.MONGO_URI)
+
+@pytest.fixture
+def client(db, monkeypatch, tmp_path):
+    """
+    Test client of an app on the mongomock database, with uploads under
+    tmp_path and the job and resume indexes kept in memory
+    """
+    from app import create_app
+    from config import Config
+
+    monkeypatch.setattr(Config, 'UPLOAD_FOLDER', str(tmp_path / 'uploads'))
+    monkeypatch.setattr(Config, 'JOB_INDEX_DIR', None)
+    monkeypatch.setattr(Config, 'RESUME_INDEX_DIR', None)
+    monkeypatch.setattr(Config, 'EMBEDDING_CACHE_DIR', None)
+    monkeypatch.setattr(Config, 'MONGO_URI', 'mongodb://localhost:27017/resume_screener_test')
+    monkeypatch.setattr(Config, 'WARM_UP', False)
+    monkeypatch.setattr(job_index_module, '_job_index', JobIndex())
+    job_cache.clear()
+    app = create_app(Config)
+    app.config['TESTING'] = True
+    return app.test_client()
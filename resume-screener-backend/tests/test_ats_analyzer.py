@@ -0,0 +1,59 @@
+import random
+import re
+from utils.ats_analyzer import ATSAnalyzer, ats_analyzer
+
+def reference_analyze(resume_text):
+    """The checks one pass each, as resumes were scored before the rule-driven analyzer"""
+    score, issues = 100, []
+    if any(re.search(pattern, resume_text) for pattern in [r'[\|\t]{2,}', r'\+[-+]+\+', r'┌[─┬]+┐', r'╔[═╦]+╗']):
+        score -= 15
+        issues.append("Detected possible table structures which may not parse correctly in ATS systems")
+    if any(re.search(pattern, resume_text) for pattern in [r'Page \d+ of \d+', r'\d+/\d+']):
+        score -= 5
+        issues.append("Detected possible headers or footers which may interfere with ATS parsing")
+    headings = ['experience', 'education', 'skills', 'summary', 'objective', 'projects', 'certifications']
+    if not any(re.search(r'\b' + heading + r'\b', resume_text.lower()) for heading in headings):
+        score -= 10
+        issues.append("No standard section headings detected (like 'Experience', 'Education', 'Skills')")
+    if len(re.findall(r'\b[A-Z]{2,}\b', resume_text)) > 10:
+        score -= 5
+        issues.append("Excessive use of acronyms may reduce ATS score")
+    if len(resume_text.split()) > 1000:
+        score -= 5
+        issues.append("Resume is quite long, consider making it more concise")
+    return max(0, min(100, score)), issues
+
+RESUMES = [
+    'Summary\nPython developer.\nExperience\nAcme 2019-2023',
+    'Name | Role || Years\n+----+----+\nPage 1 of 2',
+    '┌──┬──┐\n╔══╦══╗\n03/2021 - 04/2023',
+    'AWS GCP SQL API REST HTTP JSON XML CSS HTML CI CD',
+    'AWS GCP SQL API REST HTTP JSON XML CSS HTML CI',
+    'Worked\t\tremotely. EDUCATION: BSc',
+    'word ' * 1000,
+    'word ' * 1001,
+    ''
+]
+
+def test_scores_equal_the_separate_checks():
+    for resume in RESUMES:
+        assert ats_analyzer.analyze(resume) == reference_analyze(resume), resume[:40]
+
+def test_scores_equal_the_separate_checks_on_random_texts():
+    tokens = ['Skills', 'skill', 'NASA', 'AI', 'a', '|', '||', '\t', '+--+', '+', 'Page 2 of 3', 'Page', '1/2',
+              '/', '┌─┐', '╔═╗', 'experienced', '\n', ' ']
+    rng = random.Random(0)
+    for _ in range(500):
+        resume = ''.join(rng.choice(tokens) + rng.choice(['', ' ', '\n']) for _ in range(rng.randint(0, 40)))
+        assert ats_analyzer.analyze(resume) == reference_analyze(resume), repr(resume)
+
+def test_custom_rules():
+    analyzer = ATSAnalyzer([
+        {'name': 'photo', 'kind': 'present', 'patterns': [r'\bphoto\b'], 'ignore_case': True, 'penalty': 20,
+         'issue': 'Photos are not parsed'},
+        {'name': 'length', 'kind': 'word_count', 'threshold': 3, 'penalty': 90, 'issue': 'Too long'}
+    ])
+
+    assert analyzer.analyze('PHOTO attached') == (80, ['Photos are not parsed'])
+    assert analyzer.analyze('one two three four and a photo') == (0, ['Photos are not parsed', 'Too long'])
+    assert analyzer.analyze('one two three') == (100, [])
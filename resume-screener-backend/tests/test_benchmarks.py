@@ -0,0 +1,70 @@
+from benchmarks import runner
+from benchmarks.__main__ import main
+from benchmarks.runner import Benchmark, bench_case, compare_results, load_results, run_cases, save_results
+
+def document(**medians):
+    return {'results': {name: {'median': median} for name, median in medians.items()}}
+
+def test_benchmark_times_the_call_and_returns_its_result():
+    calls = []
+    setups = []
+    benchmark = Benchmark()
+
+    result = benchmark.pedantic(lambda x: calls.append(x) or x * 2, (21,), setup=lambda: setups.append(1),
+                                rounds=3, iterations=4)
+
+    assert result == 42
+    # One warm-up call, then three rounds of four
+    assert len(calls) == len(setups) == 13
+    assert benchmark.stats['rounds'] == 3 and benchmark.stats['iterations'] == 4
+    assert 0 <= benchmark.stats['min'] <= benchmark.stats['median'] <= benchmark.stats['max']
+
+def test_each_parameter_combination_is_a_case(monkeypatch):
+    monkeypatch.setattr(runner, 'CASES', [])
+
+    @bench_case('parse', words=[10, 20], kind=['pdf', 'txt'])
+    def bench_parse(benchmark, words, kind):
+        pass
+
+    assert [name for name, _, _ in runner.CASES] == [
+        'parse[words=10,kind=pdf]', 'parse[words=10,kind=txt]', 'parse[words=20,kind=pdf]', 'parse[words=20,kind=txt]'
+    ]
+    assert runner.CASES[-1][2] == {'words': 20, 'kind': 'txt'}
+
+def test_failing_case_is_skipped(monkeypatch):
+    monkeypatch.setattr(runner, 'CASES', [])
+
+    @bench_case('fast')
+    def bench_fast(benchmark):
+        benchmark(sum, [1, 2, 3])
+
+    @bench_case('broken')
+    def bench_broken(benchmark):
+        raise RuntimeError('no fixture')
+
+    results = run_cases(quick=True)['results']
+
+    assert list(results) == ['fast']
+    assert results['fast']['rounds'] >= 3
+
+def test_quick_run_of_a_registered_case():
+    import benchmarks.cases
+
+    results = run_cases('preprocess_text[words=300]', quick=True)['results']
+
+    assert list(results) == ['preprocess_text[words=300]']
+
+def test_slowdowns_above_the_threshold_are_regressions():
+    baseline = document(parse=1.0, score=1.0, render=1.0, removed=1.0)
+    current = document(parse=1.05, score=1.2, render=0.5, added=1.0)
+
+    assert compare_results(baseline, current, threshold=0.1) == ['score']
+
+def test_compare_exits_with_1_on_a_regression(tmp_path):
+    baseline, current = str(tmp_path / 'baseline.json'), str(tmp_path / 'current.json')
+    save_results(baseline, document(parse=1.0))
+    save_results(current, document(parse=1.5))
+
+    assert load_results(current) == document(parse=1.5)
+    assert main(['compare', baseline, current]) == 1
+    assert main(['compare', baseline, current, '--threshold', '0.6']) == 0
@@ -0,0 +1,39 @@
+from bson import ObjectId
+import models
+
+def save(job_id, match_percentage, skills=()):
+    return models.save_analysis({'job_id': job_id, 'user_id': None, 'resume_id': str(ObjectId()),
+                                 'match_percentage': match_percentage, 'matched_skills': list(skills),
+                                 'missing_skills': []})
+
+def scores(response):
+    return [analysis['match_percentage'] for analysis in response.get_json()]
+
+def test_candidates_are_filtered_and_sorted_in_the_database(client):
+    for score in (40, 90, 65, 10):
+        save('job-1', score)
+    save('job-2', 99)
+
+    assert scores(client.get('/api/hr/candidates?job_id=job-1')) == [90, 65, 40, 10]
+    assert scores(client.get('/api/hr/candidates?job_id=job-1&min_score=40&max_score=70')) == [65, 40]
+    assert scores(client.get('/api/hr/candidates')) == [99, 90, 65, 40, 10]
+
+def test_candidates_are_paged_with_a_cursor(client):
+    for score in (50, 70, 70, 70, 30):
+        save('job-1', score)
+
+    pages, paged_ids = [], []
+    url = '/api/hr/candidates?job_id=job-1&limit=2'
+    while url:
+        response = client.get(url)
+        pages.append(scores(response))
+        paged_ids += [analysis['_id'] for analysis in response.get_json()]
+        cursor = response.headers.get('X-Next-Cursor')
+        url = f'/api/hr/candidates?job_id=job-1&limit=2&after={cursor}' if cursor else None
+
+    assert pages == [[70, 70], [70, 50], [30]]
+    assert paged_ids == [analysis['_id'] for analysis in client.get('/api/hr/candidates?job_id=job-1').get_json()]
+
+def test_invalid_cursor(client):
+    assert client.get('/api/hr/candidates?limit=2&after=50_not-an-id').status_code == 400
+    assert client.get('/api/hr/candidates?limit=two').status_code == 400
@@ -0,0 +1,57 @@
+import io
+import os
+import time
+import models
+from config import Config
+
+RESUME = b'Python developer with Flask and SQL experience. Skills: Python, Flask, SQL.'
+
+def create_job(client, title):
+    return client.post('/api/hr/job', json={'title': title, 'company': 'Acme', 'description': 'Python and Flask',
+                                            'skills': ['Python', 'Flask']}).get_json()['job_id']
+
+def upload(client, job_id, filename):
+    return client.post('/api/candidate/upload', data={'job_id': job_id, 'file': (io.BytesIO(RESUME), filename)},
+                       content_type='multipart/form-data')
+
+def completed(client, response):
+    assert response.status_code == 202
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        task = client.get(response.get_json()['status_url']).get_json()
+        if task['status'] == 'completed':
+            return task
+        time.sleep(0.02)
+    raise AssertionError('analysis did not complete')
+
+def stored_files():
+    return [name for name in os.listdir(Config.UPLOAD_FOLDER) if not name.startswith('.')]
+
+def test_identical_upload_reuses_the_analysis(client, fake_model):
+    job_id = create_job(client, 'Engineer')
+    task = completed(client, upload(client, job_id, 'resume.txt'))
+
+    response = upload(client, job_id, 'resume-copy.txt')
+
+    assert response.status_code == 200
+    assert response.get_json()['analysis_id'] == task['analysis_id']
+    assert models.analyses.count_documents({}) == 1
+    assert len(stored_files()) == 1
+
+def test_identical_file_is_stored_and_parsed_once(client, fake_model, monkeypatch):
+    first_job, second_job = create_job(client, 'Engineer'), create_job(client, 'Developer')
+    first = completed(client, upload(client, first_job, 'resume.txt'))
+
+    # The second analysis uses the text cached for the content
+    monkeypatch.setattr('utils.blob_store.parse_document', lambda file_path: 1 / 0)
+    second = completed(client, upload(client, second_job, 'resume.txt'))
+
+    assert second['analysis_id'] != first['analysis_id']
+    assert len(stored_files()) == 1
+    assert models.blobs.count_documents({}) == 1
+
+    # The file is removed with the last resume that shares it
+    assert client.delete(f"/api/candidate/resume/{first['resume_id']}").status_code == 200
+    assert len(stored_files()) == 1
+    assert client.delete(f"/api/candidate/resume/{second['resume_id']}").status_code == 200
+    assert stored_files() == []
@@ -0,0 +1,55 @@
+import csv
+import io
+import json
+from bson import ObjectId
+import models
+
+def create_job(client):
+    return client.post('/api/hr/job', json={'title': 'Engineer', 'company': 'Acme', 'description': 'Python',
+                                            'skills': ['Python', 'SQL']}).get_json()['job_id']
+
+def save(job_id, match_percentage, matched_skills):
+    return models.save_analysis({'job_id': job_id, 'user_id': None, 'resume_id': str(ObjectId()),
+                                 'job_title': 'Engineer', 'company': 'Acme', 'match_percentage': match_percentage,
+                                 'ats_score': 90, 'matched_skills': matched_skills, 'missing_skills': []})
+
+def test_ndjson_export(client):
+    job_id = create_job(client)
+    low, high = save(job_id, 20, []), save(job_id, 80, ['Python', 'SQL'])
+
+    response = client.get(f'/api/hr/job/{job_id}/candidates/export')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert f'candidates-{job_id}.ndjson' in response.headers['Content-Disposition']
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [row['_id'] for row in rows] == [high, low]
+    assert rows[0]['matched_skills'] == ['Python', 'SQL']
+
+def test_csv_export(client):
+    job_id = create_job(client)
+    low, high = save(job_id, 20, []), save(job_id, 80, ['Python', 'SQL'])
+
+    response = client.get(f'/api/hr/job/{job_id}/candidates/export?format=csv')
+
+    assert response.mimetype == 'text/csv'
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [row['_id'] for row in rows] == [high, low]
+    assert rows[0]['matched_skills'] == 'Python; SQL'
+    assert rows[0]['match_percentage'] == '80'
+
+def test_export_is_streamed(client):
+    job_id = create_job(client)
+    for score in range(5):
+        save(job_id, score, [])
+
+    response = client.get(f'/api/hr/job/{job_id}/candidates/export?format=csv')
+
+    assert response.is_streamed
+    assert len(list(response.response)) == 6
+
+def test_export_errors(client):
+    job_id = create_job(client)
+    assert client.get(f'/api/hr/job/{job_id}/candidates/export?format=xlsx').status_code == 400
+    assert client.get('/api/hr/job/not-an-id/candidates/export').status_code == 404
+    assert client.get(f'/api/hr/job/{ObjectId()}/candidates/export').status_code == 404
@@ -0,0 +1,51 @@
+from config import Config
+from ingest.documents import extract_listed_skills, parse_job_text
+from ingest.runner import Checkpoint, DUPLICATE, rebuild_resume_index
+from models import save_ingested_resumes
+from utils.parser_pool import PARSE_ERROR, PARSE_OK, PARSE_TIMEOUT
+from utils.resume_index import ResumeIndex, get_resume_embedder
+
+POSTING = '''Software Engineer
+ABC Tech Solutions
+
+Required Skills:
+- Proficiency in Python, JavaScript, and React
+- Knowledge of database systems (SQL and NoSQL)
+- Familiarity with Git version control
+- Strong problem-solving abilities
+- Excellent communication skills
+- Experience with RESTful API design and implementation
+'''
+
+def test_listed_skills_drop_qualifiers():
+    assert parse_job_text(POSTING)['skills'] == [
+        'Python', 'JavaScript', 'React', 'SQL', 'NoSQL', 'Git', 'problem-solving', 'communication'
+    ]
+    assert extract_listed_skills(['Docker, Kubernetes', 'Agile methodologies', 'docker']) == [
+        'Docker', 'Kubernetes', 'Agile'
+    ]
+
+def test_rebuild_resume_index_adds_ingested_resumes(db, monkeypatch, tmp_path):
+    monkeypatch.setattr(Config, 'RESUME_INDEX_DIR', str(tmp_path / 'resume_index'))
+    monkeypatch.setattr(Config, 'EMBEDDING_CACHE_DIR', str(tmp_path / 'embeddings'))
+    texts = ['Python developer with Flask and SQL', 'Chef with ten years in busy kitchens']
+    resume_ids = save_ingested_resumes([{'resume_hash': str(i), 'resume_text': text} for i, text in enumerate(texts)])
+
+    rebuild_resume_index()
+
+    index = ResumeIndex(Config.RESUME_INDEX_DIR)
+    index.load(get_resume_embedder(), catch_up=False)
+    assert len(index) == 2
+    assert index.search('Flask and SQL developer', k=1)[0][0] == resume_ids[0]
+    assert (tmp_path / 'embeddings').exists()
+
+def test_checkpoint_retries_failed_files(tmp_path):
+    path = str(tmp_path / 'checkpoint.jsonl')
+    checkpoint = Checkpoint(path)
+    checkpoint.record([{'path': '/a', 'status': PARSE_OK}, {'path': '/b', 'status': DUPLICATE},
+                       {'path': '/c', 'status': PARSE_TIMEOUT}, {'path': '/d', 'status': PARSE_ERROR}])
+    checkpoint.close()
+    with open(path, 'a') as f:
+        f.write('{"path": "/e", "sta')
+
+    assert Checkpoint(path).done == {'/a', '/b'}
@@ -0,0 +1,73 @@
+from bson import ObjectId
+import models
+from utils.job_cache import job_cache
+
+JOB = {
+    'title': 'Backend Engineer',
+    'company': 'Acme',
+    'description': 'Backend engineer building Python and Flask services',
+    'skills': ['Python', 'Flask']
+}
+
+def create_job(client, **fields):
+    return client.post('/api/hr/job', json=dict(JOB, **fields)).get_json()['job_id']
+
+def test_unchanged_jobs_are_not_modified(client):
+    create_job(client)
+    first = client.get('/api/hr/jobs')
+
+    assert first.status_code == 200
+    assert first.headers['ETag'] and first.headers['Cache-Control'] == 'no-cache'
+    assert [job['title'] for job in first.get_json()] == ['Backend Engineer']
+
+    second = client.get('/api/hr/jobs', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 304
+    assert second.get_data() == b''
+
+    candidate = client.get('/api/candidate/jobs', headers={'If-None-Match': first.headers['ETag']})
+    assert candidate.status_code == 304
+
+def test_edited_job_gets_a_new_etag(client):
+    job_id = create_job(client)
+    before = client.get(f'/api/hr/job/{job_id}')
+
+    client.put(f'/api/hr/job/{job_id}', json={'title': 'Senior Backend Engineer'})
+    after = client.get(f'/api/hr/job/{job_id}', headers={'If-None-Match': before.headers['ETag']})
+
+    assert after.status_code == 200
+    assert after.headers['ETag'] != before.headers['ETag']
+    assert after.get_json()['title'] == 'Senior Backend Engineer'
+
+def test_new_job_is_listed_at_once(client):
+    create_job(client)
+    client.get('/api/hr/jobs')
+
+    create_job(client, title='Data Engineer')
+
+    assert [job['title'] for job in client.get('/api/hr/jobs').get_json()] == ['Backend Engineer', 'Data Engineer']
+
+def test_responses_are_served_from_the_cache(client, monkeypatch):
+    job_id = create_job(client)
+    client.get(f'/api/hr/job/{job_id}')
+    hits = job_cache.hits
+
+    def unavailable(job_id):
+        raise AssertionError('job loaded from the database')
+
+    monkeypatch.setattr('hr.routes.get_job', unavailable)
+    assert client.get(f'/api/hr/job/{job_id}').get_json()['title'] == 'Backend Engineer'
+    assert job_cache.hits == hits + 1
+
+def test_write_by_another_worker_is_picked_up(client, monkeypatch):
+    monkeypatch.setattr(job_cache, 'check_interval', 0)
+    job_id = create_job(client)
+    client.get('/api/hr/jobs')
+
+    # Another worker edits the job: only the shared version tells this one
+    models.update_job(job_id, {'title': 'Staff Engineer'})
+
+    assert client.get('/api/hr/jobs').get_json()[0]['title'] == 'Staff Engineer'
+
+def test_unknown_job(client):
+    assert client.get('/api/hr/job/not-an-id').status_code == 404
+    assert client.get(f'/api/hr/job/{ObjectId()}').status_code == 404
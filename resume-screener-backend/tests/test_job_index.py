@@ -0,0 +1,126 @@
+import time
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from utils.job_index import JobIndex, load_snapshot, save_snapshot
+from utils.nlp_analyzer import preprocess_text
+
+JOBS = [
+    {'_id': 'job-1', 'description': 'Backend engineer building Python and Flask services with SQL databases',
+     'skills': ['Python', 'Flask', 'SQL']},
+    {'_id': 'job-2', 'description': 'Machine learning engineer deploying PyTorch models with Docker and Kubernetes',
+     'skills': ['Machine Learning', 'Docker', 'Kubernetes']},
+    {'_id': 'job-3', 'description': 'Frontend developer writing React and TypeScript user interfaces',
+     'skills': ['React', 'TypeScript']}
+]
+
+RESUMES = [
+    'Python developer. Built Flask services and machine learning pipelines in Python. Docker, SQL.',
+    'Frontend developer with React, node.js and TypeScript. Some Python scripting.',
+    'Chef with ten years in busy kitchens. Menu planning, food safety, team lead. Café owner, naïve résumé.'
+]
+
+def mapped_index(tmp_path):
+    """An index fitted on JOBS and RESUMES, written to a snapshot and opened from it"""
+    fitted = JobIndex()
+    fitted.fit(JOBS, [preprocess_text(text) for text in RESUMES])
+    save_snapshot(str(tmp_path), fitted._state, 1)
+    index = JobIndex(directory=str(tmp_path))
+    assert index.open()
+    return index
+
+def test_mapped_transform_matches_tfidf_vectorizer(tmp_path):
+    index = mapped_index(tmp_path)
+    assert isinstance(index._state.vocabulary.terms, np.memmap)
+
+    corpus = [preprocess_text(job['description']) for job in JOBS] + [preprocess_text(text) for text in RESUMES]
+    vectorizer = TfidfVectorizer().fit(corpus)
+    texts = [preprocess_text(text) for text in RESUMES + ['Kubernetes and SQL, nothing else known: zzzz']]
+
+    expected = vectorizer.transform(texts).toarray()
+    actual = index.transform(texts).toarray()
+    # Columns are in a different order; compare each row's weights by term
+    order = np.argsort([term.encode('utf-8') for term in vectorizer.get_feature_names_out()], kind='stable')
+    np.testing.assert_allclose(actual, expected[:, order])
+
+    for job in JOBS:
+        job_vector = vectorizer.transform([preprocess_text(job['description'])])
+        assert np.allclose(index.score_many(texts, preprocess_text(job['description']), job['_id']),
+                           (vectorizer.transform(texts) @ job_vector.T).toarray().ravel())
+
+def test_added_jobs_use_overlay(tmp_path):
+    state = mapped_index(tmp_path)._state
+    mapped = state.job_matrix
+
+    edited = 'Python engineer running SQL databases and Kubernetes'
+    added = 'React developer with Docker'
+    state = state.with_job('job-1', preprocess_text(edited), ['Python', 'SQL'])
+    state = state.with_job('job-4', preprocess_text(added), ['React', 'Docker'])
+    assert state.job_matrix is mapped
+    assert state.job_ids == ['job-1', 'job-2', 'job-3', 'job-4']
+
+    resume = state.vocabulary.transform([preprocess_text(RESUMES[0])])
+    descriptions = [edited, JOBS[1]['description'], JOBS[2]['description'], added]
+    expected = (state.vocabulary.transform([preprocess_text(text) for text in descriptions]) @ resume.T).toarray().ravel()
+    np.testing.assert_allclose(state.job_scores(resume), expected)
+    np.testing.assert_allclose(state.full_job_matrix().toarray(),
+                               state.vocabulary.transform([preprocess_text(text) for text in descriptions]).toarray())
+
+    # The overlaid jobs are written to the next snapshot
+    name = save_snapshot(str(tmp_path), state, 2)
+    reloaded = load_snapshot(str(tmp_path), name)
+    np.testing.assert_allclose(reloaded.job_scores(resume), expected)
+
+def test_fitted_scores_match_tfidf_vectorizer():
+    index = JobIndex()
+    index.fit(JOBS, [preprocess_text(text) for text in RESUMES])
+
+    corpus = [preprocess_text(job['description']) for job in JOBS] + [preprocess_text(text) for text in RESUMES]
+    vectorizer = TfidfVectorizer().fit(corpus)
+    resumes = [preprocess_text(text) for text in RESUMES]
+    for job in JOBS:
+        expected = (vectorizer.transform(resumes) @ vectorizer.transform([preprocess_text(job['description'])]).T)
+        np.testing.assert_allclose(index.score_many(resumes, preprocess_text(job['description']), job['_id']),
+                                   expected.toarray().ravel())
+
+def test_added_job_is_scored_at_once_without_a_refit():
+    index = JobIndex(refit_ratio=float('inf'))
+    index.fit(JOBS)
+    state = index._state
+
+    index.add_job('job-4', 'Data engineer building SQL pipelines in Python', ['SQL', 'Python'])
+
+    assert index._state.vocabulary is state.vocabulary
+    assert index.job_vector('job-4') is not None
+    resume = preprocess_text(RESUMES[0])
+    assert index.score(resume, preprocess_text('Data engineer building SQL pipelines in Python'), 'job-4') > 0
+
+def test_job_missing_from_the_index_is_transformed_once(monkeypatch):
+    index = JobIndex(refit_ratio=float('inf'))
+    index.fit(JOBS)
+    state = index._state
+    transforms = []
+    transform = state.vocabulary.transform
+    monkeypatch.setattr(state.vocabulary, 'transform', lambda texts: transforms.append(len(texts)) or transform(texts))
+
+    # Added by another worker: not in this index
+    job = preprocess_text('Data engineer building SQL pipelines in Python')
+    first = index.score_many([preprocess_text(RESUMES[0])], job, 'job-4')
+    second = index.score_many([preprocess_text(RESUMES[1])], job, 'job-4')
+
+    assert first[0] > 0 and second[0] > 0
+    # One transform per call for the resumes, and one for the job
+    assert len(transforms) == 3
+
+def test_index_is_refitted_once_the_corpus_grows():
+    index = JobIndex(refit_ratio=0.5)
+    index.fit(JOBS)
+    assert index._state.doc_count == 3
+
+    index.add_resumes([preprocess_text(text) for text in RESUMES])
+
+    deadline = time.monotonic() + 5
+    while index._state.doc_count != 6 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert index._state.doc_count == 6
+    assert b'kitchens' in set(index._state.vocabulary.terms)
@@ -0,0 +1,38 @@
+import pytest
+
+JOB = {
+    'title': 'Backend Engineer',
+    'company': 'Acme',
+    'description': 'Backend engineer building Python and Flask services',
+    'skills': ['Python', 'Flask']
+}
+
+@pytest.fixture
+def job_id(client):
+    response = client.post('/api/hr/job', json=JOB)
+    assert response.status_code == 201
+    return response.get_json()['job_id']
+
+@pytest.mark.parametrize('fields', [
+    {'title': 42},
+    {'company': None},
+    {'description': ['Python', 'Flask']},
+    {'skills': 'Python'},
+    {'skills': ['Python', 3]}
+])
+def test_edit_job_rejects_fields_of_the_wrong_type(client, job_id, fields):
+    response = client.put(f'/api/hr/job/{job_id}', json=fields)
+
+    assert response.status_code == 400
+    assert client.get(f'/api/hr/job/{job_id}').get_json()['title'] == JOB['title']
+
+def test_edit_job_updates_title_without_rescoring(client, job_id):
+    response = client.put(f'/api/hr/job/{job_id}', json={'title': 'Senior Backend Engineer'})
+
+    assert response.status_code == 200
+    job = response.get_json()['job']
+    assert job['title'] == 'Senior Backend Engineer'
+    assert job['version'] == 1
+
+def test_edit_unknown_job(client):
+    assert client.put('/api/hr/job/not-an-id', json={'title': 'x'}).status_code == 404
@@ -0,0 +1,81 @@
+import json
+from datetime import date, datetime, timezone
+import pytest
+from bson import ObjectId
+from flask import Flask, jsonify
+from utils import json_provider
+from utils.json_provider import FastJSONProvider
+
+ID = ObjectId('64b7f0c2a1b2c3d4e5f60718')
+
+DOCUMENT = {
+    '_id': ID,
+    'name': 'Zoë',
+    'created_at': datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+    'ends_on': date(2024, 6, 30),
+    'skills': ['Python', 'SQL'],
+    'score': 87.5,
+    'nested': {'resume_id': ID, 'tags': None}
+}
+
+EXPECTED = {
+    '_id': '64b7f0c2a1b2c3d4e5f60718',
+    'name': 'Zoë',
+    'created_at': '2024-01-02T03:04:05+00:00',
+    'ends_on': '2024-06-30',
+    'skills': ['Python', 'SQL'],
+    'score': 87.5,
+    'nested': {'resume_id': '64b7f0c2a1b2c3d4e5f60718', 'tags': None}
+}
+
+@pytest.fixture(params=['orjson', 'json'])
+def app(request, monkeypatch):
+    """A Flask app using FastJSONProvider, with orjson and with the standard library fallback"""
+    if request.param == 'json':
+        monkeypatch.setattr(json_provider, 'orjson', None)
+    elif json_provider.orjson is None:
+        pytest.skip('orjson is not installed')
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    return app
+
+def test_response_encodes_mongo_documents(app):
+    with app.app_context():
+        response = jsonify(DOCUMENT)
+
+    assert response.mimetype == 'application/json'
+    assert json.loads(response.get_data()) == EXPECTED
+    # Keys keep their order
+    assert list(json.loads(response.get_data())) == list(DOCUMENT)
+
+def test_list_response(app):
+    with app.app_context():
+        response = jsonify([DOCUMENT, DOCUMENT])
+
+    assert json.loads(response.get_data()) == [EXPECTED, EXPECTED]
+
+def test_dumps_and_loads_round_trip(app):
+    text = app.json.dumps(DOCUMENT)
+
+    assert app.json.loads(text) == EXPECTED
+    assert json.loads(app.json.dumps(DOCUMENT, indent=2)) == EXPECTED
+
+def test_debug_responses_are_indented(app):
+    app.debug = True
+    with app.app_context():
+        body = jsonify({'a': 1}).get_data(as_text=True)
+
+    assert body == '{\n  "a": 1\n}\n'
+
+def test_unsupported_value_is_an_error(app):
+    with pytest.raises(TypeError):
+        app.json.dumps({'value': object()})
+
+def test_api_returns_stored_documents(client):
+    job_id = client.post('/api/hr/job', json={'title': 'Engineer', 'company': 'Acme', 'description': 'Python',
+                                              'skills': ['Python']}).get_json()['job_id']
+
+    job = client.get(f'/api/hr/job/{job_id}').get_json()
+
+    assert job['_id'] == job_id
+    assert job['skills'] == ['Python']
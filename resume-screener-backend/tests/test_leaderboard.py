@@ -0,0 +1,88 @@
+from bson import ObjectId
+import models
+
+def save(job_id, match_percentage):
+    return models.save_analysis({'job_id': job_id, 'user_id': None, 'resume_id': str(ObjectId()),
+                                 'match_percentage': match_percentage, 'matched_skills': [], 'missing_skills': []})
+
+def stored_ids(job_id):
+    return [str(entry['_id']) for entry in models.leaderboards.find_one({'_id': job_id})['entries']]
+
+def test_leaderboard_follows_saves_and_deletes(db):
+    low, high = save('job-1', 40), save('job-1', 90)
+
+    assert [str(entry['_id']) for entry in models.get_top_candidates('job-1', 5)] == [high, low]
+
+    best = save('job-1', 95)
+    assert stored_ids('job-1') == [best, high, low]
+    assert models.leaderboards.find_one({'_id': 'job-1'})['total'] == 3
+
+def test_rebuild_keeps_an_analysis_saved_meanwhile(db, monkeypatch):
+    first = save('job-1', 50)
+    models.rebuild_leaderboard('job-1')
+
+    # Another request saves an analysis after the rebuild read the best ones
+    saved = []
+    analyses = models.analyses
+
+    class RacingAnalyses:
+        def __getattr__(self, attr):
+            return getattr(models.get_db()['analyses'], attr)
+
+        def count_documents(self, query):
+            saved.append(save('job-1', 99))
+            return analyses.count_documents(query)
+
+    monkeypatch.setattr(models, 'analyses', RacingAnalyses())
+    models.rebuild_leaderboard('job-1')
+    monkeypatch.setattr(models, 'analyses', analyses)
+
+    assert stored_ids('job-1') == [saved[0], first]
+    assert models.leaderboards.find_one({'_id': 'job-1'})['total'] == 2
+
+def test_first_rebuild_keeps_an_analysis_saved_meanwhile(db, monkeypatch):
+    first = save('job-1', 50)
+
+    saved = []
+    analyses = models.analyses
+
+    class RacingAnalyses:
+        def __getattr__(self, attr):
+            return getattr(models.get_db()['analyses'], attr)
+
+        def count_documents(self, query):
+            # Saved after the rebuild counted the analyses, before it is stored
+            count = analyses.count_documents(query)
+            saved.append(save('job-1', 99))
+            return count
+
+    monkeypatch.setattr(models, 'analyses', RacingAnalyses())
+    models.rebuild_leaderboard('job-1')
+    monkeypatch.setattr(models, 'analyses', analyses)
+
+    assert [str(entry['_id']) for entry in models.get_top_candidates('job-1', 5)] == [saved[0], first]
+    assert stored_ids('job-1') == [saved[0], first]
+    assert not models.leaderboards.find_one({'_id': 'job-1'}).get('building')
+
+def test_deleted_analysis_leaves_the_leaderboard(db):
+    low, high = save('job-1', 40), save('job-1', 90)
+    models.get_top_candidates('job-1', 5)
+
+    models.delete_analysis(high)
+
+    assert [str(entry['_id']) for entry in models.get_top_candidates('job-1', 5)] == [low]
+    assert models.leaderboards.find_one({'_id': 'job-1'})['total'] == 1
+
+def test_top_candidates_of_unknown_job(client):
+    assert client.get('/api/hr/job/not-an-id/top').status_code == 404
+    assert client.get(f'/api/hr/job/{ObjectId()}/top').status_code == 404
+
+def test_top_candidates(client):
+    job_id = client.post('/api/hr/job', json={'title': 'Engineer', 'company': 'Acme', 'description': 'Python',
+                                              'skills': ['Python']}).get_json()['job_id']
+    low, high = save(job_id, 10), save(job_id, 80)
+
+    response = client.get(f'/api/hr/job/{job_id}/top?k=1')
+
+    assert response.status_code == 200
+    assert [analysis['_id'] for analysis in response.get_json()] == [high]
@@ -0,0 +1,103 @@
+import io
+import re
+import pytest
+from utils.metrics import Counter, Histogram, MetricsRegistry, STAGE_SECONDS, timed
+
+JOB = {'title': 'Backend Engineer', 'company': 'Acme', 'description': 'Backend engineer building Python services',
+       'skills': ['Python', 'Flask']}
+
+def sample(text, line_start):
+    """Value of the sample line starting with line_start"""
+    for line in text.splitlines():
+        if line.startswith(line_start + ' '):
+            return float(line.rsplit(' ', 1)[1])
+    raise AssertionError(f'{line_start} not in metrics')
+
+def stage_count(stage):
+    return sum(count for name, labels, count in STAGE_SECONDS.samples()
+               if name.endswith('_count') and labels == f'{{stage="{stage}"}}')
+
+def test_registry_renders_the_prometheus_text_format():
+    registry = MetricsRegistry()
+    parsed = registry.counter('parsed_total', 'Documents parsed', ['status'])
+    latency = registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0))
+    registry.callback('queue_depth', 'Tasks waiting', 'gauge', lambda: 3)
+    parsed.inc(status='ok')
+    parsed.inc(2, status='ok')
+    parsed.inc(status='bad "file"')
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+
+    assert registry.render().splitlines() == [
+        '# HELP parsed_total Documents parsed',
+        '# TYPE parsed_total counter',
+        'parsed_total{status="bad \\"file\\""} 1',
+        'parsed_total{status="ok"} 3',
+        '# HELP latency_seconds Latency',
+        '# TYPE latency_seconds histogram',
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1.0"} 2',
+        'latency_seconds_bucket{le="+Inf"} 3',
+        'latency_seconds_sum 5.55',
+        'latency_seconds_count 3',
+        '# HELP queue_depth Tasks waiting',
+        '# TYPE queue_depth gauge',
+        'queue_depth 3'
+    ]
+    assert parsed.value(status='ok') == 3
+
+def test_metric_is_registered_once():
+    registry = MetricsRegistry()
+    first = registry.counter('parsed_total', 'Documents parsed')
+
+    assert registry.counter('parsed_total', 'Documents parsed') is first
+    assert isinstance(first, Counter)
+
+def test_failing_callback_is_left_out():
+    registry = MetricsRegistry()
+    registry.callback('broken', 'Broken', 'gauge', lambda: 1 / 0)
+    registry.histogram('latency_seconds', 'Latency')
+
+    text = registry.render()
+
+    assert 'broken' not in text
+    assert '# TYPE latency_seconds histogram' in text
+
+def test_timed_block_is_observed_even_when_it_raises():
+    before = stage_count('test_stage')
+
+    with pytest.raises(ValueError):
+        with timed('test_stage'):
+            raise ValueError('bad input')
+
+    assert stage_count('test_stage') == before + 1
+
+def test_histogram_boundaries_are_inclusive():
+    histogram = Histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0))
+    histogram.observe(0.1)
+
+    assert list(histogram.samples())[0] == ('latency_seconds_bucket', '{le="0.1"}', 1)
+
+def test_screening_reports_its_stages(client, fake_model):
+    job_id = client.post('/api/hr/job', json=JOB).get_json()['job_id']
+
+    response = client.post(f'/api/hr/job/{job_id}/screen', content_type='multipart/form-data',
+                           data={'files': [(io.BytesIO(b'Python developer building Flask services'), 'resume.txt')]})
+
+    assert response.status_code == 201
+    stages = dict(re.findall(r'(\w+);dur=([\d.]+)', response.headers['Server-Timing']))
+    assert {'text_similarity', 'skill_matching', 'save_analyses', 'total'} <= set(stages)
+    assert all(float(duration) <= float(stages['total']) for duration in stages.values())
+
+def test_metrics_endpoint(client):
+    client.get('/health')
+
+    response = client.get('/metrics')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    text = response.get_data(as_text=True)
+    assert sample(text, 'resume_screener_request_seconds_count{method="GET",endpoint="/health",status="200"}') >= 1
+    assert '# TYPE resume_screener_suggestion_cache_hits_total counter' in text
+    assert 'resume_screener_gemini_fallbacks_total{reason="timeout"}' in text
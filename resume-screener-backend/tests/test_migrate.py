@@ -0,0 +1,17 @@
+import migrate
+import models
+
+def test_migrate_backfills_skill_keys_once(db, monkeypatch):
+    # Keep the mongomock client of the db fixture
+    monkeypatch.setattr(migrate, 'init_db', lambda mongo_uri: db)
+    models.analyses.insert_many([
+        {'job_id': 'job-1', 'matched_skills': ['Python', 'Node.js']},
+        {'job_id': 'job-1', 'matched_skills': []},
+        {'job_id': 'job-1', 'matched_skills': ['Go'], 'skill_keys': ['go']}
+    ])
+
+    assert migrate.main() == 0
+
+    keys = [analysis['skill_keys'] for analysis in models.analyses.find().sort('_id', 1)]
+    assert keys == [models.get_skill_keys(['Python', 'Node.js']), [], ['go']]
+    assert models.backfill_skill_keys() == 0
@@ -0,0 +1,69 @@
+import os
+import threading
+import time
+from utils.parser_pool import ParserPool, PARSE_ERROR, PARSE_MEMORY, PARSE_OK, PARSE_TIMEOUT, PARSE_UNSUPPORTED
+
+def test_text_is_extracted_in_a_parser_process(tmp_path):
+    path = tmp_path / 'resume.txt'
+    path.write_text('Python developer')
+    pool = ParserPool()
+
+    result = pool.parse(str(path))
+
+    assert result.status == PARSE_OK and result.text.strip() == 'Python developer'
+    assert pool.stats()[PARSE_OK] == 1
+
+def test_unsupported_and_broken_files(tmp_path):
+    broken = tmp_path / 'resume.pdf'
+    broken.write_bytes(b'not a pdf')
+    pool = ParserPool()
+
+    assert pool.parse(str(tmp_path / 'resume.exe')).status == PARSE_UNSUPPORTED
+    result = pool.parse(str(broken))
+    assert result.status == PARSE_ERROR and result.error
+
+def test_hung_parser_is_killed_at_the_timeout(tmp_path):
+    # Reading a pipe nobody writes to blocks forever
+    path = tmp_path / 'hung.txt'
+    os.mkfifo(path)
+    pool = ParserPool(timeout=0.5)
+
+    result = pool.parse(str(path))
+
+    assert result.status == PARSE_TIMEOUT
+    assert 0.5 <= result.elapsed < 5
+
+def test_parser_over_its_memory_limit_is_stopped(tmp_path):
+    path = tmp_path / 'huge.txt'
+    with open(path, 'w') as f:
+        for _ in range(64):
+            f.write('word ' * 200000 + '\n')
+    pool = ParserPool(memory_limit=32 * 1024 * 1024, timeout=30)
+
+    assert pool.parse(str(path)).status == PARSE_MEMORY
+
+def test_parse_timeout_starts_once_a_parser_is_free(tmp_path):
+    slow = tmp_path / 'slow.txt'
+    os.mkfifo(slow)
+    path = tmp_path / 'resume.txt'
+    path.write_text('Python developer')
+    pool = ParserPool(max_workers=1, timeout=2)
+
+    def write_slowly():
+        time.sleep(0.5)
+        with open(slow, 'w') as f:
+            f.write('Slow resume')
+
+    writer = threading.Thread(target=write_slowly)
+    writer.start()
+    results = {}
+    parsing = threading.Thread(target=lambda: results.setdefault('slow', pool.parse(str(slow))))
+    parsing.start()
+    time.sleep(0.1)
+    results['queued'] = pool.parse(str(path))
+    parsing.join()
+    writer.join()
+
+    assert results['slow'].status == PARSE_OK and results['slow'].text.strip() == 'Slow resume'
+    assert results['queued'].status == PARSE_OK
+    assert results['queued'].waited > 0.2
@@ -0,0 +1,120 @@
+import json
+import time
+from datetime import datetime, timedelta, timezone
+import pytest
+from bson import ObjectId
+import models
+from utils import suggestion_tasks
+from utils.fake_llm import FakeGenerativeModel
+from utils.task_queue import suggestion_queue
+
+RESUME = 'Python developer with Flask and SQL experience. Education: BSc. Skills: Python, Flask, SQL.'
+
+@pytest.fixture
+def job_id(client):
+    return client.post('/api/hr/job', json={
+        'title': 'Backend Engineer',
+        'company': 'Acme',
+        'description': 'Backend engineer building Python and Flask services',
+        'skills': ['Python', 'Flask', 'Docker']
+    }).get_json()['job_id']
+
+@pytest.fixture
+def sweep_every_call(monkeypatch):
+    monkeypatch.setattr(models.Config, 'SUGGESTION_SWEEP_INTERVAL', 0)
+
+def wait_for(check, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        value = check()
+        if value:
+            return value
+        time.sleep(0.02)
+    raise AssertionError('timed out')
+
+def upload(client, job_id):
+    response = client.post('/api/candidate/upload', data={'job_id': job_id, 'text': RESUME})
+    assert response.status_code == 202
+    status_url = response.get_json()['status_url']
+    task = wait_for(lambda: (lambda task: task if task['status'] in ('completed', 'failed') else None)(
+        client.get(status_url).get_json()))
+    assert task['status'] == 'completed'
+    return task['analysis_id']
+
+def events(response):
+    """(event, data) pairs of a server-sent events response"""
+    parsed = []
+    for block in response.get_data(as_text=True).split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.split('\n') if line and not line.startswith(':'))
+        if 'event' in fields:
+            parsed.append((fields['event'], json.loads(fields['data'])))
+    return parsed
+
+def test_analysis_is_saved_pending_then_patched_with_suggestions(client, job_id, monkeypatch):
+    model = FakeGenerativeModel(delay=0.5)
+    monkeypatch.setattr('utils.nlp_analyzer._gemini_model', model)
+
+    analysis_id = upload(client, job_id)
+
+    # The scores are saved before Gemini answers
+    analysis = client.get(f'/api/candidate/analysis/{analysis_id}').get_json()
+    assert analysis['suggestions_status'] == 'pending'
+    assert analysis['matched_skills'] == ['Python', 'Flask']
+
+    # The stream sends the scores at once and the suggestions when they are saved
+    stream = events(client.get(f'/api/candidate/analysis/{analysis_id}/stream'))
+    assert [event for event, _ in stream] == ['analysis', 'suggestions']
+    assert stream[0][1]['match_percentage'] == analysis['match_percentage']
+    assert stream[1][1]['status'] == 'ready'
+    assert 'Suggestion 1 from the fake model' in stream[1][1]['suggestions']
+
+    analysis = client.get(f'/api/candidate/analysis/{analysis_id}').get_json()
+    assert analysis['suggestions_status'] == 'ready'
+    assert analysis['suggestions'] == stream[1][1]['suggestions']
+    assert model.calls == 1
+
+def test_stream_of_a_ready_analysis(client, job_id, fake_model):
+    analysis_id = upload(client, job_id)
+    wait_for(lambda: models.get_analysis_suggestions(analysis_id)['suggestions_status'] == 'ready')
+
+    stream = events(client.get(f'/api/candidate/analysis/{analysis_id}/stream'))
+
+    assert [event for event, _ in stream] == ['analysis', 'suggestions']
+
+def test_busy_stream_asks_the_client_to_reconnect(client, job_id, monkeypatch):
+    monkeypatch.setattr('utils.nlp_analyzer._gemini_model', FakeGenerativeModel(delay=0.5))
+    client.application.config['SUGGESTION_STREAM_LIMIT'] = 0
+    analysis_id = upload(client, job_id)
+
+    response = client.get(f'/api/candidate/analysis/{analysis_id}/stream')
+
+    assert [event for event, _ in events(response)] == ['analysis', 'busy']
+    assert 'retry: ' in response.get_data(as_text=True)
+
+def test_failed_suggestion_task_saves_static_suggestions(client, job_id, monkeypatch):
+    def fail(*args):
+        raise RuntimeError('database unavailable')
+
+    monkeypatch.setattr(suggestion_tasks, 'suggest_improvements', fail)
+    monkeypatch.setattr(suggestion_queue, 'retry_delay', 0)
+    analysis_id = upload(client, job_id)
+
+    analysis = wait_for(lambda: (lambda analysis: analysis if analysis['suggestions_status'] != 'pending' else None)(
+        client.get(f'/api/candidate/analysis/{analysis_id}').get_json()))
+
+    assert analysis['suggestions_status'] == 'ready'
+    assert analysis['suggestions'][:2] == suggestion_tasks.DEFAULT_SUGGESTIONS
+
+def test_stale_pending_suggestions_are_marked_failed(client, sweep_every_call):
+    saved_at = datetime.now(timezone.utc) - timedelta(seconds=models.Config.SUGGESTION_PENDING_TIMEOUT + 60)
+    stale_id = ObjectId.from_datetime(saved_at)
+    models.analyses.insert_one({'_id': stale_id, 'job_id': 'job-1', 'suggestions': ['Use clear headings'],
+                                'suggestions_status': 'pending'})
+    recent_id = models.analyses.insert_one({'job_id': 'job-1', 'suggestions': [],
+                                            'suggestions_status': 'pending'}).inserted_id
+
+    analysis = client.get(f'/api/candidate/analysis/{stale_id}').get_json()
+
+    assert analysis['suggestions_status'] == 'failed'
+    assert analysis['suggestions'] == ['Use clear headings']
+    assert models.get_analysis_suggestions(str(recent_id))['suggestions_status'] == 'pending'
@@ -0,0 +1,46 @@
+import time
+from bson import ObjectId
+
+JOBS = [
+    {'title': 'Chef', 'company': 'Bistro', 'description': 'Chef cooking in a busy kitchen, menu planning',
+     'skills': ['Cooking', 'Menu Planning']},
+    {'title': 'Backend Engineer', 'company': 'Acme',
+     'description': 'Backend engineer building Python and Flask services with SQL databases',
+     'skills': ['Python', 'Flask', 'SQL']},
+    {'title': 'Frontend Developer', 'company': 'Webco', 'description': 'Frontend developer writing React interfaces',
+     'skills': ['React', 'TypeScript']}
+]
+
+RESUME = 'Python developer. Built Flask services on SQL databases. Some React.'
+
+def upload(client, job_id):
+    status_url = client.post('/api/candidate/upload', data={'job_id': job_id, 'text': RESUME}).get_json()['status_url']
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        task = client.get(status_url).get_json()
+        if task['status'] == 'completed':
+            return task['resume_id']
+        time.sleep(0.02)
+    raise AssertionError('analysis did not complete')
+
+def test_jobs_are_ranked_for_a_resume(client):
+    job_ids = [client.post('/api/hr/job', json=job).get_json()['job_id'] for job in JOBS]
+    resume_id = upload(client, job_ids[0])
+
+    response = client.get(f'/api/candidate/resume/{resume_id}/recommended-jobs?k=2')
+
+    assert response.status_code == 200
+    recommendations = response.get_json()
+    assert [job['job_id'] for job in recommendations] == [job_ids[1], job_ids[2]]
+    best = recommendations[0]
+    assert best['job_title'] == 'Backend Engineer' and best['company'] == 'Acme'
+    assert best['matched_skills'] == ['Python', 'Flask', 'SQL']
+    assert best['skills_match_percentage'] == 100
+    assert best['match_percentage'] > recommendations[1]['match_percentage']
+
+def test_k_must_be_an_integer(client):
+    assert client.get(f'/api/candidate/resume/{ObjectId()}/recommended-jobs?k=many').status_code == 400
+
+def test_recommended_jobs_of_an_unknown_resume(client):
+    assert client.get('/api/candidate/resume/not-an-id/recommended-jobs').status_code == 404
+    assert client.get(f'/api/candidate/resume/{ObjectId()}/recommended-jobs').status_code == 404
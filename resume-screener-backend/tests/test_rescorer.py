@@ -0,0 +1,67 @@
+from conftest import use_job_index
+from utils.nlp_analyzer import analyze_resumes
+from utils.rescorer import rescore_batch
+
+RESUMES = [
+    'Python developer. Built Flask services and machine learning pipelines in Python. Docker, SQL.',
+    'Machine-learning engineer: PyTorch, C++ and Python. Deployed models with Docker and Kubernetes.',
+    'Frontend developer with React, node.js and TypeScript. Some Python scripting.',
+    'Chef with ten years in busy kitchens. Menu planning, food safety, team lead.',
+    'Data analyst: SQL, Excel, Tableau. Learning machine learning in Python.'
+]
+
+OLD_JOB = {
+    '_id': 'job-1',
+    'title': 'Backend Engineer',
+    'company': 'Acme',
+    'description': 'Backend engineer building Python and Flask services with SQL databases',
+    'skills': ['Python', 'Flask', 'SQL', 'Machine Learning'],
+    'version': 1
+}
+
+NEW_JOB = dict(OLD_JOB, version=2,
+               description='Machine learning engineer deploying Python models with Docker and Kubernetes',
+               skills=['Python', 'Machine Learning', 'Docker', 'C++', 'node.js', 'Kubernetes'])
+
+def analyses_for(job):
+    """Analyses of RESUMES as screening saves them"""
+    results = analyze_resumes(RESUMES, job['description'], job['skills'], job['_id'], include_suggestions=False)
+    return [{
+        '_id': f'analysis-{i}',
+        'resume_id': f'resume-{i}',
+        'matched_skills': result['matched_skills'],
+        'missing_skills': result['missing_skills'],
+        'features': result['features']
+    } for i, result in enumerate(results)]
+
+def load_texts(resume_ids):
+    return {resume_id: RESUMES[int(resume_id.split('-')[1])] for resume_id in resume_ids}
+
+def test_rescore_batch_matches_analyze_resumes(monkeypatch, text_scorer):
+    use_job_index(monkeypatch, [NEW_JOB], RESUMES)
+    batch = analyses_for(OLD_JOB)
+    # An analysis saved before features were stored is re-scored from its text
+    del batch[2]['features']
+
+    updates, skipped = rescore_batch(batch, NEW_JOB, text_scorer, load_texts=load_texts)
+    expected = analyze_resumes(RESUMES, NEW_JOB['description'], NEW_JOB['skills'], NEW_JOB['_id'],
+                               include_suggestions=False)
+
+    assert skipped == 0
+    assert [analysis_id for analysis_id, _ in updates] == [analysis['_id'] for analysis in batch]
+    for (_, fields), result in zip(updates, expected):
+        assert fields['match_percentage'] == result['match_percentage']
+        assert fields['matched_skills'] == result['matched_skills']
+        assert fields['missing_skills'] == result['missing_skills']
+        assert fields['job_version'] == 2
+    assert updates[2][1]['features'] == expected[2]['features']
+
+def test_rescore_batch_skips_deleted_resumes(monkeypatch, text_scorer):
+    use_job_index(monkeypatch, [NEW_JOB], RESUMES)
+    batch = analyses_for(OLD_JOB)[:2]
+    del batch[1]['features']
+
+    updates, skipped = rescore_batch(batch, NEW_JOB, text_scorer, load_texts=lambda resume_ids: {})
+
+    assert skipped == 1
+    assert [analysis_id for analysis_id, _ in updates] == ['analysis-0']
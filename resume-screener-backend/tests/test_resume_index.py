@@ -0,0 +1,123 @@
+import time
+import numpy as np
+from bson import ObjectId
+import models
+from utils import resume_index as resume_index_module
+from utils.resume_index import ResumeIndex
+from utils.text_scorer import EmbeddingScorer, HashingEncoder
+
+TEXTS = [
+    'Python developer building Flask services with SQL databases',
+    'Python engineer writing Flask and Django services on PostgreSQL',
+    'Frontend developer writing React and TypeScript interfaces',
+    'Chef with ten years in busy kitchens, menu planning and food safety'
+]
+
+def embedder(dimensions=256):
+    return EmbeddingScorer(HashingEncoder(dimensions))
+
+def filled_index(directory=None, **kwargs):
+    index = ResumeIndex(directory, **kwargs)
+    index.load(embedder(), catch_up=False)
+    index.add_many([f'resume-{i}' for i in range(len(TEXTS))], TEXTS)
+    return index
+
+def test_search_ranks_by_cosine_similarity(db):
+    index = filled_index()
+
+    results = index.search('Python developer with Flask and SQL', k=3)
+
+    vectors = embedder().embed(TEXTS + ['Python developer with Flask and SQL'])
+    expected = np.argsort(-(vectors[:-1] @ vectors[-1]), kind='stable')[:3]
+    assert [resume_id for resume_id, _ in results] == [f'resume-{i}' for i in expected]
+    np.testing.assert_allclose([similarity for _, similarity in results],
+                               (vectors[:-1] @ vectors[-1])[expected], rtol=1e-5)
+
+def test_removed_and_excluded_resumes_are_left_out(db):
+    index = filled_index()
+    index.remove('resume-0')
+
+    results = index.search(TEXTS[0], k=10, exclude=['resume-1'])
+
+    assert {resume_id for resume_id, _ in results} == {'resume-2', 'resume-3'}
+    assert len(index) == 3
+
+def test_existing_ids_are_not_added_twice(db):
+    index = filled_index()
+    index.add('resume-0', 'Completely different text')
+
+    assert len(index) == len(TEXTS)
+    assert index.search(TEXTS[0], k=1)[0][0] == 'resume-0'
+
+def test_saved_index_is_reloaded(db, tmp_path):
+    index = filled_index(str(tmp_path))
+    index.remove('resume-3')
+    index.save()
+
+    reloaded = ResumeIndex(str(tmp_path))
+    reloaded.load(embedder(), catch_up=False)
+
+    assert len(reloaded) == 3
+    assert reloaded.search(TEXTS[2], k=10) == index.search(TEXTS[2], k=10)
+
+def test_index_built_with_another_embedder_is_not_loaded(db, tmp_path):
+    filled_index(str(tmp_path)).save()
+
+    reloaded = ResumeIndex(str(tmp_path))
+    reloaded.load(embedder(dimensions=128), catch_up=False)
+
+    assert len(reloaded) == 0
+
+def test_approximate_search_finds_near_copies(db):
+    words = ['python', 'flask', 'sql', 'react', 'docker', 'kitchen', 'menu', 'sales', 'audit', 'nurse',
+             'rust', 'spark', 'design', 'finance', 'legal', 'teacher']
+    rng = np.random.default_rng(0)
+    texts = [' '.join(rng.choice(words, 8)) + f' id{i}' for i in range(400)]
+    index = ResumeIndex(exact_limit=100, probes=4)
+    index.load(embedder(), catch_up=False)
+    index.add_many([f'resume-{i}' for i in range(len(texts))], texts)
+
+    deadline = time.monotonic() + 5
+    while index._ivf is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert index._ivf is not None
+
+    found = sum(index.search(texts[i], k=1)[0][0] == f'resume-{i}' for i in range(0, 400, 10))
+    assert found >= 36
+
+def test_resumes_saved_elsewhere_are_synced(db):
+    resume_ids = models.save_resumes([{'resume_text': text} for text in TEXTS])
+    index = ResumeIndex()
+    index.load(embedder(), catch_up=False)
+
+    index.sync(force=True)
+
+    assert len(index) == len(TEXTS)
+    assert index.search(TEXTS[3], k=1)[0][0] == resume_ids[3]
+
+def test_similar_resumes(client, monkeypatch):
+    monkeypatch.setattr(resume_index_module, '_resume_index', ResumeIndex())
+    resume_ids = models.save_resumes([
+        {'resume_text': text, 'resume_hash': str(i), 'user_id': f'user-{i}', 'job_id': 'job-1',
+         'original_filename': f'resume-{i}.pdf'}
+        for i, text in enumerate(TEXTS)
+    ] + [{'resume_text': TEXTS[0], 'resume_hash': '0', 'user_id': 'user-4', 'job_id': 'job-2',
+          'original_filename': 'copy.pdf'}])
+    index = resume_index_module.get_resume_index()
+    deadline = time.monotonic() + 5
+    while len(index) < 5 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    response = client.get(f'/api/hr/resume/{resume_ids[0]}/similar?k=2')
+
+    assert response.status_code == 200
+    similar = response.get_json()
+    # The resume itself and its copy are left out
+    assert [resume['resume_id'] for resume in similar] == [resume_ids[1], resume_ids[2]]
+    assert similar[0]['user_id'] == 'user-1' and similar[0]['original_filename'] == 'resume-1.pdf'
+    assert 0 < similar[1]['similarity'] < similar[0]['similarity'] <= 1
+
+def test_similar_resumes_errors(client):
+    assert client.get(f'/api/hr/resume/{ObjectId()}/similar?k=many').status_code == 400
+    assert client.get('/api/hr/resume/not-an-id/similar').status_code == 404
+    assert client.get(f'/api/hr/resume/{ObjectId()}/similar').status_code == 404
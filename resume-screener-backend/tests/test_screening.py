@@ -0,0 +1,64 @@
+import io
+import zipfile
+from bson import ObjectId
+import models
+
+JOB = {
+    'title': 'Backend Engineer',
+    'company': 'Acme',
+    'description': 'Backend engineer building Python and Flask services with SQL databases',
+    'skills': ['Python', 'Flask', 'SQL', 'Docker']
+}
+
+STRONG = b'Python developer. Built Flask services on SQL databases and shipped them with Docker.'
+WEAK = b'Chef with ten years in busy kitchens. Menu planning and food safety.'
+
+def archive(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zip_file:
+        for name, content in files.items():
+            zip_file.writestr(name, content)
+    buffer.seek(0)
+    return buffer
+
+def screen(client, job_id, files):
+    return client.post(f'/api/hr/job/{job_id}/screen', data={'files': files}, content_type='multipart/form-data')
+
+def test_batch_is_scored_and_ranked(client):
+    job_id = client.post('/api/hr/job', json=JOB).get_json()['job_id']
+
+    response = screen(client, job_id, [
+        (io.BytesIO(WEAK), 'weak.txt'),
+        (io.BytesIO(STRONG), 'strong.txt'),
+        (archive({'copy/strong-copy.txt': STRONG, 'empty.txt': b'   ', '.hidden.txt': WEAK}), 'batch.zip')
+    ])
+
+    assert response.status_code == 201
+    body = response.get_json()
+    assert [result['filename'] for result in body['results']] == ['strong.txt', 'strong-copy.txt', 'weak.txt']
+    strong, copy, weak = body['results']
+    assert strong['matched_skills'] == ['Python', 'Flask', 'SQL', 'Docker']
+    assert strong['match_percentage'] > weak['match_percentage']
+    # Identical content is scored and stored once
+    assert copy['analysis_id'] == strong['analysis_id']
+    assert [failure['filename'] for failure in body['failed']] == ['empty.txt']
+    assert models.analyses.count_documents({'job_id': job_id}) == 2
+
+def test_screened_content_is_reused(client):
+    job_id = client.post('/api/hr/job', json=JOB).get_json()['job_id']
+    first = screen(client, job_id, [(io.BytesIO(STRONG), 'strong.txt')]).get_json()['results'][0]
+
+    second = screen(client, job_id, [(io.BytesIO(STRONG), 'renamed.txt')]).get_json()['results'][0]
+
+    assert second['reused'] and second['analysis_id'] == first['analysis_id']
+    assert models.analyses.count_documents({'job_id': job_id}) == 1
+
+def test_screening_rejects_unsupported_files(client):
+    job_id = client.post('/api/hr/job', json=JOB).get_json()['job_id']
+
+    assert screen(client, job_id, []).status_code == 400
+    assert screen(client, job_id, [(io.BytesIO(b'MZ'), 'resume.exe')]).status_code == 400
+
+def test_screening_an_unknown_job(client):
+    assert client.post('/api/hr/job/not-an-id/screen').status_code == 404
+    assert client.post(f'/api/hr/job/{ObjectId()}/screen').status_code == 404
@@ -0,0 +1,44 @@
+import random
+import re
+from utils.skill_matcher import SkillMatcher, get_skill_matcher
+
+SKILLS = ['Python', 'Java', 'JavaScript', 'C', 'C++', 'C#', 'SQL', 'NoSQL', 'Machine Learning', 'Learning',
+          'Deep Learning', 'React', 'React Native', 'Native', 'node.js', 'Node', 'Go', 'Data', 'Big Data',
+          'Data Science', 'Science', 'Ruby on Rails', 'Rails', 'on']
+
+TEXTS = [
+    'Senior Python and JavaScript developer; React Native apps, node.js services',
+    'Machine learning engineer: deep learning, big data science with SQL and NoSQL stores',
+    'C, C++ and C# on embedded devices. Go and Ruby on Rails for the web.',
+    'java-script is not javascript; reactnative is not react native',
+    ''
+]
+
+def reference_match(text, skills):
+    """One regex per skill, as skills were matched before the compiled matcher"""
+    text = text.lower()
+    return [skill for skill in skills if re.search(r'\b' + re.escape(skill.lower()) + r'\b', text)]
+
+def test_matches_equal_one_regex_per_skill():
+    matcher = SkillMatcher(SKILLS)
+    for text in TEXTS:
+        assert matcher.match(text) == reference_match(text, SKILLS)
+
+def test_matches_equal_one_regex_per_skill_on_random_texts():
+    words = [skill.lower() for skill in SKILLS] + ['and', 'with', '-', '/', '.', 'script', 'native', 'data']
+    rng = random.Random(0)
+    matcher = SkillMatcher(SKILLS)
+    for _ in range(500):
+        text = ' '.join(rng.choice(words) for _ in range(rng.randint(1, 12)))
+        assert matcher.match(text) == reference_match(text, SKILLS), text
+
+def test_match_many_and_precomputed_tables():
+    matcher = SkillMatcher(SKILLS)
+    rebuilt = SkillMatcher(SKILLS, matcher.tables())
+
+    assert rebuilt.match_many(TEXTS) == matcher.match_many(TEXTS) == [reference_match(text, SKILLS) for text in TEXTS]
+
+def test_matchers_are_cached_per_skill_list():
+    assert get_skill_matcher(['Python', 'SQL']) is get_skill_matcher(['Python', 'SQL'])
+    assert get_skill_matcher(['Python', 'SQL']) is not get_skill_matcher(['SQL', 'Python'])
+    assert get_skill_matcher([]).match('Python') == []
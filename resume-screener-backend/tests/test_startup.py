@@ -0,0 +1,53 @@
+import pytest
+import app as app_module
+import models
+from benchmarks.startup import run_probe
+from utils.lazy import lazy_import
+
+def test_app_starts_without_heavy_modules():
+    assert run_probe()['heavy_modules'] == []
+
+def test_lazy_module_is_imported_on_first_use():
+    json = lazy_import('json')
+    assert 'not loaded' in repr(json)
+
+    assert json.loads('[1]') == [1]
+    assert 'not loaded' not in repr(json)
+
+def test_missing_module_fails_on_use_only():
+    module = lazy_import('no_such_module_for_tests')
+
+    with pytest.raises(ImportError):
+        module.anything
+
+def test_collections_use_the_current_database(db):
+    models.jobs.insert_one({'title': 'Engineer'})
+
+    assert db['jobs'].count_documents({}) == 1
+    models.init_db('mongodb://localhost:27017/other_database')
+    assert models.jobs.count_documents({}) == 0
+
+def test_forked_process_opens_its_own_client(db, monkeypatch):
+    client = models._client
+    models.get_db()
+    assert models._client is client
+
+    monkeypatch.setattr(models.os, 'getpid', lambda: -1)
+    models.get_db()
+    assert models._client is not client
+
+def test_warm_up_continues_after_a_failed_step(monkeypatch):
+    steps = []
+
+    def fail():
+        raise RuntimeError('database unavailable')
+
+    monkeypatch.setattr(app_module, 'get_db', fail)
+    monkeypatch.setattr(app_module, 'get_job_index', lambda: steps.append('job index'))
+    monkeypatch.setattr(app_module, 'get_text_scorer', lambda: steps.append('text scorer'))
+    monkeypatch.setattr(app_module.parser_pool, 'warm_up', lambda: steps.append('parsers'))
+    monkeypatch.setattr(app_module.Config, 'GEMINI_API_KEY', None)
+
+    app_module.warm_up()
+
+    assert steps == ['job index', 'text scorer', 'parsers']
@@ -0,0 +1,126 @@
+import threading
+import time
+from config import Config
+from utils import nlp_analyzer
+from utils import suggestion_cache as suggestion_cache_module
+from utils.fake_llm import FakeGenerativeModel
+from utils.nlp_analyzer import DEFAULT_SUGGESTIONS, get_gemini_suggestions
+from utils.suggestion_cache import MongoSuggestionStore, SuggestionCache, make_suggestion_key
+
+RESUME = 'Python developer with Flask and SQL experience'
+JOB = 'Backend engineer building Python and Flask services'
+
+class Clock:
+    """Stand-in for time.monotonic that only moves when told to"""
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(suggestion_cache_module.time, 'monotonic', clock)
+    cache = SuggestionCache(ttl=60)
+    cache.set('key', ['Add metrics'])
+
+    clock.now += 59
+    assert cache.get('key') == ['Add metrics']
+    clock.now += 2
+    assert cache.get('key') is None
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SuggestionCache(max_entries=2)
+    cache.set('a', ['A'])
+    cache.set('b', ['B'])
+    cache.get('a')
+    cache.set('c', ['C'])
+
+    assert cache.get('a') == ['A']
+    assert cache.get('b') is None
+    assert cache.get('c') == ['C']
+
+def test_concurrent_requests_share_one_call():
+    cache = SuggestionCache()
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        started.set()
+        assert release.wait(5)
+        return ['Add metrics']
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute('key', compute, timeout=5)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    assert started.wait(5)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+    assert results == [['Add metrics']] * 5
+    assert cache.get_or_compute('key', compute) == ['Add metrics']
+    assert calls == [1]
+
+def test_missed_deadline_returns_the_fallback_and_caches_the_late_answer():
+    cache = SuggestionCache()
+    release = threading.Event()
+
+    def compute():
+        assert release.wait(5)
+        return ['Late answer']
+
+    assert cache.get_or_compute('key', compute, timeout=0.05, fallback=['Fallback']) == ['Fallback']
+    assert cache.timeouts == 1
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while cache.get('key') is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cache.get('key') == ['Late answer']
+
+def test_failed_call_returns_the_fallback_and_is_not_cached():
+    cache = SuggestionCache()
+
+    def compute():
+        raise RuntimeError('quota exceeded')
+
+    assert cache.get_or_compute('key', compute, fallback=['Fallback']) == ['Fallback']
+    assert cache.errors == 1
+    assert cache.get('key') is None
+
+def test_store_backs_the_in_memory_cache(db):
+    store = MongoSuggestionStore(db['suggestions'], ttl=60)
+    SuggestionCache(store=store).set('key', ['Add metrics'])
+
+    # Another process, with its own empty LRU
+    assert SuggestionCache(store=store).get('key') == ['Add metrics']
+
+def test_gemini_suggestions_are_cached(fake_model):
+    first = get_gemini_suggestions(RESUME, JOB, ['Python'], ['Docker'])
+    second = get_gemini_suggestions(RESUME, JOB, ['Python'], ['Docker'])
+
+    assert first == second == [f'Suggestion {number} from the fake model' for number in range(1, 6)]
+    assert fake_model.calls == 1
+    assert get_gemini_suggestions(RESUME, JOB, ['Python', 'Flask'], ['Docker']) == first
+    assert fake_model.calls == 2
+
+def test_slow_gemini_falls_back_to_static_suggestions(monkeypatch):
+    model = FakeGenerativeModel(delay=0.3)
+    monkeypatch.setattr(nlp_analyzer, '_gemini_model', model)
+    monkeypatch.setattr(Config, 'GEMINI_TIMEOUT', 0.05)
+
+    assert get_gemini_suggestions(RESUME, JOB, ['Python'], ['Rust']) == list(DEFAULT_SUGGESTIONS)
+
+def test_gemini_request_times_out_on_its_own(monkeypatch):
+    model = FakeGenerativeModel(delay=5)
+    monkeypatch.setattr(nlp_analyzer, '_gemini_model', model)
+    monkeypatch.setattr(Config, 'GEMINI_REQUEST_TIMEOUT', 0.05)
+
+    assert get_gemini_suggestions(RESUME, JOB, ['Python'], ['Kubernetes']) == list(DEFAULT_SUGGESTIONS)
+    assert nlp_analyzer.suggestion_cache.get(make_suggestion_key(RESUME, JOB, ['Python'], ['Kubernetes'])) is None
@@ -0,0 +1,138 @@
+import threading
+import pytest
+from config import Config
+from utils import nlp_analyzer
+from utils.fake_llm import FakeGenerativeModel
+from utils.prompt_builder import compact_resume, estimate_tokens
+from utils.suggestion_cache import SuggestionCache, suggestion_cache
+
+JOB = 'Backend engineer building Python and Flask services. ' * 200
+
+def make_items(count, words=3000):
+    return [(f'Resume {number} ' + 'python flask sql docker ' * (words // 4), ['Python'], ['Docker'])
+            for number in range(count)]
+
+class FailingModel(FakeGenerativeModel):
+    def generate_content(self, prompt, request_options=None):
+        super().generate_content(prompt, request_options)
+        raise RuntimeError('quota exceeded')
+
+@pytest.fixture
+def counters():
+    before = (suggestion_cache.hits, suggestion_cache.misses, suggestion_cache.timeouts, suggestion_cache.errors)
+    return lambda: tuple(now - then for now, then in zip(
+        (suggestion_cache.hits, suggestion_cache.misses, suggestion_cache.timeouts, suggestion_cache.errors), before))
+
+def test_batch_answers_go_back_to_their_resumes(fake_model):
+    items = make_items(3)
+
+    results = nlp_analyzer.get_gemini_suggestions_many(items, JOB)
+
+    assert fake_model.calls == 1
+    for number, suggestions in enumerate(results, 1):
+        assert len(suggestions) == 5
+        assert all(f'for resume {number} from the fake model' in suggestion for suggestion in suggestions)
+
+def test_prompts_are_compacted(fake_model):
+    items = make_items(3)
+    resume_text, matched_skills, missing_skills = items[0]
+    nlp_analyzer.get_gemini_suggestions(resume_text, JOB, matched_skills, missing_skills)
+    nlp_analyzer.get_gemini_suggestions_many(items[1:], JOB)
+
+    single, batched = fake_model.prompt_tokens
+    overhead = 300
+    assert estimate_tokens(items[0][0]) > Config.PROMPT_RESUME_TOKENS
+    assert single <= Config.PROMPT_RESUME_TOKENS + Config.PROMPT_JOB_TOKENS + overhead
+    # The job description is sent once for the whole batch
+    assert batched <= 2 * Config.PROMPT_RESUME_TOKENS + Config.PROMPT_JOB_TOKENS + overhead
+
+def test_oversized_paragraph_is_shortened_not_dropped():
+    resume = 'Built and ran Python services for payments. ' * 60
+
+    compacted = compact_resume(resume, 100)
+    assert compacted and resume.startswith(compacted)
+    assert estimate_tokens(compacted) <= 100
+
+def test_oversized_section_line_is_shortened_not_dropped():
+    summary = 'Backend engineer with ten years of Python, Flask and SQL experience. ' * 40
+    resume = f'Summary\n{summary}\nSkills\nPython, SQL'
+
+    compacted = compact_resume(resume, 120)
+    lines = compacted.split('\n')
+    assert lines[0] == 'Summary'
+    assert lines[1] and summary.startswith(lines[1])
+    assert lines[2:] == ['Skills', 'Python, SQL']
+    assert estimate_tokens(compacted) <= 120
+
+def test_cached_batch_is_not_requested_again(fake_model, counters):
+    items = make_items(3)
+    first = nlp_analyzer.get_gemini_suggestions_many(items, JOB)
+
+    second = nlp_analyzer.get_gemini_suggestions_many(items, JOB)
+
+    assert second == first
+    assert fake_model.calls == 1
+    assert counters()[:2] == (3, 3)
+
+def test_failed_batch_falls_back_without_single_requests(monkeypatch, counters):
+    model = FailingModel()
+    monkeypatch.setattr(nlp_analyzer, '_gemini_model', model)
+
+    results = nlp_analyzer.get_gemini_suggestions_many(make_items(4), JOB)
+
+    assert results == [nlp_analyzer.DEFAULT_SUGGESTIONS] * 4
+    assert model.calls == 1
+    assert counters() == (0, 4, 0, 4)
+
+def test_slow_batch_falls_back_at_the_deadline(monkeypatch, counters):
+    model = FakeGenerativeModel(delay=0.5)
+    monkeypatch.setattr(nlp_analyzer, '_gemini_model', model)
+    monkeypatch.setattr(Config, 'GEMINI_TIMEOUT', 0.1)
+    items = make_items(3)
+
+    assert nlp_analyzer.get_gemini_suggestions_many(items, JOB) == [nlp_analyzer.DEFAULT_SUGGESTIONS] * 3
+    assert counters()[2] == 3
+
+    # The answer still fills the cache for the next request
+    monkeypatch.setattr(Config, 'GEMINI_TIMEOUT', 5)
+    results = nlp_analyzer.get_gemini_suggestions_many(items, JOB)
+    assert 'Suggestion 1 for resume 2 from the fake model' in results[1]
+    assert model.calls == 1
+
+def test_concurrent_identical_batches_share_one_call(monkeypatch):
+    model = FakeGenerativeModel(delay=0.3)
+    monkeypatch.setattr(nlp_analyzer, '_gemini_model', model)
+    items = make_items(3)
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(nlp_analyzer.get_gemini_suggestions_many(items, JOB)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert model.calls == 1
+    assert len(results) == 4 and all(result == results[0] for result in results)
+
+def test_resume_left_out_of_a_batched_answer_is_requested_alone(monkeypatch):
+    answer = '\n\n'.join(f'Resume {number}:\n1. Answer for resume {number}' for number in (1, 2))
+    model = FakeGenerativeModel(response_text=answer)
+    monkeypatch.setattr(nlp_analyzer, '_gemini_model', model)
+
+    results = nlp_analyzer.get_gemini_suggestions_many(make_items(3), JOB)
+
+    assert results[:2] == [['Answer for resume 1'], ['Answer for resume 2']]
+    assert model.calls == 2
+
+def test_record_is_safe_across_threads():
+    cache = SuggestionCache()
+
+    threads = [threading.Thread(target=lambda: [cache.record(hits=1, errors=2) for _ in range(1000)])
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert (cache.hits, cache.misses, cache.errors) == (8000, 0, 16000)
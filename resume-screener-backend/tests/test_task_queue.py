@@ -0,0 +1,119 @@
+import threading
+import time
+import pytest
+from utils.task_queue import analysis_queue, PermanentTaskError, QueueFullError, TaskQueue
+
+class Updates:
+    """on_update callback recording every status update, with a way to wait for finished tasks"""
+    def __init__(self):
+        self.by_task = {}
+        self.finished = threading.Semaphore(0)
+
+    def __call__(self, task_id, fields):
+        self.by_task.setdefault(task_id, []).append(fields)
+        if fields.get('status') in ('completed', 'failed'):
+            self.finished.release()
+
+    def wait(self, count=1):
+        for _ in range(count):
+            assert self.finished.acquire(timeout=5)
+
+def test_task_result_and_progress_are_reported():
+    updates = Updates()
+    queue = TaskQueue(on_update=updates)
+
+    def task(text, report, state):
+        report(50, 'scoring')
+        return {'length': len(text)}
+
+    task_id = queue.submit(task, 'resume', task_id='task-1')
+    updates.wait()
+
+    assert task_id == 'task-1'
+    assert {'status': 'running', 'progress': 50, 'stage': 'scoring'} in updates.by_task['task-1']
+    assert updates.by_task['task-1'][-1] == {'status': 'completed', 'progress': 100, 'stage': 'done', 'length': 6}
+
+def test_failed_task_is_retried_with_its_state():
+    updates = Updates()
+    queue = TaskQueue(max_retries=2, retry_delay=0.01, on_update=updates)
+    attempts = []
+
+    def task(report, state):
+        attempts.append(dict(state))
+        state['parsed'] = True
+        if len(attempts) < 3:
+            raise RuntimeError('database unavailable')
+
+    task_id = queue.submit(task)
+    updates.wait()
+
+    assert attempts == [{}, {'parsed': True}, {'parsed': True}]
+    assert updates.by_task[task_id][-1]['status'] == 'completed'
+
+def test_task_fails_after_its_last_retry():
+    updates = Updates()
+    queue = TaskQueue(max_retries=1, retry_delay=0.01, on_update=updates)
+    attempts = []
+
+    def task(report, state):
+        attempts.append(1)
+        raise RuntimeError('database unavailable')
+
+    task_id = queue.submit(task)
+    updates.wait()
+
+    assert len(attempts) == 2
+    assert updates.by_task[task_id][-1] == {'status': 'failed', 'error': 'database unavailable'}
+
+def test_permanent_error_is_not_retried():
+    updates = Updates()
+    queue = TaskQueue(max_retries=3, retry_delay=0.01, on_update=updates)
+    attempts = []
+
+    def task(report, state):
+        attempts.append(1)
+        raise PermanentTaskError('unreadable file')
+
+    task_id = queue.submit(task)
+    updates.wait()
+
+    assert len(attempts) == 1
+    assert updates.by_task[task_id][-1]['status'] == 'failed'
+
+def test_full_queue_rejects_tasks_until_one_finishes():
+    updates = Updates()
+    queue = TaskQueue(max_workers=1, max_pending=2, on_update=updates)
+    release = threading.Event()
+
+    def task(report, state):
+        assert release.wait(5)
+
+    queue.submit(task)
+    queue.submit(task)
+    with pytest.raises(QueueFullError):
+        queue.submit(task)
+
+    release.set()
+    updates.wait(2)
+    # Slots are released just after the final update
+    for _ in range(50):
+        try:
+            queue.submit(lambda report, state: None)
+            break
+        except QueueFullError:
+            time.sleep(0.01)
+    else:
+        pytest.fail('the queue did not accept a task once the others finished')
+
+def test_upload_is_rejected_while_the_analysis_queue_is_full(client, monkeypatch):
+    job_id = client.post('/api/hr/job', json={'title': 'Engineer', 'company': 'Acme', 'description': 'Python',
+                                              'skills': ['Python']}).get_json()['job_id']
+
+    def full(*args, **kwargs):
+        raise QueueFullError('Task queue is full')
+
+    monkeypatch.setattr(analysis_queue, 'submit', full)
+    response = client.post('/api/candidate/upload', data={'job_id': job_id, 'text': 'Python developer'})
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '5'
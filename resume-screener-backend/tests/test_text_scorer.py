@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+from config import Config
+from utils.embedding_store import EmbeddingStore, hash_content
+from utils.text_scorer import create_text_scorer, EmbeddingScorer, HashingEncoder, TfidfScorer
+
+JOB = 'Backend engineer building Python and Flask services with SQL databases'
+RESUMES = [
+    'Python developer. Built Flask services and SQL databases.',
+    'Chef with ten years in busy kitchens. Menu planning, food safety.'
+]
+
+class CountingEncoder(HashingEncoder):
+    """HashingEncoder recording the texts of every encode call"""
+    def __init__(self, dimensions=64):
+        super().__init__(dimensions)
+        self.calls = []
+
+    def encode(self, texts):
+        self.calls.append(list(texts))
+        return super().encode(texts)
+
+def test_hashing_encoder_is_deterministic():
+    encoder = HashingEncoder(64)
+    first = encoder.encode(['Python developer', 'Python developer', 'Chef'])
+
+    assert first.shape == (3, 64) and first.dtype == np.float32
+    np.testing.assert_array_equal(first[0], first[1])
+    np.testing.assert_array_equal(HashingEncoder(64).encode(['Python developer'])[0], first[0])
+    assert not np.array_equal(first[0], first[2])
+
+def test_embedding_scorer_ranks_the_closer_resume_first():
+    scores = EmbeddingScorer(HashingEncoder(256)).score_many(RESUMES, JOB)
+
+    assert len(scores) == 2
+    assert 0 <= scores[1] < scores[0] <= 1
+
+def test_each_distinct_text_is_encoded_once(tmp_path):
+    encoder = CountingEncoder()
+    scorer = EmbeddingScorer(encoder, EmbeddingStore(str(tmp_path), encoder.dimensions), batch_size=2)
+
+    vectors = scorer.embed(['a b', 'c d', 'a b', 'e f'])
+    # Three distinct texts, in batches of two
+    assert encoder.calls == [['a b', 'c d'], ['e f']]
+    np.testing.assert_array_equal(vectors[0], vectors[2])
+    np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1, rtol=1e-6)
+
+    np.testing.assert_array_equal(scorer.embed(['e f', 'a b']), vectors[[3, 0]])
+    assert len(encoder.calls) == 2
+
+def test_stored_embeddings_survive_a_restart(tmp_path):
+    encoder = CountingEncoder()
+    vectors = EmbeddingScorer(encoder, EmbeddingStore(str(tmp_path), encoder.dimensions)).embed(RESUMES)
+
+    store = EmbeddingStore(str(tmp_path), encoder.dimensions)
+    stored, missing = store.get_many([hash_content(text) for text in RESUMES] + [hash_content('new')])
+    assert len(store) == 2
+    assert missing == [2]
+    np.testing.assert_array_equal(stored[:2], vectors)
+    assert not stored[2].any()
+
+def test_rows_written_by_another_process_are_found(tmp_path):
+    reader = EmbeddingStore(str(tmp_path), 4)
+    assert reader.get_many(['a'])[1] == [0]
+
+    EmbeddingStore(str(tmp_path), 4).put_many(['a', 'b'], np.eye(4, dtype=np.float32)[:2])
+
+    vectors, missing = reader.get_many(['b', 'a'])
+    assert missing == []
+    np.testing.assert_array_equal(vectors, np.eye(4, dtype=np.float32)[[1, 0]])
+
+def test_torn_append_is_dropped(tmp_path):
+    store = EmbeddingStore(str(tmp_path), 4)
+    store.put_many(['a'], np.ones((1, 4)))
+    # A vector row written without its key, as after a crash
+    with open(store.vectors_path, 'ab') as f:
+        f.write(np.full(4, 7, dtype=np.float32).tobytes())
+
+    store = EmbeddingStore(str(tmp_path), 4)
+    store.put_many(['b'], np.full((1, 4), 2))
+
+    vectors, missing = store.get_many(['a', 'b'])
+    assert missing == []
+    np.testing.assert_array_equal(vectors, [[1] * 4, [2] * 4])
+
+def test_score_features_uses_cached_embeddings_only(tmp_path):
+    encoder = CountingEncoder()
+    scorer = EmbeddingScorer(encoder, EmbeddingStore(str(tmp_path), encoder.dimensions))
+    expected = scorer.score_many(RESUMES[:1], JOB)
+
+    scores, missing = scorer.score_features([{'text_key': hash_content(text)} for text in RESUMES], JOB)
+
+    assert missing == [1]
+    np.testing.assert_allclose(scores, [expected[0], 0], rtol=1e-6)
+
+def test_create_text_scorer(monkeypatch, tmp_path):
+    monkeypatch.setattr(Config, 'EMBEDDING_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(Config, 'HASHING_DIMENSIONS', 32)
+
+    monkeypatch.setattr(Config, 'TEXT_SCORER', 'tfidf')
+    assert isinstance(create_text_scorer(Config), TfidfScorer)
+
+    monkeypatch.setattr(Config, 'TEXT_SCORER', 'hashing')
+    scorer = create_text_scorer(Config)
+    assert isinstance(scorer, EmbeddingScorer)
+    assert scorer.store.directory == str(tmp_path / 'hashing-32')
+
+    monkeypatch.setattr(Config, 'TEXT_SCORER', 'bm25')
+    with pytest.raises(ValueError):
+        create_text_scorer(Config)
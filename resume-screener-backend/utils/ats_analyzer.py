@@ -0,0 +1,150 @@
+from itertools import islice
+import re
+
+# ATS rules, checked in order. Each rule is one of:
+#   present    - penalize if the rule matches
+#   absent     - penalize if the rule does not match
+#   count      - penalize if the patterns match more than 'threshold' times
+#   word_count - penalize if the resume has more than 'threshold' words
+#
+# Presence rules give either 'patterns' (regexes searched on their own) or
+# 'markers', (first character class, rest of pattern) pairs. Markers of all
+# rules are found together in one scan that skips ahead to their first
+# characters, so cheap checks for rare characters do not add passes.
+ATS_RULES = [
+    {
+        'name': 'tables',
+        'kind': 'present',
+        'markers': [(r'[\|\t]', r'[\|\t]+'), (r'\+', r'[-+]+\+'), ('┌', '[─┬]+┐'), ('╔', '[═╦]+╗')],
+        'penalty': 15,
+        'issue': "Detected possible table structures which may not parse correctly in ATS systems"
+    },
+    {
+        'name': 'headers_footers',
+        'kind': 'present',
+        'markers': [('P', r'age \d+ of \d+'), (r'\d', r'\d*/\d+')],
+        'penalty': 5,
+        'issue': "Detected possible headers or footers which may interfere with ATS parsing"
+    },
+    {
+        'name': 'standard_headings',
+        'kind': 'absent',
+        'patterns': [r'\b(?:experience|education|skills|summary|objective|projects|certifications)\b'],
+        'ignore_case': True,
+        'penalty': 10,
+        'issue': "No standard section headings detected (like 'Experience', 'Education', 'Skills')"
+    },
+    {
+        'name': 'acronyms',
+        'kind': 'count',
+        'patterns': [r'\b[A-Z]{2,}\b'],
+        'threshold': 10,
+        'penalty': 5,
+        'issue': "Excessive use of acronyms may reduce ATS score"
+    },
+    {
+        'name': 'length',
+        'kind': 'word_count',
+        'threshold': 1000,
+        'penalty': 5,
+        'issue': "Resume is quite long, consider making it more concise"
+    }
+]
+
+class ATSAnalyzer:
+    """
+    Scores the ATS friendliness of a resume against a declarative rule set.
+
+    Rules are compiled once. Marker rules share a single scan of the text,
+    and every other rule stops at the first match that decides it: the
+    first heading found, the acronym past the threshold, or the word past
+    the length limit. Long resumes are therefore scanned in full only once.
+    """
+    def __init__(self, rules=ATS_RULES):
+        self.rules = rules
+        self._checks = {}
+
+        marker_groups = []
+        first_chars = []
+        for rule in rules:
+            name = rule['name']
+            flags = re.IGNORECASE if rule.get('ignore_case') else 0
+
+            if 'markers' in rule:
+                branches = []
+                for first, rest in rule['markers']:
+                    first_chars.append(first)
+                    branches.append(f'(?<={first}){rest}')
+                marker_groups.append(f'(?P<{name}>' + '|'.join(branches) + ')')
+            elif rule['kind'] == 'word_count':
+                # Matches only if there are more than 'threshold' words
+                self._checks[name] = re.compile(r'\s*(?:\S+\s+){%d}\S' % rule['threshold'])
+            else:
+                self._checks[name] = re.compile('|'.join(rule['patterns']), flags)
+
+        # Consume one of the first characters, then dispatch on it with lookbehinds.
+        # A leading character class lets the regex engine skip ahead quickly.
+        self._marker_pattern = None
+        if marker_groups:
+            self._marker_pattern = re.compile(
+                '(?:' + '|'.join(first_chars) + ')(?:' + '|'.join(marker_groups) + ')'
+            )
+
+    def collect(self, resume_text):
+        """
+        Check every rule and return a dict of rule name to whether it matched
+        (presence rules) or went past its threshold (count rules)
+        """
+        signals = {}
+
+        marker_rules = {rule['name'] for rule in self.rules if 'markers' in rule}
+        for rule in self.rules:
+            if rule['name'] in marker_rules:
+                signals[rule['name']] = False
+
+        if self._marker_pattern is not None:
+            pending = set(marker_rules)
+            for match in self._marker_pattern.finditer(resume_text):
+                signals[match.lastgroup] = True
+                pending.discard(match.lastgroup)
+                if not pending:
+                    break
+
+        for rule in self.rules:
+            name = rule['name']
+            if name in marker_rules:
+                continue
+
+            check = self._checks[name]
+            if rule['kind'] == 'count':
+                matches = islice(check.finditer(resume_text), rule['threshold'] + 1)
+                signals[name] = sum(1 for _ in matches) > rule['threshold']
+            elif rule['kind'] == 'word_count':
+                signals[name] = check.match(resume_text) is not None
+            else:
+                signals[name] = check.search(resume_text) is not None
+
+        return signals
+
+    def analyze(self, resume_text):
+        """
+        Analyze ATS friendliness of resume, returning (score, issues)
+        """
+        signals = self.collect(resume_text)
+
+        score = 100  # Start with perfect score
+        issues = []
+        for rule in self.rules:
+            signal = signals[rule['name']]
+            failed = not signal if rule['kind'] == 'absent' else signal
+
+            if failed:
+                score -= rule['penalty']
+                issues.append(rule['issue'])
+
+        # Ensure score is between 0 and 100
+        score = max(0, min(100, score))
+
+        return score, issues
+
+ats_analyzer = ATSAnalyzer()
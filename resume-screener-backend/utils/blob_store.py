@@ -0,0 +1,76 @@
+from concurrent.futures import ThreadPoolExecutor
+from models import get_blob, save_blob_text
+from utils.parser_pool import parser_pool, parse_document, ParseResult, PARSE_OK
+from utils.metrics import timed, record_stage
+import hashlib
+import os
+import uuid
+
+# Bytes read at a time while hashing an upload
+CHUNK_SIZE = 64 * 1024
+
+def hash_text(text):
+    """
+    Content hash of pasted resume text
+    """
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def save_blob(stream, upload_folder, extension):
+    """
+    Save an uploaded stream under its SHA-256 and return (digest, file_path).
+
+    The content is hashed while it is written to a temporary file, which is
+    then moved to <digest>.<extension>. Identical bytes map to one file.
+    """
+    digest = hashlib.sha256()
+    temp_path = os.path.join(upload_folder, f'.upload-{uuid.uuid4().hex}')
+
+    try:
+        with open(temp_path, 'wb') as f:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                f.write(chunk)
+
+        resume_hash = digest.hexdigest()
+        file_path = os.path.join(upload_folder, f'{resume_hash}.{extension}')
+        if os.path.exists(file_path):
+            os.remove(temp_path)
+        else:
+            os.replace(temp_path, file_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    return resume_hash, file_path
+
+def parse_blob(resume_hash, file_path):
+    """
+    Parse a stored file in the parser pool, reusing the text cached for
+    identical content. Returns a ParseResult; failures are not cached.
+    """
+    blob = get_blob(resume_hash)
+    if blob and blob.get('resume_text') is not None:
+        return ParseResult(PARSE_OK, text=blob['resume_text'])
+
+    with timed('parse'):
+        result = parse_document(file_path)
+    # Time spent waiting for a free parser, apart from parsing itself
+    record_stage('parse_wait', result.waited)
+    if result.ok:
+        save_blob_text(resume_hash, file_path, result.text)
+    return result
+
+def parse_blobs(entries):
+    """
+    Parse a batch of stored files, given as (resume_hash, file_path), with
+    as many running at once as the parser pool allows. Returns a
+    ParseResult for each entry, in order.
+    """
+    if len(entries) < 2:
+        return [parse_blob(resume_hash, file_path) for resume_hash, file_path in entries]
+    with ThreadPoolExecutor(max_workers=min(parser_pool.max_workers, len(entries))) as executor:
+        return list(executor.map(lambda entry: parse_blob(*entry), entries))
@@ -0,0 +1,121 @@
+import fcntl
+import hashlib
+import os
+import threading
+from utils.lazy import lazy_import
+
+# Loaded on first use to keep app startup fast
+np = lazy_import('numpy')
+
+def hash_content(text):
+    """
+    Cache key of a text: the SHA-256 of its UTF-8 bytes
+    """
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+class EmbeddingStore:
+    """
+    Append-only float32 vector cache keyed by content hash.
+
+    Vectors are stored as raw float32 rows in vectors.f32 and their keys,
+    one per line, in keys.txt; row i of the vector file belongs to line i.
+    Appends take an exclusive file lock, so several worker processes can
+    share one directory, and rows written by other processes are picked up
+    on the next lookup. Vectors are read through a memory map, so the cache
+    does not have to fit in memory.
+    """
+    def __init__(self, directory, dimensions):
+        self.directory = directory
+        self.dimensions = dimensions
+        self.vectors_path = os.path.join(directory, 'vectors.f32')
+        self.keys_path = os.path.join(directory, 'keys.txt')
+        self._rows = {}
+        self._keys_offset = 0
+        self._vectors = None
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def row_bytes(self):
+        return self.dimensions * 4
+
+    def __len__(self):
+        with self._lock:
+            return len(self._rows)
+
+    def _read_new_keys(self):
+        """Index keys appended since the last read, including by other processes"""
+        if not os.path.exists(self.keys_path):
+            return
+        with open(self.keys_path, 'rb') as f:
+            f.seek(self._keys_offset)
+            data = f.read()
+
+        # Only whole lines; a partial line is finished by its writer under the lock
+        end = data.rfind(b'\n') + 1
+        for key in data[:end].decode('ascii').splitlines():
+            self._rows.setdefault(key, len(self._rows))
+        self._keys_offset += end
+
+    def _recover(self):
+        """Drop vector rows whose key was never written, e.g. after a crash"""
+        expected = len(self._rows) * self.row_bytes
+        if os.path.exists(self.vectors_path) and os.path.getsize(self.vectors_path) > expected:
+            with open(self.vectors_path, 'r+b') as f:
+                f.truncate(expected)
+
+    def _map(self):
+        if self._vectors is None or len(self._vectors) < len(self._rows):
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode='r',
+                                      shape=(len(self._rows), self.dimensions))
+        return self._vectors
+
+    def get_many(self, keys):
+        """
+        Return (vectors, missing): a float32 array with a row per key, where
+        rows of keys not in the cache are zero, and the indices of those keys
+        """
+        vectors = np.zeros((len(keys), self.dimensions), dtype=np.float32)
+        with self._lock:
+            if any(key not in self._rows for key in keys):
+                self._read_new_keys()
+
+            found = [(i, self._rows[key]) for i, key in enumerate(keys) if key in self._rows]
+            if found:
+                positions, rows = zip(*found)
+                vectors[list(positions)] = self._map()[list(rows)]
+
+        found_positions = {position for position, _ in found}
+        missing = [i for i in range(len(keys)) if i not in found_positions]
+        return vectors, missing
+
+    def put_many(self, keys, vectors):
+        """
+        Append vectors for keys not already cached
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            with open(self.keys_path, 'ab') as keys_file:
+                fcntl.flock(keys_file, fcntl.LOCK_EX)
+                try:
+                    self._read_new_keys()
+                    self._recover()
+
+                    new_rows, new_keys = [], []
+                    for key, vector in zip(keys, vectors):
+                        if key not in self._rows and key not in new_keys:
+                            new_keys.append(key)
+                            new_rows.append(vector)
+                    if not new_keys:
+                        return
+
+                    # Vectors first, so a key never points past the end of the vector file
+                    with open(self.vectors_path, 'ab') as vectors_file:
+                        vectors_file.write(np.stack(new_rows).tobytes())
+                        vectors_file.flush()
+                        os.fsync(vectors_file.fileno())
+                    keys_file.write(''.join(f'{key}\n' for key in new_keys).encode('ascii'))
+                    keys_file.flush()
+                    self._read_new_keys()
+                finally:
+                    fcntl.flock(keys_file, fcntl.LOCK_UN)
@@ -0,0 +1,57 @@
+import threading
+import time
+from utils.prompt_builder import count_batch_resumes, estimate_tokens
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+class FakeGenerativeModel:
+    """
+    Stand-in for genai.GenerativeModel in tests and offline development.
+
+    Answers every prompt with a fixed numbered list after an optional delay,
+    and records the prompts it received. Batched prompts (see
+    utils.prompt_builder) get one numbered list per resume, each headed
+    'Resume N:', unless response_text is given. A delay longer than the
+    request timeout in request_options fails like a timed-out request.
+    """
+    def __init__(self, response_text=None, delay=0.0):
+        self.response_text = response_text
+        self.delay = delay
+        self.prompts = []
+        self._lock = threading.Lock()
+
+    @property
+    def calls(self):
+        return len(self.prompts)
+
+    @property
+    def prompt_tokens(self):
+        """Estimated size of each prompt received, in tokens"""
+        with self._lock:
+            return [estimate_tokens(prompt) for prompt in self.prompts]
+
+    def respond(self, prompt):
+        if self.response_text is not None:
+            return self.response_text
+        suggestions = '\n'.join(f"{number}. Suggestion {number} from the fake model" for number in range(1, 6))
+        resumes = count_batch_resumes(prompt)
+        if not resumes:
+            return suggestions
+        return '\n\n'.join(
+            f"Resume {resume}:\n" + suggestions.replace('from the fake model', f'for resume {resume} from the fake model')
+            for resume in range(1, resumes + 1)
+        )
+
+    def generate_content(self, prompt, request_options=None):
+        with self._lock:
+            self.prompts.append(prompt)
+        timeout = (request_options or {}).get('timeout')
+        if timeout is not None and self.delay > timeout:
+            # Like the real client when the request timeout expires
+            time.sleep(timeout)
+            raise TimeoutError(f'Request timed out after {timeout}s')
+        if self.delay:
+            time.sleep(self.delay)
+        return FakeResponse(self.respond(prompt))
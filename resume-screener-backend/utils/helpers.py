@@ -1,5 +1,5 @@
 
-from flask import jsonify, request
+from flask import jsonify, request, current_app
 from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
 from functools import wraps
 
@@ -19,3 +19,20 @@ def role_required(role):
             return fn(*args, **kwargs)
         return decorator
     return wrapper
+
+def allowed_file(filename):
+    """
+    Check if a file has one of the allowed resume extensions
+    """
+    return '.' in filename and \
+           filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
+
+def get_file_size(file):
+    """
+    Get the size in bytes of an uploaded file without reading it into memory
+    """
+    position = file.stream.tell()
+    file.stream.seek(0, 2)
+    size = file.stream.tell()
+    file.stream.seek(position)
+    return size
@@ -0,0 +1,96 @@
+import hashlib
+import threading
+import time
+from flask import current_app, request
+from models import get_jobs_version
+
+class JobCache:
+    """
+    Per-process cache of serialized job responses with strong ETags.
+
+    Every job write bumps a version document in Mongo (see save_job). The
+    cache reads that version at most every check_interval seconds and drops
+    its entries when it changes, so writes made by other workers are picked
+    up within check_interval.
+    """
+    def __init__(self, check_interval=1.0):
+        self.check_interval = check_interval
+        self._entries = {}
+        self._version = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def configure(self, check_interval=None):
+        if check_interval is not None:
+            self.check_interval = check_interval
+
+    def _refresh(self):
+        """Drop the entries if the shared job version changed"""
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return
+        try:
+            version = get_jobs_version()
+        except Exception as e:
+            print(f"Error reading job version: {e}")
+            return
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            self._checked_at = now
+
+    def get(self, key, load):
+        """
+        Return (etag, body) for key, encoding load() on a miss.
+        Returns None, without caching, if load() returns None.
+        """
+        self._refresh()
+        with self._lock:
+            version = self._version
+            entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        self.misses += 1
+
+        value = load()
+        if value is None:
+            return None
+        body = current_app.json.dumps(value).encode('utf-8')
+        entry = (hashlib.blake2b(body, digest_size=16).hexdigest(), body)
+        with self._lock:
+            # Not stored if the version changed while loading
+            if version == self._version:
+                self._entries[key] = entry
+        return entry
+
+    def response(self, key, load):
+        """
+        JSON response for key with a strong ETag, or 304 if the request's
+        If-None-Match matches. Returns None if load() returns None.
+        """
+        entry = self.get(key, load)
+        if entry is None:
+            return None
+        etag, body = entry
+        response = current_app.response_class(body, mimetype=current_app.json.mimetype)
+        response.set_etag(etag)
+        # Let clients cache but always revalidate
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
+
+    def invalidate(self):
+        """Check the shared version on the next lookup, e.g. after a local write"""
+        with self._lock:
+            self._checked_at = None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+            self._checked_at = None
+
+job_cache = JobCache()
@@ -0,0 +1,779 @@
+from config import Config
+from models import get_all_jobs, get_jobs_version, get_recent_resume_texts
+from utils.embedding_store import hash_content
+from utils.lazy import lazy_import
+from utils.skill_matcher import SkillMatcher, get_skill_matcher
+from collections import Counter
+from itertools import chain
+import fcntl
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+
+# Loaded on first use to keep app startup fast
+np = lazy_import('numpy')
+sparse = lazy_import('scipy.sparse')
+sklearn_text = lazy_import('sklearn.feature_extraction.text')
+
+# Refit once the corpus has grown by this fraction since the last fit
+REFIT_RATIO = 0.25
+
+# Upper bound on the number of resumes kept in the fitting corpus
+MAX_RESUME_DOCS = 10000
+
+# Jobs missing from a state whose projected vectors it keeps, e.g. jobs
+# added by another worker since the state was loaded
+MAX_PROJECTED_JOBS = 1000
+
+# Tokens as TfidfVectorizer finds them with its default token_pattern
+TOKEN_PATTERN = re.compile(r'(?u)\b\w\w+\b')
+
+def build_skill_matrix(job_skills):
+    """
+    Build a jobs x skills count matrix from the skill list of every job.
+    Skills are compared case-insensitively, like extract_skills_from_text.
+    """
+    skill_columns = {}
+    rows, columns = [], []
+    for row, skills in enumerate(job_skills):
+        for skill in skills:
+            rows.append(row)
+            columns.append(skill_columns.setdefault(skill.lower(), len(skill_columns)))
+
+    skill_matrix = sparse.csr_matrix(
+        (np.ones(len(rows)), (rows, columns)),
+        shape=(len(job_skills), len(skill_columns))
+    )
+    return list(skill_columns), skill_matrix
+
+def normalize_rows(matrix):
+    """
+    L2-normalize the rows of a CSR matrix in place, like
+    sklearn.preprocessing.normalize; all-zero rows are left as they are
+    """
+    rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+    norms = np.sqrt(np.bincount(rows, weights=matrix.data * matrix.data, minlength=matrix.shape[0]))
+    norms[norms == 0] = 1.0
+    matrix.data /= norms[rows]
+    return matrix
+
+class _Vocabulary:
+    """
+    Fitted TF-IDF vocabulary: the terms as a sorted array of UTF-8 strings
+    and their idf weights. Both can be memory-mapped from a snapshot, and
+    terms are looked up by binary search, so no process holds a dict of
+    the vocabulary. Transforms like TfidfVectorizer.transform with its
+    default settings, without importing scikit-learn.
+    """
+    def __init__(self, terms, idf):
+        self.terms = terms
+        self.idf = idf
+
+    @classmethod
+    def from_vectorizer(cls, vectorizer):
+        terms = np.array([term.encode('utf-8') for term in vectorizer.get_feature_names_out()])
+        order = np.argsort(terms, kind='stable')
+        return cls(terms[order], vectorizer.idf_[order])
+
+    def __len__(self):
+        return len(self.terms)
+
+    def columns(self, terms):
+        """
+        Column of each term, or -1 for terms not in the vocabulary
+        """
+        if not terms:
+            return np.zeros(0, dtype=np.int64)
+        width = self.terms.dtype.itemsize
+        # Longer terms cannot be in the vocabulary, and would be truncated by the array
+        keys = np.array([term if len(term) <= width else b'' for term in (t.encode('utf-8') for t in terms)],
+                        dtype=self.terms.dtype)
+        positions = np.minimum(np.searchsorted(self.terms, keys), len(self.terms) - 1)
+        return np.where((self.terms[positions] == keys) & (keys != b''), positions, -1)
+
+    def term_matrix(self, terms_per_row, counts_per_row):
+        """
+        L2-normalized TF-IDF rows from the distinct terms of each row and
+        their counts; terms outside the vocabulary are dropped
+        """
+        lengths = np.fromiter((len(terms) for terms in terms_per_row), dtype=np.int64, count=len(terms_per_row))
+        terms = list(chain.from_iterable(terms_per_row))
+        counts = np.fromiter(chain.from_iterable(counts_per_row), dtype=np.float64, count=len(terms))
+        columns = self.columns(terms)
+        rows = np.repeat(np.arange(len(terms_per_row)), lengths)
+
+        known = columns >= 0
+        columns = columns[known]
+        matrix = sparse.csr_matrix(
+            (counts[known] * self.idf[columns], (rows[known], columns)),
+            shape=(len(terms_per_row), len(self))
+        )
+        return normalize_rows(matrix)
+
+    def transform(self, processed_texts):
+        """
+        Transform preprocessed texts into L2-normalized TF-IDF rows
+        """
+        counters = [Counter(TOKEN_PATTERN.findall(text.lower())) for text in processed_texts]
+        return self.term_matrix([list(counter) for counter in counters],
+                                [list(counter.values()) for counter in counters])
+
+class _IndexState:
+    """
+    Immutable snapshot of a fitted index, swapped in atomically on refit.
+    Its arrays are in memory after a fit, or memory-mapped from a snapshot
+    directory (name) that every worker process shares.
+    """
+    def __init__(self, vocabulary, job_ids, job_matrix, job_keys, job_skills, doc_count,
+                 skill_tables=None, name=None, overlay=None):
+        self.vocabulary = vocabulary
+        self.job_ids = job_ids
+        self.job_rows = {job_id: row for row, job_id in enumerate(job_ids)}
+        self.job_matrix = job_matrix
+        # Jobs added or replaced since job_matrix was built, which stays as it
+        # was mapped: vectors of replaced rows by row, and the rows past its end
+        self.replaced_rows, self.added_matrix = overlay or ({}, sparse.csr_matrix((0, len(vocabulary))))
+        # Content hash of the preprocessed description each job vector was built from
+        self.job_keys = job_keys
+        self.job_skills = job_skills
+        self.doc_count = doc_count
+        self.name = name
+        if skill_tables is None:
+            skill_vocabulary, skill_matrix = build_skill_matrix(job_skills)
+            skill_tables = (skill_vocabulary, skill_matrix, get_skill_matcher(skill_vocabulary))
+        self.skill_vocabulary, self.skill_matrix, self.skill_matcher = skill_tables
+        self.skill_counts = np.asarray(self.skill_matrix.sum(axis=1)).ravel()
+        # Vectors of job descriptions not in this state, by content hash
+        self.projected = {}
+
+    def with_job(self, job_id, processed_job, skills):
+        """
+        A copy with job_id added or replaced, projected onto this vocabulary.
+        The vector goes into the overlay, so job_matrix is never copied.
+        """
+        vector = self.vocabulary.transform([processed_job])
+        job_ids = list(self.job_ids)
+        job_keys = list(self.job_keys)
+        job_skills = list(self.job_skills)
+        replaced_rows = dict(self.replaced_rows)
+        added_matrix = self.added_matrix
+        base_count = self.job_matrix.shape[0]
+        if job_id in self.job_rows:
+            row = self.job_rows[job_id]
+            if row < base_count:
+                replaced_rows[row] = vector
+            else:
+                added_row = row - base_count
+                added_matrix = sparse.vstack([added_matrix[:added_row], vector, added_matrix[added_row + 1:]],
+                                             format='csr')
+            job_keys[row] = hash_content(processed_job)
+            job_skills[row] = list(skills)
+        else:
+            job_ids.append(job_id)
+            added_matrix = sparse.vstack([added_matrix, vector], format='csr')
+            job_keys.append(hash_content(processed_job))
+            job_skills.append(list(skills))
+        return _IndexState(self.vocabulary, job_ids, self.job_matrix, job_keys, job_skills, self.doc_count,
+                           name=self.name, overlay=(replaced_rows, added_matrix))
+
+    def job_vector(self, row):
+        """
+        The vector of the job in row, from the overlay if it was added or replaced
+        """
+        if row in self.replaced_rows:
+            return self.replaced_rows[row]
+        base_count = self.job_matrix.shape[0]
+        if row >= base_count:
+            return self.added_matrix[row - base_count]
+        return self.job_matrix[row]
+
+    def job_scores(self, vector):
+        """
+        Dot product of every job vector with one row vector, in job order
+        """
+        scores = (self.job_matrix @ vector.T).toarray().ravel()
+        if self.added_matrix.shape[0]:
+            scores = np.concatenate([scores, (self.added_matrix @ vector.T).toarray().ravel()])
+        for row, job_vector in self.replaced_rows.items():
+            scores[row] = (job_vector @ vector.T).toarray()[0, 0]
+        return scores
+
+    def full_job_matrix(self):
+        """
+        job_matrix with the overlay applied, e.g. to write a snapshot
+        """
+        if not self.replaced_rows and not self.added_matrix.shape[0]:
+            return self.job_matrix
+        blocks, start = [], 0
+        for row in sorted(self.replaced_rows):
+            blocks += [self.job_matrix[start:row], self.replaced_rows[row]]
+            start = row + 1
+        blocks += [self.job_matrix[start:], self.added_matrix]
+        return sparse.vstack(blocks, format='csr')
+
+def fit_vectorizer(corpus):
+    """
+    Fit a TfidfVectorizer on corpus, or return None if it has no vocabulary
+    """
+    if not corpus:
+        return None
+    vectorizer = sklearn_text.TfidfVectorizer()
+    try:
+        return vectorizer.fit(corpus)
+    except ValueError:
+        # Empty vocabulary, e.g. only stop words or blank documents
+        return None
+
+def build_state(vectorizer, job_ids, job_texts, job_skills, doc_count):
+    """
+    Index state for preprocessed job texts on the vocabulary of a fitted vectorizer
+    """
+    vocabulary = _Vocabulary.from_vectorizer(vectorizer)
+    return _IndexState(vocabulary, job_ids, vocabulary.transform(job_texts),
+                       [hash_content(text) for text in job_texts], job_skills, doc_count)
+
+def _save_csr(path, prefix, matrix):
+    # 32-bit indices, so scipy uses the mapped arrays without converting them
+    np.save(os.path.join(path, f'{prefix}_data.npy'), matrix.data)
+    np.save(os.path.join(path, f'{prefix}_indices.npy'), matrix.indices.astype(np.int32))
+    np.save(os.path.join(path, f'{prefix}_indptr.npy'), matrix.indptr.astype(np.int32))
+
+def _load_csr(path, prefix, shape):
+    arrays = [np.load(os.path.join(path, f'{prefix}_{part}.npy'), mmap_mode='r') for part in ('data', 'indices', 'indptr')]
+    return sparse.csr_matrix(tuple(arrays), shape=shape)
+
+def read_current(directory):
+    """
+    Name of the current snapshot in directory, or None if there is none
+    """
+    current = os.path.join(directory, 'CURRENT')
+    if not os.path.exists(current):
+        return None
+    with open(current) as f:
+        return f.read().strip()
+
+def snapshot_jobs_version(name):
+    """
+    Jobs version a snapshot was built at, from its name
+    """
+    return int(name.split('-')[1])
+
+def save_snapshot(directory, state, jobs_version):
+    """
+    Write state to a new snapshot directory named after jobs_version,
+    switch CURRENT to it and remove snapshots older than the one it
+    replaces, which other processes may still have mapped
+    """
+    name = f'snapshot-{jobs_version}-{uuid.uuid4().hex}'
+    path = os.path.join(directory, name)
+    os.makedirs(path)
+    np.save(os.path.join(path, 'terms.npy'), state.vocabulary.terms)
+    np.save(os.path.join(path, 'idf.npy'), state.vocabulary.idf)
+    _save_csr(path, 'jobs', state.full_job_matrix())
+    _save_csr(path, 'skills', state.skill_matrix)
+    skill_trie, skill_overlaps = state.skill_matcher.tables()
+    meta = {
+        'jobs_version': jobs_version,
+        'doc_count': state.doc_count,
+        'job_ids': state.job_ids,
+        'job_keys': state.job_keys,
+        'job_skills': state.job_skills,
+        'skill_vocabulary': state.skill_vocabulary,
+        'skill_trie': skill_trie,
+        'skill_overlaps': skill_overlaps
+    }
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+
+    # Switch atomically, then remove older snapshots
+    previous = read_current(directory)
+    current = os.path.join(directory, 'CURRENT')
+    temp = f'{current}.{uuid.uuid4().hex}'
+    with open(temp, 'w') as f:
+        f.write(name)
+    os.replace(temp, current)
+    for entry in os.listdir(directory):
+        if entry.startswith('snapshot-') and entry not in (name, previous):
+            shutil.rmtree(os.path.join(directory, entry), ignore_errors=True)
+    return name
+
+def load_snapshot(directory, name):
+    """
+    Open a snapshot with its arrays memory-mapped read-only, so their pages
+    are shared through the OS cache by every process that opens it
+    """
+    path = os.path.join(directory, name)
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+
+    vocabulary = _Vocabulary(np.load(os.path.join(path, 'terms.npy'), mmap_mode='r'),
+                             np.load(os.path.join(path, 'idf.npy'), mmap_mode='r'))
+    job_ids = meta['job_ids']
+    skill_vocabulary = meta['skill_vocabulary']
+    skill_tables = (
+        skill_vocabulary,
+        _load_csr(path, 'skills', (len(job_ids), len(skill_vocabulary))),
+        SkillMatcher(skill_vocabulary, (meta['skill_trie'], meta['skill_overlaps']))
+    )
+    return _IndexState(vocabulary, job_ids, _load_csr(path, 'jobs', (len(job_ids), len(vocabulary))),
+                       meta['job_keys'], meta['job_skills'], meta['doc_count'], skill_tables, name)
+
+class JobIndex:
+    """
+    Corpus-level TF-IDF model with a precomputed vector for every job.
+
+    The vectorizer is fitted on all job descriptions plus the resumes seen so
+    far, so scoring a resume against a job is one transform and one sparse
+    dot product. New documents are added to the corpus and trigger a refit in
+    the background once the corpus has grown by REFIT_RATIO.
+
+    The index also keeps a jobs x skills matrix, so one resume can be ranked
+    against every job with two matrix-vector products.
+
+    With a directory, the fitted index is a snapshot on disk (see
+    save_snapshot) that every worker process memory-maps instead of fitting
+    its own copy. Refits rebuild the snapshot from the database, one process
+    at a time, and switch CURRENT to it; other processes pick it up within
+    check_interval seconds. Jobs added in this process are projected onto
+    the mapped vocabulary until a snapshot includes them.
+    """
+    def __init__(self, refit_ratio=REFIT_RATIO, max_resume_docs=MAX_RESUME_DOCS, directory=None,
+                 check_interval=5.0):
+        self.refit_ratio = refit_ratio
+        self.max_resume_docs = max_resume_docs
+        self.directory = directory
+        self.check_interval = check_interval
+        self.loaded = False
+        self._lock = threading.RLock()
+        self._job_texts = {}
+        self._job_skills = {}
+        self._resume_texts = []
+        self._local_jobs = {}
+        self._pending = 0
+        self._refitting = False
+        self._rebuild_requested = False
+        self._last_check = 0.0
+        self._state = None
+
+    def fit(self, jobs, resume_texts=()):
+        """
+        Fit the index in memory on a list of job documents and preprocessed resume texts
+        """
+        from utils.nlp_analyzer import preprocess_text
+
+        with self._lock:
+            self._job_texts = {
+                str(job['_id']): preprocess_text(job.get('description', ''))
+                for job in jobs
+            }
+            self._job_skills = {str(job['_id']): list(job.get('skills', [])) for job in jobs}
+            self._resume_texts = list(resume_texts)[-self.max_resume_docs:]
+            self._refit()
+            self.loaded = True
+
+    def _refit(self):
+        """
+        Rebuild the vectorizer and job matrix from the current corpus
+        """
+        with self._lock:
+            job_texts = dict(self._job_texts)
+            corpus = list(job_texts.values()) + self._resume_texts
+            self._pending = 0
+
+        vectorizer = fit_vectorizer(corpus)
+
+        with self._lock:
+            if vectorizer is None:
+                self._state = None
+                return
+
+            # Jobs may have been added or edited while fitting
+            job_ids = list(self._job_texts)
+            self._state = build_state(
+                vectorizer,
+                job_ids,
+                [self._job_texts[job_id] for job_id in job_ids],
+                [self._job_skills.get(job_id, []) for job_id in job_ids],
+                len(corpus)
+            )
+
+    def _refit_in_background(self):
+        def run():
+            try:
+                self._refit()
+            except Exception as e:
+                print(f"Error refitting job index: {e}")
+            finally:
+                self._refitting = False
+
+        self._refitting = True
+        threading.Thread(target=run, daemon=True).start()
+
+    def open(self):
+        """
+        Map the current snapshot of the index directory; returns False if
+        there is none yet
+        """
+        name = read_current(self.directory)
+        if name is None:
+            return False
+        state = load_snapshot(self.directory, name)
+
+        with self._lock:
+            # Keep jobs added here that the snapshot does not include yet
+            for job_id, (processed_job, skills) in list(self._local_jobs.items()):
+                row = state.job_rows.get(job_id)
+                if row is not None and state.job_keys[row] == hash_content(processed_job):
+                    del self._local_jobs[job_id]
+                else:
+                    state = state.with_job(job_id, processed_job, skills)
+            self._state = state
+            self._pending = 0
+            self._last_check = time.monotonic()
+            self.loaded = True
+        return True
+
+    def rebuild(self, since=None):
+        """
+        Fit a new snapshot on the jobs and recent resumes in the database
+        and switch to it. Builds are serialized across processes with a file
+        lock; the build is skipped if another process switched away from
+        since (the snapshot the rebuild was requested against) to a snapshot
+        of the current job catalogue.
+        """
+        from utils.nlp_analyzer import preprocess_text
+
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, 'build.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                # Read first, so a job saved during the build triggers another one
+                jobs_version = get_jobs_version()
+                current = read_current(self.directory)
+                if current is None or current == since or snapshot_jobs_version(current) < jobs_version:
+                    jobs = get_all_jobs()
+                    job_texts = [preprocess_text(job.get('description', '')) for job in jobs]
+                    resume_texts = [preprocess_text(text) for text in get_recent_resume_texts(self.max_resume_docs)]
+                    vectorizer = fit_vectorizer(job_texts + resume_texts)
+                    if vectorizer is not None:
+                        state = build_state(
+                            vectorizer,
+                            [str(job['_id']) for job in jobs],
+                            job_texts,
+                            [list(job.get('skills', [])) for job in jobs],
+                            len(job_texts) + len(resume_texts)
+                        )
+                        save_snapshot(self.directory, state, jobs_version)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+        self.open()
+
+    def _rebuild_in_background(self):
+        def run():
+            # Requests made during a build are served by one more build
+            while True:
+                with self._lock:
+                    if not self._rebuild_requested:
+                        self._refitting = False
+                        return
+                    self._rebuild_requested = False
+                    state = self._state
+                try:
+                    self.rebuild(state.name if state else None)
+                except Exception as e:
+                    print(f"Error rebuilding job index: {e}")
+
+        with self._lock:
+            self._rebuild_requested = True
+            if self._refitting:
+                return
+            self._refitting = True
+        threading.Thread(target=run, daemon=True).start()
+
+    def check_version_in_background(self):
+        """
+        Rebuild in the background if the mapped snapshot was built at another
+        jobs version, e.g. jobs were edited while no worker was running
+        """
+        state = self._state
+        if not self.directory or state is None or state.name is None:
+            return
+
+        def run():
+            try:
+                if snapshot_jobs_version(state.name) != get_jobs_version():
+                    self._rebuild_in_background()
+            except Exception as e:
+                print(f"Error checking job index version: {e}")
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _current_state(self):
+        """
+        The current state, switching to a snapshot written by any process
+        at most every check_interval seconds
+        """
+        if self.directory and self.loaded and time.monotonic() - self._last_check > self.check_interval:
+            self._last_check = time.monotonic()
+            try:
+                name = read_current(self.directory)
+                state = self._state
+                if name is not None and (state is None or name != state.name):
+                    self.open()
+            except Exception as e:
+                print(f"Error reloading job index: {e}")
+        return self._state
+
+    def _maybe_refit(self):
+        state = self._state
+        doc_count = state.doc_count if state else 0
+        if self._pending > self.refit_ratio * doc_count:
+            if self.directory:
+                self._rebuild_in_background()
+            elif not self._refitting:
+                self._refit_in_background()
+
+    def add_job(self, job_id, job_description, skills=()):
+        """
+        Add or replace a job; its vector is available immediately
+        """
+        from utils.nlp_analyzer import preprocess_text
+
+        job_id = str(job_id)
+        processed_job = preprocess_text(job_description)
+
+        with self._lock:
+            if self.directory:
+                state = self._state
+                row = state.job_rows.get(job_id) if state is not None else None
+                if row is not None and state.job_keys[row] == hash_content(processed_job) \
+                        and state.job_skills[row] == list(skills):
+                    # Already in the snapshot, e.g. it was built for this job
+                    return
+
+                # Every process gets the job from the rebuilt snapshot
+                self._local_jobs[job_id] = (processed_job, list(skills))
+                if state is not None:
+                    self._state = state.with_job(job_id, processed_job, skills)
+                self._rebuild_in_background()
+                return
+
+            self._job_texts[job_id] = processed_job
+            self._job_skills[job_id] = list(skills)
+            state = self._state
+            if state is None:
+                self._refit()
+                return
+
+            # Project the job onto the current vocabulary until the next refit
+            self._state = state.with_job(job_id, processed_job, skills)
+            self._pending += 1
+            self._maybe_refit()
+
+    def add_resume(self, processed_resume):
+        """
+        Add a preprocessed resume to the fitting corpus
+        """
+        self.add_resumes([processed_resume])
+
+    def add_resumes(self, processed_resumes):
+        """
+        Add a batch of preprocessed resumes to the fitting corpus. With a
+        directory they are only counted; rebuilds read resumes from the database.
+        """
+        processed_resumes = [text for text in processed_resumes if text]
+        if not processed_resumes:
+            return
+
+        with self._lock:
+            if not self.directory:
+                self._resume_texts.extend(processed_resumes)
+                if len(self._resume_texts) > self.max_resume_docs:
+                    del self._resume_texts[:len(self._resume_texts) - self.max_resume_docs]
+            self._pending += len(processed_resumes)
+            self._maybe_refit()
+
+    def transform(self, processed_texts):
+        """
+        Transform preprocessed texts into L2-normalized TF-IDF rows
+        """
+        state = self._current_state()
+        if state is None:
+            return None
+        return state.vocabulary.transform(processed_texts)
+
+    def job_vector(self, job_id):
+        """
+        Get the precomputed vector of a job, or None if it is not indexed
+        """
+        state = self._current_state()
+        if state is None or str(job_id) not in state.job_rows:
+            return None
+        return state.job_vector(state.job_rows[str(job_id)])
+
+    def _job_vector(self, state, job_id, processed_job):
+        """
+        The precomputed vector of job_id, unless the job was added or edited
+        (e.g. by another worker) since it was indexed; then processed_job is
+        transformed once and kept with the state until it is replaced
+        """
+        key = hash_content(processed_job)
+        row = state.job_rows.get(str(job_id)) if job_id is not None else None
+        if row is not None and state.job_keys[row] == key:
+            return state.job_vector(row)
+
+        vector = state.projected.get(key)
+        if vector is None:
+            vector = state.vocabulary.transform([processed_job])
+            if len(state.projected) >= MAX_PROJECTED_JOBS:
+                state.projected.clear()
+            state.projected[key] = vector
+        return vector
+
+    def score(self, processed_resume, processed_job, job_id=None):
+        """
+        Cosine similarity between a resume and a job, between 0 and 1
+        """
+        return float(self.score_many([processed_resume], processed_job, job_id)[0])
+
+    def score_many(self, processed_resumes, processed_job, job_id=None):
+        """
+        Cosine similarity of every resume against one job, as a NumPy array.
+
+        All resumes are transformed into one sparse matrix and scored with a
+        single matrix product against the job vector.
+        """
+        state = self._current_state()
+        if state is None:
+            # Nothing indexed yet, fall back to a model fitted on the batch
+            vectorizer = sklearn_text.TfidfVectorizer()
+            tfidf_matrix = vectorizer.fit_transform(list(processed_resumes) + [processed_job])
+            return (tfidf_matrix[:-1] @ tfidf_matrix[-1].T).toarray().ravel()
+
+        resume_matrix = state.vocabulary.transform(processed_resumes)
+        job_vector = self._job_vector(state, job_id, processed_job)
+
+        return (resume_matrix @ job_vector.T).toarray().ravel()
+
+    def score_term_counts(self, features, processed_job, job_id=None):
+        """
+        Like score_many, but for resumes given as the term counts stored by
+        extract_resume_features instead of their text.
+
+        The counts of the whole batch are mapped to vocabulary columns in one
+        pass and weighted like TfidfVectorizer.transform (raw counts times
+        idf, L2-normalized), so no text is tokenized.
+        """
+        state = self._current_state()
+        if state is None:
+            # Nothing indexed yet; the counts are enough to rebuild a bag of words
+            processed_resumes = [
+                ' '.join(' '.join([term] * count) for term, count in zip(feature['terms'], feature['counts']))
+                for feature in features
+            ]
+            return self.score_many(processed_resumes, processed_job, job_id)
+
+        # Terms outside the vocabulary (including one-character tokens) are dropped, as by transform
+        resume_matrix = state.vocabulary.term_matrix([feature['terms'] for feature in features],
+                                                     [feature['counts'] for feature in features])
+        job_vector = self._job_vector(state, job_id, processed_job)
+
+        return (resume_matrix @ job_vector.T).toarray().ravel()
+
+    def rank_jobs(self, resume_text, k=10, score_text=None):
+        """
+        Rank every indexed job for one resume and return the top k.
+
+        Text similarity is one product of the job matrix with the resume
+        vector, unless score_text(job_ids) is given to return the similarity
+        (between 0 and 1) of the resume to each job with another scorer;
+        skill coverage is one product of the skill matrix with the set of
+        skills found in the resume. Returns a list of dicts with job_id,
+        match_percentage, text_match_percentage, skills_match_percentage
+        and matched_skills.
+        """
+        from utils.nlp_analyzer import preprocess_text
+
+        state = self._current_state()
+        if state is None or not state.job_ids or k <= 0:
+            return []
+
+        # Text similarity against every job
+        if score_text is not None:
+            text_scores = np.asarray(score_text(state.job_ids), dtype=float)
+        else:
+            resume_vector = state.vocabulary.transform([preprocess_text(resume_text)])
+            text_scores = state.job_scores(resume_vector)
+        text_percentages = (text_scores * 100).astype(int)
+
+        # One skill sweep over the union of all job skills
+        found_skills = state.skill_matcher.find_keys(resume_text)
+        skill_presence = np.array([skill in found_skills for skill in state.skill_vocabulary], dtype=float)
+        matched_counts = state.skill_matrix @ skill_presence
+        skills_percentages = np.divide(
+            matched_counts * 100, state.skill_counts,
+            out=np.zeros_like(matched_counts), where=state.skill_counts > 0
+        )
+
+        # Same weighting as analyze_resume
+        match_percentages = (Config.SKILLS_WEIGHT * skills_percentages + Config.TEXT_WEIGHT * text_percentages).astype(int)
+
+        k = min(k, len(state.job_ids))
+        top = np.argpartition(-match_percentages, k - 1)[:k]
+        top = top[np.argsort(-match_percentages[top], kind='stable')]
+
+        results = []
+        for row in top:
+            results.append({
+                'job_id': state.job_ids[row],
+                'match_percentage': int(match_percentages[row]),
+                'text_match_percentage': int(text_percentages[row]),
+                'skills_match_percentage': int(skills_percentages[row]),
+                'matched_skills': [skill for skill in state.job_skills[row] if skill.lower() in found_skills]
+            })
+        return results
+
+_job_index = JobIndex()
+_load_lock = threading.Lock()
+
+def _configure_job_index():
+    _job_index.directory = Config.JOB_INDEX_DIR
+    _job_index.check_interval = Config.JOB_INDEX_CHECK_INTERVAL
+
+def open_job_index():
+    """
+    Map the job index snapshot in this process if one exists, e.g. in
+    create_app, so workers share its pages instead of each fitting a copy
+    """
+    with _load_lock:
+        if not _job_index.loaded:
+            _configure_job_index()
+            if _job_index.directory and _job_index.open():
+                _job_index.check_version_in_background()
+
+def get_job_index():
+    """
+    Get the process-wide job index, loading it on first use: mapped from
+    JOB_INDEX_DIR (building the first snapshot if there is none), or
+    fitted in memory from the database if no directory is configured
+    """
+    if not _job_index.loaded:
+        with _load_lock:
+            if not _job_index.loaded:
+                _configure_job_index()
+                if _job_index.directory:
+                    if _job_index.open():
+                        _job_index.check_version_in_background()
+                    else:
+                        _job_index.rebuild()
+                    _job_index.loaded = True
+                else:
+                    from utils.nlp_analyzer import preprocess_text
+
+                    resume_texts = [preprocess_text(text) for text in get_recent_resume_texts(MAX_RESUME_DOCS)]
+                    _job_index.fit(get_all_jobs(), resume_texts)
+    return _job_index
@@ -0,0 +1,57 @@
+import json
+from flask.json.provider import DefaultJSONProvider
+from models import JSONEncoder
+
+# orjson is optional; without it the standard library encoder is used
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_encoder = JSONEncoder()
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider that encodes ObjectId and datetime values itself, so
+    MongoDB documents can be returned without converting them first.
+
+    Uses orjson when it is installed and models.JSONEncoder otherwise;
+    both write datetimes in ISO 8601. Keys are not sorted.
+    """
+    sort_keys = False
+
+    def _encode(self, obj, indent=False):
+        """Encode obj to UTF-8 JSON bytes"""
+        if orjson is not None:
+            option = orjson.OPT_NON_STR_KEYS
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(obj, default=_encoder.default, option=option)
+
+        return json.dumps(obj, cls=JSONEncoder, ensure_ascii=self.ensure_ascii, sort_keys=self.sort_keys,
+                          indent=2 if indent else None).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        # Options orjson does not have go to the standard library
+        if orjson is None or kwargs:
+            kwargs.setdefault('cls', JSONEncoder)
+            kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+            kwargs.setdefault('sort_keys', self.sort_keys)
+            return json.dumps(obj, **kwargs)
+        return self._encode(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return json.loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        """
+        Like jsonify, but the body is encoded straight to bytes.
+        Output is indented in debug mode unless compact is set.
+        """
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(self._encode(obj, indent) + b'\n', mimetype=self.mimetype)
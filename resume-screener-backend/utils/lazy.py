@@ -0,0 +1,35 @@
+import importlib
+import threading
+
+class LazyModule:
+    """
+    Module placeholder that imports the real module on first attribute
+    access, so heavy libraries are not loaded when the app is imported
+    """
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+        self.__dict__['_lock'] = threading.Lock()
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            with self.__dict__['_lock']:
+                module = self.__dict__['_module']
+                if module is None:
+                    module = importlib.import_module(self.__dict__['_name'])
+                    self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f"<lazy module {self.__dict__['_name']!r} ({state})>"
+
+def lazy_import(name):
+    """
+    Return a placeholder for module name that imports it on first use
+    """
+    return LazyModule(name)
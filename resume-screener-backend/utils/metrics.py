@@ -0,0 +1,177 @@
+from contextlib import contextmanager
+from flask import g, has_request_context
+import bisect
+import threading
+import time
+
+# Latency buckets in seconds, from sub-millisecond stages to slow LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Monotonic counter, optionally split by labels"""
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels.get(name, '') for name in self.labelnames), 0)
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield self.name, _format_labels(self.labelnames, key), value
+
+class Histogram:
+    """Latency histogram with cumulative buckets, optionally split by labels"""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts (plus +Inf), sum
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][position] += 1
+            series[1] += value
+
+    def samples(self):
+        with self._lock:
+            series = {key: (list(counts), total) for key, (counts, total) in self._series.items()}
+        for key, (counts, total) in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                yield (f'{self.name}_bucket',
+                       _format_labels(self.labelnames, key, [('le', _format_value(bound))]), cumulative)
+            yield f'{self.name}_sum', _format_labels(self.labelnames, key), total
+            yield f'{self.name}_count', _format_labels(self.labelnames, key), cumulative
+
+class CallbackMetric:
+    """
+    Metric read from a function when scraped, for counts that are already
+    kept elsewhere. The function returns {label value: number}, or a single
+    number when there are no labels.
+    """
+    def __init__(self, name, documentation, kind, read, labelname=None):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.read = read
+        self.labelname = labelname
+
+    def samples(self):
+        values = self.read()
+        if self.labelname is None:
+            yield self.name, '', values
+            return
+        for label, value in sorted(values.items()):
+            yield self.name, _format_labels((self.labelname,), (label,)), value
+
+class MetricsRegistry:
+    """
+    Metrics of this process, rendered in the Prometheus text format.
+    Each worker process keeps its own values.
+    """
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name, documentation, kind, read, labelname=None):
+        return self.register(CallbackMetric(name, documentation, kind, read, labelname))
+
+    def render(self):
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            try:
+                samples = list(metric.samples())
+            except Exception as e:
+                print(f"Error collecting metric {metric.name}: {e}")
+                continue
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in samples:
+                lines.append(f'{name}{labels} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    'resume_screener_stage_seconds', 'Time spent in each processing stage', ['stage']
+)
+REQUEST_SECONDS = registry.histogram(
+    'resume_screener_request_seconds', 'HTTP request latency', ['method', 'endpoint', 'status']
+)
+
+@contextmanager
+def timed(stage):
+    """
+    Time a block as one stage: observed in the stage histogram and, inside
+    a request, added to that request's Server-Timing header
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started)
+
+def record_stage(stage, seconds):
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    if has_request_context():
+        timings = g.setdefault('stage_timings', {})
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+def server_timing_header(total_seconds):
+    """
+    Server-Timing value for the current request: each stage and the total, in milliseconds
+    """
+    timings = g.get('stage_timings', {})
+    entries = [f'{stage};dur={seconds * 1000:.2f}' for stage, seconds in timings.items()]
+    entries.append(f'total;dur={total_seconds * 1000:.2f}')
+    return ', '.join(entries)
@@ -1,17 +1,31 @@
 
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 import re
-import google.generativeai as genai
+import threading
+from collections import Counter
 from config import Config
-import numpy as np
+from utils.embedding_store import hash_content
+from utils.text_scorer import create_text_scorer
+from utils.skill_matcher import get_skill_matcher
+from utils.ats_analyzer import ats_analyzer
+from utils.suggestion_cache import suggestion_cache, make_suggestion_key
+from utils.prompt_builder import build_suggestion_prompt, build_batch_prompt, split_batch_response, pack_batches
+from utils.metrics import timed
+from utils.lazy import lazy_import
 
-# Configure Gemini API key
-if Config.GEMINI_API_KEY:
-    try:
-        genai.configure(api_key=Config.GEMINI_API_KEY)
-    except Exception as e:
-        print(f"Error configuring Gemini: {e}")
+# Loaded and configured with the API key when the first client is created
+genai = lazy_import('google.generativeai')
+
+# Static suggestions used when Gemini is unavailable
+DEFAULT_SUGGESTIONS = ["Customize your resume to highlight experience related to the job description",
+                       "Ensure your skills section includes relevant keywords from the job listing"]
+
+# One long-lived Gemini client per process
+_gemini_model = None
+_gemini_model_lock = threading.Lock()
+
+# Scorer used for text similarity, created from Config on first use
+_text_scorer = None
+_text_scorer_lock = threading.Lock()
 
 def preprocess_text(text):
     """
@@ -28,179 +42,298 @@ def preprocess_text(text):
     
     return text
 
+def extract_resume_features(resume_text):
+    """
+    Job-independent features stored with an analysis so it can be re-scored
+    without the resume text: the count of every token of the preprocessed
+    text (terms and counts, in first-seen order) and the embedding cache key
+    """
+    term_counts = Counter(re.findall(r'\w+', resume_text.lower()))
+    return {
+        'terms': list(term_counts),
+        'counts': list(term_counts.values()),
+        'text_key': hash_content(resume_text)
+    }
+
 def extract_skills_from_text(text, skill_list):
     """
     Extract skills from text
     """
-    matched_skills = []
-    text = text.lower()
-    
-    for skill in skill_list:
-        skill_pattern = r'\b' + re.escape(skill.lower()) + r'\b'
-        if re.search(skill_pattern, text):
-            matched_skills.append(skill)
-    
-    return matched_skills
+    return get_skill_matcher(skill_list).match(text)
 
 def analyze_ats_friendliness(resume_text):
     """
     Analyze ATS friendliness of resume
     """
-    score = 100  # Start with perfect score
-    
-    # Check for common ATS issues
-    issues = []
-    
-    # Check for tables (approximate detection)
-    table_patterns = [r'[\|\t]{2,}', r'\+[-+]+\+', r'┌[─┬]+┐', r'╔[═╦]+╗']
-    for pattern in table_patterns:
-        if re.search(pattern, resume_text):
-            score -= 15
-            issues.append("Detected possible table structures which may not parse correctly in ATS systems")
-            break
-    
-    # Check for headers/footers (approximate detection)
-    header_footer_patterns = [r'Page \d+ of \d+', r'\d+/\d+']
-    for pattern in header_footer_patterns:
-        if re.search(pattern, resume_text):
-            score -= 5
-            issues.append("Detected possible headers or footers which may interfere with ATS parsing")
-            break
-    
-    # Check for non-standard section headings
-    standard_headings = ['experience', 'education', 'skills', 'summary', 'objective', 'projects', 'certifications']
-    found_standard_headings = False
-    for heading in standard_headings:
-        heading_pattern = r'\b' + re.escape(heading) + r'\b'
-        if re.search(heading_pattern, resume_text.lower()):
-            found_standard_headings = True
-            break
-    
-    if not found_standard_headings:
-        score -= 10
-        issues.append("No standard section headings detected (like 'Experience', 'Education', 'Skills')")
-    
-    # Check for excessive use of acronyms
-    acronym_pattern = r'\b[A-Z]{2,}\b'
-    acronyms = re.findall(acronym_pattern, resume_text)
-    if len(acronyms) > 10:  # Arbitrary threshold
-        score -= 5
-        issues.append("Excessive use of acronyms may reduce ATS score")
-    
-    # Check for appropriate length
-    word_count = len(resume_text.split())
-    if word_count > 1000:  # Arbitrary threshold
-        score -= 5
-        issues.append("Resume is quite long, consider making it more concise")
-    
-    # Ensure score is between 0 and 100
-    score = max(0, min(100, score))
-    
-    return score, issues
+    return ats_analyzer.analyze(resume_text)
 
-def get_gemini_suggestions(resume_text, job_description, matched_skills, missing_skills):
+def get_text_scorer():
     """
-    Get suggestions from Google's Gemini AI
+    Get the process-wide text similarity scorer selected by Config.TEXT_SCORER
     """
-    try:
-        if not Config.GEMINI_API_KEY:
-            return ["Enable Gemini API with a key to get personalized suggestions"]
-        
-        # Updated to use Gemini-2.0-flash-lite
-        model = genai.GenerativeModel('gemini-2.0-flash-lite')
-        
-        prompt = f"""
-        As a resume optimization expert, analyze this resume against the job description and provide 
-        5 specific improvement suggestions. Focus on how to better emphasize existing skills 
-        and incorporate missing skills if applicable.
+    global _text_scorer
+    if _text_scorer is None:
+        with _text_scorer_lock:
+            if _text_scorer is None:
+                _text_scorer = create_text_scorer(Config)
+    return _text_scorer
 
-        Resume:
-        {resume_text}
+def set_text_scorer(scorer):
+    """
+    Replace the text similarity scorer (e.g. with an EmbeddingScorer in tests)
+    """
+    global _text_scorer
+    _text_scorer = scorer
 
-        Job Description:
-        {job_description}
+def get_gemini_model():
+    """
+    Get the process-wide Gemini model client, creating it on first use
+    """
+    global _gemini_model
+    if _gemini_model is None:
+        with _gemini_model_lock:
+            if _gemini_model is None:
+                # Configure Gemini API key
+                if Config.GEMINI_API_KEY:
+                    try:
+                        genai.configure(api_key=Config.GEMINI_API_KEY)
+                    except Exception as e:
+                        print(f"Error configuring Gemini: {e}")
+                _gemini_model = genai.GenerativeModel(Config.GEMINI_MODEL)
+    return _gemini_model
 
-        Matched Skills: {', '.join(matched_skills)}
-        Missing Skills: {', '.join(missing_skills)}
+def set_gemini_model(model):
+    """
+    Replace the Gemini model client, e.g. with utils.fake_llm.FakeGenerativeModel
+    """
+    global _gemini_model
+    _gemini_model = model
 
-        Provide ONLY 5 short, specific, actionable suggestions as a list, each 1-2 sentences:
-        """
-        
-        response = model.generate_content(prompt)
-        
-        # Extract suggestions from response
-        text = response.text
-        suggestions = []
-        
-        # Look for numbered list items
-        pattern = r'^\s*\d+\.\s*(.*?)$'
-        matches = re.findall(pattern, text, re.MULTILINE)
-        
-        if matches:
-            suggestions = [match.strip() for match in matches]
-        else:
-            # If no numbered list, try to split by newlines
-            lines = [line.strip() for line in text.split('\n') if line.strip()]
-            suggestions = [line for line in lines if not line.startswith('#') and len(line) > 10]
-        
-        # Ensure we have at most 5 suggestions
-        suggestions = suggestions[:5]
-        
-        if not suggestions:
-            suggestions = ["Customize your resume to highlight experience related to the job description",
-                        "Ensure your skills section includes relevant keywords from the job listing"]
-        
-        return suggestions
-            
-    except Exception as e:
-        print(f"Error generating Gemini suggestions: {e}")
-        return ["Customize your resume to highlight experience related to the job description",
-                "Ensure your skills section includes relevant keywords from the job listing"]
+def call_gemini(prompt):
+    """
+    Send a prompt to Gemini. The request itself times out, so a hung call
+    frees its suggestion worker instead of holding it forever.
+    """
+    with timed('gemini'):
+        return get_gemini_model().generate_content(
+            prompt, request_options={'timeout': Config.GEMINI_REQUEST_TIMEOUT}
+        )
 
-def analyze_resume(resume_text, job_description, required_skills):
+def parse_suggestions(text):
     """
-    Analyze resume against job description and return match percentage, scores, and suggestions
+    Extract a list of suggestions from a model response
     """
-    # Preprocess texts
-    processed_resume = preprocess_text(resume_text)
-    processed_job = preprocess_text(job_description)
+    # Look for numbered list items
+    pattern = r'^\s*\d+\.\s*(.*?)$'
+    matches = re.findall(pattern, text, re.MULTILINE)
     
-    # Calculate match percentage using TF-IDF and cosine similarity
-    vectorizer = TfidfVectorizer()
-    try:
-        tfidf_matrix = vectorizer.fit_transform([processed_resume, processed_job])
-        match_score = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
-        match_percentage = int(match_score * 100)
-    except:
-        match_percentage = 50  # Default if there's an error
+    if matches:
+        return [match.strip() for match in matches]
     
-    # Find matched and missing skills
-    matched_skills = extract_skills_from_text(resume_text, required_skills)
-    missing_skills = [skill for skill in required_skills if skill not in matched_skills]
+    # If no numbered list, try to split by newlines
+    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    return [line for line in lines if not line.startswith('#') and len(line) > 10]
+
+def generate_gemini_suggestions(resume_text, job_description, matched_skills, missing_skills):
+    """
+    Call Gemini for suggestions; errors are raised to the caller
+    """
+    prompt = build_suggestion_prompt(resume_text, job_description, matched_skills, missing_skills,
+                                     Config.PROMPT_RESUME_TOKENS, Config.PROMPT_JOB_TOKENS)
     
-    # Calculate skills match percentage
-    skills_match_percentage = len(matched_skills) / len(required_skills) * 100 if required_skills else 0
+    response = call_gemini(prompt)
     
-    # Combine text similarity and skills match for final score
-    # Weight: 60% skills match, 40% text similarity
-    final_match_percentage = int(0.6 * skills_match_percentage + 0.4 * match_percentage)
+    # Ensure we have at most 5 suggestions
+    suggestions = parse_suggestions(response.text)[:5]
     
-    # Analyze ATS friendliness
-    ats_score, ats_issues = analyze_ats_friendliness(resume_text)
+    if not suggestions:
+        suggestions = list(DEFAULT_SUGGESTIONS)
     
-    # Get suggestions from Gemini
-    suggestions = get_gemini_suggestions(resume_text, job_description, matched_skills, missing_skills)
+    return suggestions
+
+def generate_gemini_suggestions_batch(items, job_description):
+    """
+    Call Gemini once for the suggestions of several resumes against one job.
+    items are (resume_text, matched_skills, missing_skills). Returns a list
+    with the suggestions of each resume, or None where the response had no
+    usable answer for it; errors are raised to the caller.
+    """
+    prompt = build_batch_prompt(items, job_description, Config.PROMPT_RESUME_TOKENS, Config.PROMPT_JOB_TOKENS)
     
-    # Combine ATS issues with Gemini suggestions if needed
-    if ats_issues:
-        for issue in ats_issues:
-            if len(suggestions) < 5:
-                suggestions.append(f"ATS Improvement: {issue}")
+    response = call_gemini(prompt)
     
-    return {
-        'match_percentage': final_match_percentage,
-        'ats_score': ats_score,
-        'matched_skills': matched_skills,
-        'missing_skills': missing_skills,
-        'suggestions': suggestions
-    }
+    answers = []
+    for answer in split_batch_response(response.text, len(items)):
+        suggestions = parse_suggestions(answer)[:5] if answer is not None else []
+        answers.append(suggestions or None)
+    
+    return answers
+
+def get_gemini_suggestions(resume_text, job_description, matched_skills, missing_skills):
+    """
+    Get suggestions from Google's Gemini AI.
+    Results are cached by input hash, identical concurrent requests share one call,
+    and the static suggestions are returned if Gemini fails or misses its deadline.
+    """
+    if not Config.GEMINI_API_KEY and _gemini_model is None:
+        return ["Enable Gemini API with a key to get personalized suggestions"]
+    
+    key = make_suggestion_key(resume_text, job_description, matched_skills, missing_skills)
+    suggestions = suggestion_cache.get_or_compute(
+        key,
+        lambda: generate_gemini_suggestions(resume_text, job_description, matched_skills, missing_skills),
+        timeout=Config.GEMINI_TIMEOUT,
+        fallback=DEFAULT_SUGGESTIONS
+    )
+    
+    # Callers extend the list, so never hand out the cached one
+    return list(suggestions)
+
+def get_gemini_suggestions_many(items, job_description):
+    """
+    Get suggestions for several resumes against one job. items are
+    (resume_text, matched_skills, missing_skills). Resumes without cached
+    suggestions are packed several to a Gemini request, through the cache
+    like single requests: identical concurrent requests share one call, and
+    the static suggestions are returned if it fails or misses its deadline.
+    Only resumes a successful batched answer left out are requested again,
+    one at a time.
+    """
+    if not Config.GEMINI_API_KEY and _gemini_model is None:
+        return [["Enable Gemini API with a key to get personalized suggestions"] for _ in items]
+    
+    keys = [make_suggestion_key(resume_text, job_description, matched_skills, missing_skills)
+            for resume_text, matched_skills, missing_skills in items]
+    results = [suggestion_cache.get(key) for key in keys]
+    missing = [i for i, suggestions in enumerate(results) if suggestions is None]
+    suggestion_cache.record(hits=len(items) - len(missing))
+    
+    batches = pack_batches([items[i] for i in missing], Config.SUGGESTION_BATCH_SIZE,
+                           Config.SUGGESTION_BATCH_TOKENS, Config.PROMPT_RESUME_TOKENS)
+    for batch in batches:
+        indices = [missing[position] for position in batch]
+        if len(indices) < 2:
+            continue
+        items_by_key = {keys[i]: items[i] for i in indices}
+        answers = suggestion_cache.get_or_compute_many(
+            [keys[i] for i in indices],
+            lambda batch_keys, items_by_key=items_by_key: generate_gemini_suggestions_batch(
+                [items_by_key[key] for key in batch_keys], job_description),
+            timeout=Config.GEMINI_TIMEOUT,
+            fallback=DEFAULT_SUGGESTIONS
+        )
+        for i, suggestions in zip(indices, answers):
+            results[i] = suggestions
+    
+    # Single resumes, and resumes the batched answers left out
+    for i, suggestions in enumerate(results):
+        if suggestions is None:
+            resume_text, matched_skills, missing_skills = items[i]
+            results[i] = get_gemini_suggestions(resume_text, job_description, matched_skills, missing_skills)
+        else:
+            # Callers extend the list, so never hand out the cached one
+            results[i] = list(suggestions)
+    
+    return results
+
+def analyze_resume(resume_text, job_description, required_skills, job_id=None):
+    """
+    Analyze resume against job description and return match percentage, scores, and suggestions
+    """
+    return analyze_resumes([resume_text], job_description, required_skills, job_id)[0]
+
+def merge_suggestions(suggestions, ats_issues):
+    """
+    Add ATS issues to suggestions, up to 5 suggestions in total
+    """
+    suggestions = list(suggestions)
+    for issue in ats_issues:
+        if len(suggestions) < 5:
+            suggestions.append(f"ATS Improvement: {issue}")
+    return suggestions
+
+def suggest_improvements(resume_text, job_description, matched_skills, missing_skills, ats_issues):
+    """
+    Slow tier of the analysis: Gemini suggestions combined with the ATS issues
+    """
+    with timed('suggestions'):
+        suggestions = get_gemini_suggestions(resume_text, job_description, matched_skills, missing_skills)
+    return merge_suggestions(suggestions, ats_issues)
+
+def suggest_improvements_many(resume_texts, job_description, results):
+    """
+    Slow tier for several resumes against one job (results from
+    score_resumes), with resumes sharing Gemini requests
+    """
+    items = [(resume_text, result['matched_skills'], result['missing_skills'])
+             for resume_text, result in zip(resume_texts, results)]
+    with timed('suggestions'):
+        suggestions = get_gemini_suggestions_many(items, job_description)
+    return [merge_suggestions(resume_suggestions, result['ats_issues'])
+            for resume_suggestions, result in zip(suggestions, results)]
+
+def score_resumes(resume_texts, job_description, required_skills, job_id=None):
+    """
+    Fast tier of the analysis: match, skills and ATS scores for a batch of
+    resumes, with no call to Gemini. Text similarity for the whole batch is
+    computed with a single matrix product. The suggestions of each result
+    are only the ATS issues; ats_issues is kept for suggest_improvements.
+    """
+    # Calculate match percentages with the configured scorer (TF-IDF by default)
+    try:
+        with timed('text_similarity'):
+            match_scores = get_text_scorer().score_many(resume_texts, job_description, job_id)
+        match_percentages = [int(match_score * 100) for match_score in match_scores]
+    except Exception as e:
+        print(f"Error scoring text similarity: {e}")
+        match_percentages = [50] * len(resume_texts)  # Default if there's an error
+    
+    # Find matched skills for the whole batch with one compiled matcher
+    with timed('skill_matching'):
+        batch_matched_skills = get_skill_matcher(required_skills).match_many(resume_texts)
+    
+    results = []
+    for resume_text, match_percentage, matched_skills in zip(resume_texts, match_percentages, batch_matched_skills):
+        # Find missing skills
+        missing_skills = [skill for skill in required_skills if skill not in matched_skills]
+        
+        # Calculate skills match percentage
+        skills_match_percentage = len(matched_skills) / len(required_skills) * 100 if required_skills else 0
+        
+        # Combine text similarity and skills match for final score
+        # Weight: Config.SKILLS_WEIGHT skills match, Config.TEXT_WEIGHT text similarity
+        final_match_percentage = int(Config.SKILLS_WEIGHT * skills_match_percentage + Config.TEXT_WEIGHT * match_percentage)
+        
+        # Analyze ATS friendliness
+        with timed('ats_checks'):
+            ats_score, ats_issues = analyze_ats_friendliness(resume_text)
+        
+        with timed('features'):
+            features = extract_resume_features(resume_text)
+        
+        results.append({
+            'match_percentage': final_match_percentage,
+            'ats_score': ats_score,
+            'matched_skills': matched_skills,
+            'missing_skills': missing_skills,
+            'suggestions': merge_suggestions([], ats_issues),
+            'ats_issues': ats_issues,
+            'features': features
+        })
+    
+    return results
+
+def analyze_resumes(resume_texts, job_description, required_skills, job_id=None, include_suggestions=True):
+    """
+    Analyze a batch of resumes against one job description: the fast tier
+    (score_resumes) and, unless include_suggestions is False, the Gemini
+    suggestions of each resume
+    """
+    results = score_resumes(resume_texts, job_description, required_skills, job_id)
+    
+    if include_suggestions:
+        suggestions = suggest_improvements_many(resume_texts, job_description, results)
+        for result, resume_suggestions in zip(results, suggestions):
+            result['suggestions'] = resume_suggestions
+    
+    return results
@@ -0,0 +1,229 @@
+import multiprocessing
+import os
+import threading
+import time
+
+# Parse statuses
+PARSE_OK = 'ok'
+PARSE_UNSUPPORTED = 'unsupported'
+PARSE_ERROR = 'error'
+PARSE_TIMEOUT = 'timeout'
+PARSE_MEMORY = 'memory'
+PARSE_BUSY = 'busy'
+
+# How often the parent checks the elapsed time and memory of a parser process
+POLL_INTERVAL = 0.05
+
+class ParseResult:
+    """
+    Outcome of parsing one document: the text if status is PARSE_OK,
+    otherwise an error message. elapsed is the time spent parsing and
+    waited the time spent waiting for a free parser before it.
+    """
+    def __init__(self, status, text='', error=None, elapsed=0.0, waited=0.0):
+        self.status = status
+        self.text = text
+        self.error = error
+        self.elapsed = elapsed
+        self.waited = waited
+
+    @property
+    def ok(self):
+        return self.status == PARSE_OK
+
+    def __repr__(self):
+        return f'ParseResult(status={self.status!r}, chars={len(self.text)}, error={self.error!r})'
+
+def _vm_size():
+    """Virtual memory size of the current process in bytes, or None if unknown"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+def _rss(pid):
+    """Resident memory of a process in bytes, or None if unknown"""
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+def limit_address_space(memory_limit):
+    """
+    Cap the address space of this process at its current size plus twice
+    memory_limit, so a runaway parser gets a MemoryError
+    """
+    try:
+        import resource
+
+        vm_size = _vm_size()
+        if vm_size is not None:
+            limit = vm_size + 2 * memory_limit
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError):
+        pass
+
+def _parse_in_child(conn, file_path, memory_limit):
+    """
+    Entry point of a parser process: read the file and send back the result
+    """
+    # Hard stop well above the RSS limit the parent enforces, in case memory
+    # grows faster than the parent polls
+    limit_address_space(memory_limit)
+
+    try:
+        from utils.text_parser import READERS, get_extension
+
+        conn.send((PARSE_OK, READERS[get_extension(file_path)](file_path)))
+    except MemoryError:
+        conn.send((PARSE_MEMORY, 'Parser ran out of memory'))
+    except Exception as e:
+        conn.send((PARSE_ERROR, f'{type(e).__name__}: {e}'))
+    finally:
+        conn.close()
+
+def get_parser_context():
+    """
+    Multiprocessing context for parser processes, with the parsers preloaded
+    """
+    methods = multiprocessing.get_all_start_methods()
+    if 'forkserver' in methods:
+        # Children fork from a clean server process rather than from a
+        # multithreaded web worker
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload(['pdfminer.high_level', 'docx', 'utils.text_parser'])
+        return context
+    return multiprocessing.get_context('spawn')
+
+class ParserPool:
+    """
+    Runs document parsers in separate processes with per-document limits.
+
+    At most max_workers parser processes run at once. Each document gets a
+    wall-clock timeout and a resident memory limit; a process that exceeds
+    either is killed, so one pathological file cannot stall or exhaust the
+    web worker. Failures are returned as typed ParseResults and counted.
+    """
+    def __init__(self, max_workers=2, timeout=30, memory_limit=512 * 1024 * 1024):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.counters = {status: 0 for status in
+                         (PARSE_OK, PARSE_UNSUPPORTED, PARSE_ERROR, PARSE_TIMEOUT, PARSE_MEMORY, PARSE_BUSY)}
+        self._slots = None
+        self._context = None
+        self._lock = threading.Lock()
+
+    def configure(self, max_workers=None, timeout=None, memory_limit=None):
+        """
+        Update settings; takes effect before the first document is parsed
+        """
+        if max_workers is not None:
+            self.max_workers = max_workers
+        if timeout is not None:
+            self.timeout = timeout
+        if memory_limit is not None:
+            self.memory_limit = memory_limit
+
+    def _start(self):
+        with self._lock:
+            if self._slots is None:
+                self._slots = threading.BoundedSemaphore(self.max_workers)
+                self._context = get_parser_context()
+
+    def warm_up(self):
+        """
+        Start the fork server now, so the first document does not pay for
+        importing the parsers
+        """
+        self._start()
+        if self._context.get_start_method() == 'forkserver':
+            from multiprocessing import forkserver
+
+            forkserver.ensure_running()
+
+    def _count(self, result):
+        with self._lock:
+            self.counters[result.status] += 1
+        return result
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters)
+
+    def parse(self, file_path):
+        """
+        Parse a PDF, DOCX or TXT file in a parser process and return a ParseResult
+        """
+        from utils.text_parser import READERS, get_extension
+
+        if get_extension(file_path) not in READERS:
+            return self._count(ParseResult(PARSE_UNSUPPORTED, error='Unsupported file type'))
+
+        self._start()
+        queued = time.monotonic()
+
+        # Wait for a free parser, but not longer than a parse may take
+        if not self._slots.acquire(timeout=self.timeout):
+            return self._count(ParseResult(PARSE_BUSY, error='All parsers are busy',
+                                           waited=time.monotonic() - queued))
+
+        try:
+            # The parse timeout starts once a parser is free
+            started = time.monotonic()
+            result = self._run(file_path, started)
+            result.waited = started - queued
+            return self._count(result)
+        finally:
+            self._slots.release()
+
+    def _run(self, file_path, started):
+        parent_conn, child_conn = self._context.Pipe(duplex=False)
+        process = self._context.Process(
+            target=_parse_in_child,
+            args=(child_conn, file_path, self.memory_limit),
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+
+        try:
+            while not parent_conn.poll(POLL_INTERVAL):
+                elapsed = time.monotonic() - started
+                if elapsed > self.timeout:
+                    return ParseResult(PARSE_TIMEOUT, error=f'Parsing took longer than {self.timeout}s',
+                                       elapsed=elapsed)
+
+                rss = _rss(process.pid)
+                if rss is not None and rss > self.memory_limit:
+                    return ParseResult(PARSE_MEMORY, error='Parser exceeded its memory limit', elapsed=elapsed)
+
+                if not process.is_alive() and not parent_conn.poll():
+                    process.join(POLL_INTERVAL)
+                    return ParseResult(PARSE_ERROR, error=f'Parser exited with code {process.exitcode}',
+                                       elapsed=elapsed)
+
+            try:
+                status, payload = parent_conn.recv()
+            except EOFError:
+                status, payload = PARSE_ERROR, f'Parser exited with code {process.exitcode}'
+
+            elapsed = time.monotonic() - started
+            if status == PARSE_OK:
+                return ParseResult(PARSE_OK, text=payload or '', elapsed=elapsed)
+            return ParseResult(status, error=payload, elapsed=elapsed)
+        finally:
+            parent_conn.close()
+            if process.is_alive():
+                process.kill()
+            process.join()
+
+parser_pool = ParserPool()
+
+def parse_document(file_path):
+    """
+    Parse a document with the shared parser pool
+    """
+    return parser_pool.parse(file_path)
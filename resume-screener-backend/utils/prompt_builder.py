@@ -0,0 +1,235 @@
+import re
+
+# Gemini averages about 4 characters per token on English text
+CHARS_PER_TOKEN = 4
+
+# Resume sections by how much they matter to the suggestions; when a resume
+# is over its token budget, lower numbers get a larger share of it
+SECTION_PRIORITY = {
+    'summary': 0, 'profile': 0, 'objective': 0, 'professional summary': 0,
+    'experience': 1, 'work experience': 1, 'professional experience': 1, 'employment': 1,
+    'employment history': 1, 'skills': 1, 'technical skills': 1, 'core competencies': 1,
+    'projects': 2, 'achievements': 2, 'publications': 2,
+    'certifications': 3, 'education': 3, 'training': 3, 'languages': 3
+}
+# Contact details and anything before the first heading
+PREAMBLE_PRIORITY = 4
+
+# Sections never sent to Gemini
+SKIPPED_SECTIONS = {'references', 'hobbies', 'interests', 'personal details', 'declaration'}
+
+# Page numbers and separator lines left over from PDF extraction
+NOISE_PATTERN = re.compile(r'^(?:page \d+(?: of \d+)?|[-=_*•·|~#.\s]+)$', re.IGNORECASE)
+
+# Header of each resume in a batched prompt and of each answer in the response
+BATCH_HEADER_PATTERN = re.compile(r'^[\s#*]*Resume\s+(\d+)\s*:?[\s*]*$', re.IGNORECASE | re.MULTILINE)
+
+SUGGESTION_INSTRUCTIONS = ("As a resume optimization expert, analyze this resume against the job description and "
+                           "provide 5 specific improvement suggestions. Focus on how to better emphasize existing "
+                           "skills and incorporate missing skills if applicable.")
+
+BATCH_INSTRUCTIONS = ("As a resume optimization expert, analyze each resume below against the job description and "
+                      "provide 5 specific improvement suggestions per resume. Focus on how to better emphasize "
+                      "existing skills and incorporate missing skills if applicable.")
+
+def estimate_tokens(text):
+    """
+    Estimate the number of tokens in text
+    """
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def compact_lines(text):
+    """
+    Split text into lines with runs of whitespace collapsed, dropping blank
+    lines, page numbers, separators and repeated lines such as page headers
+    """
+    lines = []
+    seen = set()
+    for line in text.splitlines():
+        line = ' '.join(line.split())
+        if not line or NOISE_PATTERN.match(line):
+            continue
+        key = line.lower()
+        if key in seen:
+            continue
+        seen.add(key)
+        lines.append(line)
+    return lines
+
+def _heading(line):
+    """Return the section name if line starts a section, else None"""
+    name = line.split(':', 1)[0].strip().lower() if ':' in line else line.lower()
+    if name in SECTION_PRIORITY or name in SKIPPED_SECTIONS:
+        return name
+    return None
+
+def split_sections(lines):
+    """
+    Group lines into (priority, lines) sections, in document order, with
+    skipped sections left out. A heading line may carry content, as in
+    'Skills: Python, SQL'.
+    """
+    sections = [(PREAMBLE_PRIORITY, [])]
+    skipping = False
+    for line in lines:
+        name = _heading(line)
+        if name is not None:
+            skipping = name in SKIPPED_SECTIONS
+            if not skipping:
+                sections.append((SECTION_PRIORITY[name], [line]))
+        elif not skipping:
+            sections[-1][1].append(line)
+    return [section for section in sections if section[1]]
+
+def find_sections(text):
+    """
+    Names of the known section headings in text, in document order
+    """
+    names = []
+    for line in compact_lines(text):
+        name = _heading(line)
+        if name is not None and name not in names:
+            names.append(name)
+    return names
+
+def truncate_text(text, max_tokens):
+    """
+    Cut text to at most max_tokens, at a word boundary
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind(' ', 0, max_chars + 1)
+    return text[:cut if cut > 0 else max_chars]
+
+def compact_text(text, max_tokens):
+    """
+    Collapse whitespace and repeated lines in text and cut it to max_tokens
+    """
+    return truncate_text('\n'.join(compact_lines(text)), max_tokens)
+
+def _is_bare_heading(line):
+    """Return True if line is a section heading with no content after it"""
+    name = _heading(line)
+    return name is not None and line.rstrip(': ').lower() == name
+
+def _keep_lines(lines, budget):
+    """
+    Return the leading lines that fit in budget characters, and the
+    characters they use. A first line (or the first after a heading) that
+    does not fit is shortened to the budget rather than dropped.
+    """
+    kept, used = [], 0
+    for line in lines:
+        if used + len(line) + 1 > budget:
+            if not kept or (len(kept) == 1 and _is_bare_heading(kept[0])):
+                line = truncate_text(line, max(budget - used - 1, 0) // CHARS_PER_TOKEN)
+                if line:
+                    kept.append(line)
+                    used += len(line) + 1
+            break
+        kept.append(line)
+        used += len(line) + 1
+    # A heading on its own tells the model nothing
+    if len(kept) == 1 and len(lines) > 1 and _is_bare_heading(kept[0]):
+        return [], 0
+    return kept, used
+
+def compact_resume(resume_text, max_tokens):
+    """
+    Compact a resume for a prompt: whitespace and boilerplate are removed
+    and, if it is still over max_tokens, the budget is shared between
+    sections by priority (summary first, contact details last) and each
+    keeps its leading lines, the first one shortened if it does not fit. A section needing less than its share passes
+    the rest on. Kept lines stay in document order.
+    """
+    sections = split_sections(compact_lines(resume_text))
+    text = '\n'.join(line for _, lines in sections for line in lines)
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    remaining = max_tokens * CHARS_PER_TOKEN
+    weights = [PREAMBLE_PRIORITY + 1 - priority for priority, _ in sections]
+    sizes = [sum(len(line) + 1 for line in lines) for _, lines in sections]
+    kept = [[] for _ in sections]
+    # Sections smallest for their share first, so what they leave over goes to the others
+    order = sorted(range(len(sections)), key=lambda i: sizes[i] / weights[i])
+    total_weight = sum(weights)
+    for index in order:
+        share = remaining * weights[index] // total_weight
+        kept[index], used = _keep_lines(sections[index][1], share)
+        remaining -= used
+        total_weight -= weights[index]
+
+    return '\n'.join(line for lines in kept for line in lines)
+
+def skills_lines(matched_skills, missing_skills):
+    return f"Matched Skills: {', '.join(matched_skills)}\nMissing Skills: {', '.join(missing_skills)}"
+
+def build_suggestion_prompt(resume_text, job_description, matched_skills, missing_skills,
+                            resume_tokens, job_tokens):
+    """
+    Prompt for the suggestions of one resume, with the resume and job
+    description compacted to their token budgets
+    """
+    return (f"{SUGGESTION_INSTRUCTIONS}\n\n"
+            f"Resume:\n{compact_resume(resume_text, resume_tokens)}\n\n"
+            f"Job Description:\n{compact_text(job_description, job_tokens)}\n\n"
+            f"{skills_lines(matched_skills, missing_skills)}\n\n"
+            "Provide ONLY 5 short, specific, actionable suggestions as a list, each 1-2 sentences:")
+
+def build_batch_prompt(items, job_description, resume_tokens, job_tokens):
+    """
+    Prompt for the suggestions of several resumes against one job. items
+    are (resume_text, matched_skills, missing_skills); the job description
+    is sent once and the answers are split with split_batch_response.
+    """
+    resumes = '\n\n'.join(
+        f"Resume {number}:\n{compact_resume(resume_text, resume_tokens)}\n"
+        f"{skills_lines(matched_skills, missing_skills)}"
+        for number, (resume_text, matched_skills, missing_skills) in enumerate(items, 1)
+    )
+    return (f"{BATCH_INSTRUCTIONS}\n\n"
+            f"Job Description:\n{compact_text(job_description, job_tokens)}\n\n"
+            f"{resumes}\n\n"
+            f"For each of the {len(items)} resumes, write a line 'Resume N:' with its number, followed by "
+            "ONLY 5 short, specific, actionable suggestions as a numbered list, each 1-2 sentences.")
+
+def split_batch_response(text, count):
+    """
+    Split the response to a batched prompt into the answer for each of
+    count resumes; answers missing from the response are None
+    """
+    answers = [None] * count
+    headers = list(BATCH_HEADER_PATTERN.finditer(text))
+    for header, following in zip(headers, headers[1:] + [None]):
+        number = int(header.group(1))
+        if 1 <= number <= count and answers[number - 1] is None:
+            answers[number - 1] = text[header.end():following.start() if following else len(text)]
+    return answers
+
+def count_batch_resumes(prompt):
+    """
+    Number of resumes in a prompt built by build_batch_prompt, 0 for any other prompt
+    """
+    if not prompt.startswith(BATCH_INSTRUCTIONS):
+        return 0
+    return len(BATCH_HEADER_PATTERN.findall(prompt))
+
+def pack_batches(items, max_items, max_tokens, resume_tokens):
+    """
+    Group item indices into batches of at most max_items whose compacted
+    resumes add up to at most max_tokens (a single resume is always allowed)
+    """
+    batches = []
+    batch, batch_tokens = [], 0
+    for index, (resume_text, _, _) in enumerate(items):
+        tokens = min(estimate_tokens(resume_text), resume_tokens)
+        if batch and (len(batch) == max_items or batch_tokens + tokens > max_tokens):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(index)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
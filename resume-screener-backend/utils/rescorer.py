@@ -0,0 +1,182 @@
+import re
+from itertools import chain
+from config import Config
+from models import count_stale_analyses, get_stale_analyses, update_rescored_analyses, get_resume_texts, get_skill_keys, rebuild_leaderboard
+from utils.lazy import lazy_import
+from utils.metrics import timed
+from utils.nlp_analyzer import extract_resume_features, get_text_scorer
+from utils.skill_matcher import get_skill_matcher
+
+# Loaded on first use to keep app startup fast
+np = lazy_import('numpy')
+
+def skill_words(key):
+    """The word-character runs of a lowercased skill, e.g. ['node', 'js'] for 'node.js'"""
+    return re.findall(r'\w+', key)
+
+def match_skills_from_features(batch, features, skills, get_texts):
+    """
+    Get the matched skills of each analysis in batch from its stored term
+    list, with the same result as extract_skills_from_text on its text.
+
+    A skill can only occur in a text if each of its words is a whole token
+    of the text, so presence of the words is checked for the whole batch at
+    once. For one-word skills that is the answer. Other skills (phrases,
+    'c++', 'node.js') keep the result recorded by the previous scoring if
+    they were part of the job then; otherwise the texts of the remaining
+    candidates are fetched in one call of get_texts(rows) and matched.
+    """
+    keys = [skill.lower() for skill in skills]
+    words = {word: column for column, word in enumerate({word for key in keys for word in skill_words(key)})}
+
+    # Which skill words each analysis contains, as a rows x words matrix
+    lengths = np.fromiter((len(feature['terms']) for feature in features), dtype=np.int64, count=len(features))
+    columns = np.fromiter((words.get(term, -1) for term in chain.from_iterable(feature['terms'] for feature in features)),
+                          dtype=np.int64, count=int(lengths.sum()))
+    rows = np.repeat(np.arange(len(features)), lengths)
+    present = np.zeros((len(batch), len(words)), dtype=bool)
+    present[rows[columns >= 0], columns[columns >= 0]] = True
+
+    found = np.zeros((len(batch), len(keys)), dtype=bool)
+    unresolved = {}
+    for column, key in enumerate(keys):
+        key_words = skill_words(key)
+        candidates = present[:, [words[word] for word in key_words]].all(axis=1)
+        if len(key_words) == 1 and key_words[0] == key:
+            found[:, column] = candidates
+            continue
+
+        for row in np.flatnonzero(candidates):
+            analysis = batch[row]
+            if key in {skill.lower() for skill in analysis.get('matched_skills', [])}:
+                found[row, column] = True
+            elif key not in {skill.lower() for skill in analysis.get('missing_skills', [])}:
+                unresolved.setdefault(int(row), []).append(column)
+
+    if unresolved:
+        for row, text in zip(unresolved, get_texts(list(unresolved))):
+            if text is None:
+                continue
+            found_keys = get_skill_matcher([keys[column] for column in unresolved[row]]).find_keys(text)
+            for column in unresolved[row]:
+                found[row, column] = keys[column] in found_keys
+
+    return [[skill for skill, hit in zip(skills, hits) if hit] for hits in found]
+
+def rescore_batch(batch, job, scorer=None, load_texts=get_resume_texts):
+    """
+    Recompute the match and skills of a batch of analyses for job from
+    their stored features; the LLM is never called and files are never
+    parsed. Analyses saved before features were stored get them from the
+    saved resume text.
+
+    Returns (updates, skipped): (analysis _id, fields to set) pairs and the
+    number of analyses whose resume no longer exists.
+    """
+    scorer = scorer or get_text_scorer()
+    texts = {}
+
+    def fetch(rows):
+        needed = [batch[row]['resume_id'] for row in rows if batch[row]['resume_id'] not in texts]
+        if needed:
+            found = load_texts(needed)
+            for resume_id in needed:
+                texts[resume_id] = found.get(resume_id)
+
+    def get_texts(rows):
+        fetch(rows)
+        return [texts[batch[row]['resume_id']] for row in rows]
+
+    # Backfill features of older analyses from their resume text
+    fetch([row for row, analysis in enumerate(batch) if not analysis.get('features')])
+    rows, features, backfilled = [], [], set()
+    for row, analysis in enumerate(batch):
+        feature = analysis.get('features')
+        if not feature:
+            text = texts[analysis['resume_id']]
+            if text is None:
+                continue
+            feature = extract_resume_features(text)
+            backfilled.add(row)
+        rows.append(row)
+        features.append(feature)
+    skipped = len(batch) - len(rows)
+    if not rows:
+        return [], skipped
+    scored = [batch[row] for row in rows]
+
+    # Text similarity for the batch, falling back to the text where features are not enough
+    scores, missing = scorer.score_features(features, job['description'], str(job['_id']))
+    if missing:
+        fetch([rows[i] for i in missing])
+        missing = [i for i in missing if texts[scored[i]['resume_id']] is not None]
+        if missing:
+            fallback = scorer.score_many([texts[scored[i]['resume_id']] for i in missing], job['description'],
+                                         str(job['_id']))
+            scores[missing] = fallback
+    text_percentages = (np.asarray(scores) * 100).astype(int)
+
+    batch_matched_skills = match_skills_from_features(scored, features, job['skills'],
+                                                      lambda indices: get_texts([rows[i] for i in indices]))
+
+    updates = []
+    for i, (analysis, matched_skills) in enumerate(zip(scored, batch_matched_skills)):
+        # Same scoring as analyze_resumes
+        missing_skills = [skill for skill in job['skills'] if skill not in matched_skills]
+        skills_match_percentage = len(matched_skills) / len(job['skills']) * 100 if job['skills'] else 0
+        final_match_percentage = int(Config.SKILLS_WEIGHT * skills_match_percentage +
+                                     Config.TEXT_WEIGHT * int(text_percentages[i]))
+
+        fields = {
+            'match_percentage': final_match_percentage,
+            'matched_skills': matched_skills,
+            'missing_skills': missing_skills,
+            'skill_keys': get_skill_keys(matched_skills),
+            'job_version': job.get('version', 1),
+            'job_title': job['title'],
+            'company': job['company']
+        }
+        if rows[i] in backfilled:
+            fields['features'] = features[i]
+        updates.append((analysis['_id'], fields))
+    return updates, skipped
+
+def rescore_job(job, report, state, batch_size=None):
+    """
+    Background task: re-score every analysis of job scored against an
+    older version of it, in batches of RESCORE_BATCH_SIZE, reporting
+    progress after each batch. A retry resumes after the last saved batch.
+    """
+    job_id = str(job['_id'])
+    job_version = job.get('version', 1)
+    batch_size = batch_size or Config.RESCORE_BATCH_SIZE
+    scorer = get_text_scorer()
+
+    if 'total' not in state:
+        state.update(total=count_stale_analyses(job_id, job_version), after=None, rescored=0, skipped=0)
+    report(0, 'rescoring')
+
+    while True:
+        batch = get_stale_analyses(job_id, job_version, state['after'], batch_size)
+        if not batch:
+            break
+
+        with timed('rescore'):
+            updates, skipped = rescore_batch(batch, job, scorer)
+        with timed('save_analyses'):
+            update_rescored_analyses(updates, job_version)
+
+        state['after'] = batch[-1]['_id']
+        state['rescored'] += len(updates)
+        state['skipped'] += skipped
+        done = state['rescored'] + state['skipped']
+        report(min(99, int(done * 100 / max(state['total'], 1))), 'rescoring')
+
+    # Scores changed throughout, so the top candidates are read again
+    rebuild_leaderboard(job_id)
+
+    return {
+        'job_version': job_version,
+        'rescored': state['rescored'],
+        'skipped': state['skipped']
+    }
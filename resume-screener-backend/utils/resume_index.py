@@ -0,0 +1,462 @@
+from datetime import timedelta
+from bson import ObjectId
+from config import Config
+from models import iter_resumes_since
+from utils.lazy import lazy_import
+import fcntl
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+
+# Loaded on first use to keep app startup fast
+np = lazy_import('numpy')
+
+# Corpus size up to which every resume is scored exactly
+EXACT_LIMIT = 50000
+
+# Inverted lists probed per query once the index is approximate
+DEFAULT_PROBES = 8
+
+# k-means settings for the inverted file: iterations and training points per list
+KMEANS_ITERATIONS = 10
+KMEANS_POINTS_PER_LIST = 40
+
+# Rows compared with the centroids at a time, to bound memory
+ASSIGN_CHUNK = 8192
+
+# How far back to look when catching up, for ids created out of order by other processes
+SYNC_OVERLAP = timedelta(minutes=5)
+
+class _GrowableArray:
+    """
+    Append-only array with amortized growth. Rows below the current length
+    never change, so readers can keep using a view while rows are appended.
+    """
+    def __init__(self, width=None, dtype='float32'):
+        self.width = width
+        self.dtype = dtype
+        self.length = 0
+        self._data = None
+
+    def _shape(self, rows):
+        return (rows,) if self.width is None else (rows, self.width)
+
+    def append(self, rows):
+        rows = np.asarray(rows, dtype=self.dtype)
+        end = self.length + len(rows)
+        capacity = 0 if self._data is None else len(self._data)
+        if end > capacity:
+            data = np.zeros(self._shape(max(end, 2 * capacity, 16)), dtype=self.dtype)
+            if self._data is not None:
+                data[:self.length] = self._data[:self.length]
+            self._data = data
+        self._data[self.length:end] = rows
+        self.length = end
+
+    def view(self, length=None):
+        if self._data is None:
+            return np.zeros(self._shape(0), dtype=self.dtype)
+        return self._data[:self.length if length is None else length]
+
+def spherical_kmeans(vectors, list_count, iterations=KMEANS_ITERATIONS, seed=0):
+    """
+    Cluster unit vectors by cosine similarity and return unit centroids
+    """
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), list_count, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+
+        # Keep the old centroid for lists that lost every point
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids).astype(np.float32)
+    return centroids
+
+class _InvertedFile:
+    """
+    Coarse quantizer of the approximate index: k-means centroids and, for
+    each centroid, the rows closest to it
+    """
+    def __init__(self, centroids, trained_count):
+        self.centroids = centroids
+        self.trained_count = trained_count
+        self.lists = [_GrowableArray(dtype=np.int64) for _ in range(len(centroids))]
+
+    def assign(self, vectors, first_row):
+        """Add rows first_row.. to the list of their nearest centroid"""
+        assignments = np.concatenate([
+            np.argmax(vectors[start:start + ASSIGN_CHUNK] @ self.centroids.T, axis=1)
+            for start in range(0, len(vectors), ASSIGN_CHUNK)
+        ]) if len(vectors) else np.zeros(0, dtype=np.int64)
+        rows = np.arange(first_row, first_row + len(vectors))
+        order = np.argsort(assignments, kind='stable')
+        boundaries = np.flatnonzero(np.diff(assignments[order])) + 1
+        for group in np.split(order, boundaries):
+            if len(group):
+                self.lists[assignments[group[0]]].append(rows[group])
+
+    def candidates(self, query, probes):
+        """Rows in the lists whose centroids are most similar to the query"""
+        probes = min(probes, len(self.centroids))
+        nearest = np.argpartition(-(self.centroids @ query), probes - 1)[:probes]
+        return np.concatenate([self.lists[i].view() for i in nearest])
+
+class ResumeIndex:
+    """
+    Nearest-neighbour index over resume vectors, across every job.
+
+    Resumes are embedded with the configured embedding scorer (feature
+    hashing when text is scored with TF-IDF) and compared by cosine
+    similarity. Up to exact_limit resumes every vector is scored; above it
+    an inverted file is trained with k-means in the background, and queries
+    only score the rows of the few closest lists. Resumes are added as they
+    are saved, and resumes saved by other processes are picked up from the
+    database. The index is saved to disk and reloaded on start; resumes
+    saved since are caught up with in the background, so searches made
+    meanwhile only see the saved ones.
+    """
+    def __init__(self, directory=None, exact_limit=EXACT_LIMIT, probes=DEFAULT_PROBES,
+                 sync_interval=10, save_every=1000):
+        self.directory = directory
+        self.exact_limit = exact_limit
+        self.probes = probes
+        self.sync_interval = sync_interval
+        self.save_every = save_every
+        self.loaded = False
+        self._embedder = None
+        self._vectors = None
+        self._deleted = _GrowableArray(dtype=bool)
+        self._ids = []
+        self._rows = {}
+        self._ivf = None
+        self._training = False
+        self._last_synced_id = None
+        self._last_sync = 0.0
+        self._unsaved = 0
+        self._saving = False
+        self._sync_lock = threading.Lock()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._rows)
+
+    @property
+    def embedder_name(self):
+        return self._embedder.encoder.name
+
+    def load(self, embedder, catch_up=True):
+        """
+        Load the saved index, if it was built with the same embedder, and
+        catch up with resumes saved since in the background (or not at all
+        if catch_up is False, to sync explicitly)
+        """
+        with self._lock:
+            self._embedder = embedder
+            self._vectors = None
+            if self.directory:
+                try:
+                    self._load_snapshot()
+                except Exception as e:
+                    print(f"Error loading resume index: {e}")
+            self.loaded = True
+        if catch_up:
+            threading.Thread(target=self.sync, kwargs={'force': True}, daemon=True).start()
+
+    def _ensure_vectors(self, dimensions):
+        if self._vectors is None:
+            self._vectors = _GrowableArray(dimensions)
+
+    def add(self, resume_id, resume_text):
+        """Add one resume"""
+        self.add_many([resume_id], [resume_text])
+
+    def add_many(self, resume_ids, resume_texts):
+        """Add resumes; ids already in the index are skipped"""
+        pairs = list({str(resume_id): text for resume_id, text in zip(resume_ids, resume_texts)
+                      if text and str(resume_id) not in self._rows}.items())
+        if not pairs:
+            return
+        vectors = self._embedder.embed([text for _, text in pairs])
+
+        with self._lock:
+            self._ensure_vectors(vectors.shape[1])
+            keep = [i for i, (resume_id, _) in enumerate(pairs) if resume_id not in self._rows]
+            if not keep:
+                return
+            first_row = self._vectors.length
+            for row, i in enumerate(keep, first_row):
+                self._rows[pairs[i][0]] = row
+                self._ids.append(pairs[i][0])
+            self._vectors.append(vectors[keep])
+            self._deleted.append(np.zeros(len(keep), dtype=bool))
+            if self._ivf is not None:
+                self._ivf.assign(vectors[keep], first_row)
+
+            self._unsaved += len(keep)
+            self._maybe_train()
+            if self._unsaved >= self.save_every:
+                self._save_in_background()
+
+    def remove(self, resume_id):
+        """Exclude a resume from results"""
+        with self._lock:
+            row = self._rows.pop(str(resume_id), None)
+            if row is not None:
+                self._deleted.view()[row] = True
+                self._unsaved += 1
+
+    def _maybe_train(self):
+        count = self._vectors.length
+        stale = self._ivf is None or count > 2 * self._ivf.trained_count
+        if count > self.exact_limit and stale and not self._training:
+            self._training = True
+            threading.Thread(target=self._train, daemon=True).start()
+
+    def _train(self):
+        try:
+            vectors = self._vectors.view()
+            list_count = max(1, int(np.sqrt(len(vectors))))
+            sample_size = min(len(vectors), list_count * KMEANS_POINTS_PER_LIST)
+            sample = vectors[np.random.default_rng(len(vectors)).choice(len(vectors), sample_size, replace=False)]
+            ivf = _InvertedFile(spherical_kmeans(sample, list_count), len(vectors))
+            ivf.assign(vectors, 0)
+
+            # Assign rows added while training, then swap
+            with self._lock:
+                if self._vectors.length > len(vectors):
+                    ivf.assign(self._vectors.view()[len(vectors):], len(vectors))
+                self._ivf = ivf
+        except Exception as e:
+            print(f"Error training resume index: {e}")
+        finally:
+            self._training = False
+
+    def sync(self, force=False):
+        """
+        Add resumes saved since the last sync, including by other processes.
+        Runs at most every sync_interval seconds unless forced, and is
+        skipped while another sync is running, e.g. the catch-up after load.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_sync < self.sync_interval:
+            return
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_sync = now
+            self._sync()
+        finally:
+            self._sync_lock.release()
+
+    def _sync(self):
+        since_id = None
+        if self._last_synced_id is not None:
+            since_id = ObjectId.from_datetime(self._last_synced_id.generation_time - SYNC_OVERLAP)
+
+        batch_ids, batch_texts = [], []
+        try:
+            for resume in iter_resumes_since(since_id):
+                self._last_synced_id = max(self._last_synced_id or resume['_id'], resume['_id'])
+                batch_ids.append(resume['_id'])
+                batch_texts.append(resume.get('resume_text'))
+                if len(batch_ids) >= 1000:
+                    self.add_many(batch_ids, batch_texts)
+                    batch_ids, batch_texts = [], []
+            self.add_many(batch_ids, batch_texts)
+        except Exception as e:
+            print(f"Error syncing resume index: {e}")
+
+    def search(self, resume_text, k=10, exclude=()):
+        """
+        Return up to k (resume_id, similarity) pairs most similar to a
+        resume text, best first, leaving out the ids in exclude
+        """
+        self.sync()
+        query = self._embedder.embed([resume_text])[0]
+
+        with self._lock:
+            if self._vectors is None or k <= 0:
+                return []
+            count = self._vectors.length
+            vectors = self._vectors.view(count)
+            deleted = self._deleted.view(count)
+            ids = self._ids
+            ivf = self._ivf
+
+        if ivf is None or count <= self.exact_limit:
+            rows = np.arange(count)
+            scores = vectors @ query
+        else:
+            rows = ivf.candidates(query, self.probes)
+            rows = rows[rows < count]
+            scores = vectors[rows] @ query
+
+        excluded = {self._rows.get(str(resume_id)) for resume_id in exclude}
+        scores[deleted[rows]] = -np.inf
+        for row in excluded - {None}:
+            scores[rows == row] = -np.inf
+
+        k = min(k, len(rows))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(ids[rows[i]], float(scores[i])) for i in top if np.isfinite(scores[i])]
+
+    def _snapshot_path(self):
+        current = os.path.join(self.directory, 'CURRENT')
+        if not os.path.exists(current):
+            return None
+        with open(current) as f:
+            return os.path.join(self.directory, f.read().strip())
+
+    def _load_snapshot(self):
+        path = self._snapshot_path()
+        if path is None:
+            return
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta['embedder'] != self.embedder_name:
+            print(f"Resume index was built with {meta['embedder']}, rebuilding")
+            return
+
+        vectors = np.load(os.path.join(path, 'vectors.npy'))
+        deleted = np.load(os.path.join(path, 'deleted.npy'))
+        self._vectors = _GrowableArray(vectors.shape[1])
+        self._vectors.append(vectors)
+        self._deleted = _GrowableArray(dtype=bool)
+        self._deleted.append(deleted)
+        self._ids = meta['ids']
+        self._rows = {resume_id: row for row, resume_id in enumerate(self._ids) if not deleted[row]}
+        self._last_synced_id = ObjectId(meta['last_synced_id']) if meta['last_synced_id'] else None
+
+        if os.path.exists(os.path.join(path, 'centroids.npy')):
+            ivf = _InvertedFile(np.load(os.path.join(path, 'centroids.npy')), meta['trained_count'])
+            ivf.assign(vectors, 0)
+            self._ivf = ivf
+
+    def _save_in_background(self):
+        if self.directory and not self._saving:
+            self._saving = True
+            threading.Thread(target=self.save, daemon=True).start()
+
+    def save(self):
+        """
+        Write the index to a new snapshot directory and switch CURRENT to it.
+        Saves are serialized across processes with a file lock, as job index
+        builds are; the snapshot CURRENT pointed to before the switch is
+        kept for processes still loading it, and older ones are removed.
+        """
+        try:
+            with self._lock:
+                if self._vectors is None:
+                    return
+                count = self._vectors.length
+                vectors = self._vectors.view(count)
+                deleted = self._deleted.view(count).copy()
+                ids = self._ids[:count]
+                ivf = self._ivf
+                meta = {
+                    'embedder': self.embedder_name,
+                    'ids': ids,
+                    'last_synced_id': str(self._last_synced_id) if self._last_synced_id else None,
+                    'trained_count': ivf.trained_count if ivf else None
+                }
+                self._unsaved = 0
+
+            with open(os.path.join(self.directory, 'build.lock'), 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    self._write_snapshot(vectors, deleted, ivf, meta)
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+        except Exception as e:
+            print(f"Error saving resume index: {e}")
+        finally:
+            self._saving = False
+
+    def _write_snapshot(self, vectors, deleted, ivf, meta):
+        name = f'snapshot-{uuid.uuid4().hex}'
+        path = os.path.join(self.directory, name)
+        os.makedirs(path)
+        np.save(os.path.join(path, 'vectors.npy'), vectors)
+        np.save(os.path.join(path, 'deleted.npy'), deleted)
+        if ivf is not None:
+            np.save(os.path.join(path, 'centroids.npy'), ivf.centroids)
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+
+        # Switch atomically, then remove snapshots older than the one replaced
+        current = os.path.join(self.directory, 'CURRENT')
+        previous = None
+        if os.path.exists(current):
+            with open(current) as f:
+                previous = f.read().strip()
+        temp = f'{current}.{uuid.uuid4().hex}'
+        with open(temp, 'w') as f:
+            f.write(name)
+        os.replace(temp, current)
+        for entry in os.listdir(self.directory):
+            if entry.startswith('snapshot-') and entry not in (name, previous):
+                shutil.rmtree(os.path.join(self.directory, entry), ignore_errors=True)
+
+_resume_index = ResumeIndex()
+_load_lock = threading.Lock()
+
+def get_resume_embedder():
+    """
+    Embedding scorer used for resume similarity: the configured one, or
+    feature hashing when text is scored with TF-IDF
+    """
+    from utils.nlp_analyzer import get_text_scorer
+    from utils.text_scorer import EmbeddingScorer, HashingEncoder
+    from utils.embedding_store import EmbeddingStore
+
+    scorer = get_text_scorer()
+    if isinstance(scorer, EmbeddingScorer):
+        return scorer
+
+    encoder = HashingEncoder(Config.HASHING_DIMENSIONS)
+    store = None
+    if Config.EMBEDDING_CACHE_DIR:
+        store = EmbeddingStore(os.path.join(Config.EMBEDDING_CACHE_DIR, encoder.name), encoder.dimensions)
+    return EmbeddingScorer(encoder, store, Config.EMBEDDING_BATCH_SIZE)
+
+def get_resume_index():
+    """
+    Get the process-wide resume index, loading it on first use
+    """
+    if not _resume_index.loaded:
+        with _load_lock:
+            if not _resume_index.loaded:
+                _resume_index.directory = Config.RESUME_INDEX_DIR
+                _resume_index.exact_limit = Config.RESUME_INDEX_EXACT_LIMIT
+                _resume_index.probes = Config.RESUME_INDEX_PROBES
+                if _resume_index.directory:
+                    os.makedirs(_resume_index.directory, exist_ok=True)
+                _resume_index.load(get_resume_embedder())
+    return _resume_index
+
+def index_resumes(resume_ids, resume_texts):
+    """
+    Add newly saved resumes to the index if it is loaded in this process.
+    An index loaded later picks them up from the database instead.
+    """
+    if _resume_index.loaded:
+        try:
+            _resume_index.add_many(resume_ids, resume_texts)
+        except Exception as e:
+            print(f"Error indexing resumes: {e}")
+
+def remove_from_resume_index(resume_id):
+    """
+    Remove a deleted resume from the index if it is loaded in this process.
+    Other processes drop it when its document is no longer found.
+    """
+    if _resume_index.loaded:
+        _resume_index.remove(resume_id)
@@ -0,0 +1,139 @@
+import re
+from functools import lru_cache
+
+# Number of compiled matchers kept in memory, one per distinct skill list
+MATCHER_CACHE_SIZE = 256
+
+def build_trie_pattern(keys):
+    """
+    Build a regex alternation of the keys, factored as a prefix trie so the
+    regex engine does not try every skill at every position
+    """
+    trie = {}
+    for key in keys:
+        node = trie
+        for char in key:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char != '']
+        if not branches:
+            return ''
+        if len(branches) == 1 and '' not in node:
+            return branches[0]
+        group = '(?:' + '|'.join(branches) + ')'
+        return group + '?' if '' in node else group
+
+    return build(trie)
+
+def find_overlapping_keys(keys):
+    """
+    For every key, find the other keys whose occurrences could overlap with
+    one of its occurrences in a text: one contains the other, or a suffix
+    of one is a prefix of the other
+    """
+    key_set = set(keys)
+    prefixes = {}
+    for key in keys:
+        for end in range(1, len(key) + 1):
+            prefixes.setdefault(key[:end], set()).add(key)
+
+    overlaps = {key: set() for key in keys}
+    for key in keys:
+        # Keys contained in this key
+        for start in range(len(key)):
+            for end in range(start + 1, len(key) + 1):
+                other = key[start:end]
+                if other != key and other in key_set:
+                    overlaps[key].add(other)
+                    overlaps[other].add(key)
+        # Keys starting with a proper suffix of this key
+        for start in range(1, len(key)):
+            for other in prefixes.get(key[start:], ()):
+                if other != key:
+                    overlaps[key].add(other)
+                    overlaps[other].add(key)
+    return overlaps
+
+class SkillMatcher:
+    """
+    Finds every skill of a skill list in a single scan of a text.
+
+    Results are the same as searching each skill as a whole word in the
+    lowercased text, one regex per skill. All skills are compiled into one trie-shaped regex.
+    Matches found by one scan cannot overlap, so a skill hidden inside an
+    overlapping match of another skill is confirmed with its own pattern.
+    Only skills that can overlap with a found skill need this check.
+    """
+    def __init__(self, skills, tables=None):
+        self.skills = list(skills)
+        self._keys = [skill.lower() for skill in self.skills]
+
+        if tables is None:
+            keys = sorted({key for key in self._keys if key})
+            tables = (build_trie_pattern(keys) if keys else None, find_overlapping_keys(keys))
+        self._trie, self._overlaps = tables
+        self._pattern = re.compile(r'\b(?:' + self._trie + r')\b') if self._trie is not None else None
+        self._key_patterns = {}
+
+    def tables(self):
+        """
+        The precomputed trie pattern and overlap table, as JSON-compatible
+        values; SkillMatcher(skills, tables) rebuilds the matcher without
+        recomputing them
+        """
+        return self._trie, {key: sorted(others) for key, others in self._overlaps.items()}
+
+    def _key_pattern(self, key):
+        pattern = self._key_patterns.get(key)
+        if pattern is None:
+            pattern = re.compile(r'\b' + re.escape(key) + r'\b')
+            self._key_patterns[key] = pattern
+        return pattern
+
+    def find_keys(self, text):
+        """
+        Get the set of lowercased skills present in a text
+        """
+        text = text.lower()
+        found = set()
+
+        if self._pattern is not None:
+            found.update(match.group() for match in self._pattern.finditer(text))
+
+            # Skills that may have been hidden by an overlapping match
+            hidden = set()
+            for key in found:
+                hidden.update(self._overlaps[key])
+            for key in hidden - found:
+                if self._key_pattern(key).search(text):
+                    found.add(key)
+
+        if '' in self._keys and self._key_pattern('').search(text):
+            found.add('')
+
+        return found
+
+    def match(self, text):
+        """
+        Get the skills present in a text, in skill list order
+        """
+        found = self.find_keys(text)
+        return [skill for skill, key in zip(self.skills, self._keys) if key in found]
+
+    def match_many(self, texts):
+        """
+        Get the skills present in each of a list of texts
+        """
+        return [self.match(text) for text in texts]
+
+@lru_cache(maxsize=MATCHER_CACHE_SIZE)
+def _get_skill_matcher(skills):
+    return SkillMatcher(skills)
+
+def get_skill_matcher(skill_list):
+    """
+    Get the compiled matcher for a skill list, cached across requests
+    """
+    return _get_skill_matcher(tuple(skill_list))
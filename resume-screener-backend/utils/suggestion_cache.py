@@ -0,0 +1,263 @@
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from datetime import datetime, timedelta
+import hashlib
+import threading
+import time
+
+def make_suggestion_key(resume_text, job_description, matched_skills, missing_skills):
+    """
+    Hash the inputs of a suggestion request into a cache key
+    """
+    digest = hashlib.sha256()
+    for part in (resume_text, job_description, '\x1f'.join(matched_skills), '\x1f'.join(missing_skills)):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\x1e')
+    return digest.hexdigest()
+
+class MongoSuggestionStore:
+    """
+    Shared suggestion store backed by a Mongo collection, so every worker
+    process and restart benefits from suggestions already generated
+    """
+    def __init__(self, collection, ttl):
+        self.collection = collection
+        self.ttl = ttl
+        self._indexed = False
+
+    def _ensure_index(self):
+        if not self._indexed:
+            self.collection.create_index('created_at', expireAfterSeconds=int(self.ttl))
+            self._indexed = True
+
+    def get(self, key):
+        doc = self.collection.find_one({'_id': key})
+        if not doc or doc['created_at'] < datetime.utcnow() - timedelta(seconds=self.ttl):
+            return None
+        return doc['suggestions']
+
+    def set(self, key, suggestions):
+        self._ensure_index()
+        self.collection.replace_one(
+            {'_id': key},
+            {'_id': key, 'suggestions': suggestions, 'created_at': datetime.utcnow()},
+            upsert=True
+        )
+
+class SuggestionCache:
+    """
+    LRU cache with TTL for LLM suggestions.
+
+    Concurrent requests for the same key share one call, and callers stop
+    waiting after a deadline and get a fallback instead. A call that
+    finishes after its deadline still fills the cache for the next request.
+    An optional store (see MongoSuggestionStore) backs the in-memory LRU.
+    """
+    def __init__(self, max_entries=1024, ttl=7 * 24 * 3600, max_workers=8, store=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_workers = max_workers
+        self.store = store
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self.hits = 0
+        self.misses = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    def configure(self, max_entries=None, ttl=None, store=None):
+        if max_entries is not None:
+            self.max_entries = max_entries
+        if ttl is not None:
+            self.ttl = ttl
+        if store is not None:
+            self.store = store
+
+    def record(self, hits=0, misses=0, timeouts=0, errors=0):
+        """
+        Add to the counters; callers on several threads use this rather than
+        updating them directly
+        """
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+            self.timeouts += timeouts
+            self.errors += errors
+
+    def _get_entry(self, key):
+        # Called with the lock held
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at > time.monotonic():
+            self._entries.move_to_end(key)
+            return value
+        del self._entries[key]
+        return None
+
+    def get(self, key):
+        """
+        Get cached suggestions, or None if missing or expired
+        """
+        with self._lock:
+            value = self._get_entry(key)
+            if value is not None:
+                return value
+
+        if self.store is not None:
+            try:
+                value = self.store.get(key)
+            except Exception as e:
+                print(f"Error reading suggestion store: {e}")
+                value = None
+            if value is not None:
+                self._remember(key, value)
+                return value
+
+        return None
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def set(self, key, value):
+        self._remember(key, value)
+        if self.store is not None:
+            try:
+                self.store.set(key, value)
+            except Exception as e:
+                print(f"Error writing suggestion store: {e}")
+
+    def _compute(self, key, compute):
+        try:
+            value = compute()
+            self.set(key, value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _get_executor(self):
+        if self._executor is None:
+            # Created lazily so that forked workers do not share the parent's threads
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='llm')
+        return self._executor
+
+    def get_or_compute(self, key, compute, timeout=None, fallback=None):
+        """
+        Return cached suggestions for key, or run compute() once for all
+        concurrent callers. Returns fallback if compute raises or does not
+        finish within timeout seconds; fallbacks are never cached.
+        """
+        value = self.get(key)
+        if value is not None:
+            self.record(hits=1)
+            return value
+        self.record(misses=1)
+
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                # A call may have finished since the lookup above
+                value = self._get_entry(key)
+                if value is not None:
+                    return value
+                future = self._get_executor().submit(self._compute, key, compute)
+                self._inflight[key] = future
+
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            self.record(timeouts=1)
+            print(f"Suggestion request timed out after {timeout}s, using fallback")
+            return fallback
+        except Exception as e:
+            self.record(errors=1)
+            print(f"Error generating suggestions: {e}")
+            return fallback
+
+    def _compute_many(self, keys, futures, compute):
+        try:
+            values = compute(keys)
+        except Exception as e:
+            values = None
+            error = e
+        with self._lock:
+            for key in keys:
+                self._inflight.pop(key, None)
+        for i, (key, future) in enumerate(zip(keys, futures)):
+            if values is None:
+                future.set_exception(error)
+                continue
+            if values[i] is not None:
+                self.set(key, values[i])
+            future.set_result(values[i])
+
+    def get_or_compute_many(self, keys, compute, timeout=None, fallback=None):
+        """
+        get_or_compute for several keys sharing one call: compute(keys) gets
+        the keys that are neither cached nor being computed and returns a
+        value, or None, for each. Keys being computed, alone or in another
+        batch, wait for that call instead. Every key gets its value by one
+        deadline, or fallback if the call fails or misses it; a key the call
+        returned None for gets None, and nothing is cached for it.
+        """
+        results = [self.get(key) for key in keys]
+        missing = [i for i, value in enumerate(results) if value is None]
+        self.record(hits=len(keys) - len(missing), misses=len(missing))
+        if not missing:
+            return results
+
+        futures = {}
+        own = []
+        with self._lock:
+            for i in missing:
+                key = keys[i]
+                if key in futures:
+                    continue
+                future = self._inflight.get(key)
+                if future is None:
+                    # A call may have finished since the lookup above
+                    value = self._get_entry(key)
+                    future = Future()
+                    if value is not None:
+                        future.set_result(value)
+                    else:
+                        self._inflight[key] = future
+                        own.append(key)
+                futures[key] = future
+            if own:
+                self._get_executor().submit(self._compute_many, own, [futures[key] for key in own], compute)
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        timeouts = 0
+        errors = {}
+        for i in missing:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                results[i] = futures[keys[i]].result(timeout=remaining)
+            except TimeoutError:
+                timeouts += 1
+                results[i] = fallback
+            except Exception as e:
+                errors[str(e)] = errors.get(str(e), 0) + 1
+                results[i] = fallback
+        self.record(timeouts=timeouts, errors=sum(errors.values()))
+
+        if timeouts:
+            print(f"{timeouts} suggestion requests timed out after {timeout}s, using fallback")
+        for error, count in errors.items():
+            print(f"Error generating suggestions for {count} resumes: {error}")
+        return results
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+suggestion_cache = SuggestionCache()
@@ -0,0 +1,116 @@
+import threading
+import time
+from functools import partial
+from config import Config
+from models import update_analysis_suggestions, expire_pending_suggestions
+from utils.nlp_analyzer import suggest_improvements, suggest_improvements_many, merge_suggestions, DEFAULT_SUGGESTIONS
+from utils.task_queue import suggestion_queue, QueueFullError
+
+class SuggestionNotifier:
+    """
+    Wakes threads in this process waiting for the suggestions of an
+    analysis, so a stream served by the same worker that generated them
+    does not wait for its next poll of the database
+    """
+    def __init__(self):
+        self._waiting = {}
+        self._lock = threading.Lock()
+
+    def wait(self, analysis_id, timeout):
+        """Wait up to timeout seconds; returns True if notified"""
+        with self._lock:
+            entry = self._waiting.setdefault(analysis_id, [threading.Event(), 0])
+            entry[1] += 1
+        try:
+            return entry[0].wait(timeout)
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0 and self._waiting.get(analysis_id) is entry:
+                    del self._waiting[analysis_id]
+
+    def notify(self, analysis_id):
+        with self._lock:
+            entry = self._waiting.pop(analysis_id, None)
+        if entry is not None:
+            entry[0].set()
+
+suggestion_notifier = SuggestionNotifier()
+
+# When this process last looked for stale pending suggestions
+_last_sweep = {'at': None}
+_sweep_lock = threading.Lock()
+
+def sweep_stale_suggestions():
+    """
+    Mark suggestions still pending after SUGGESTION_PENDING_TIMEOUT seconds
+    as failed, so their streams and readers stop waiting. Queued tasks are
+    lost when a worker exits; this looks for them at most every
+    SUGGESTION_SWEEP_INTERVAL seconds per process.
+    """
+    now = time.monotonic()
+    with _sweep_lock:
+        if _last_sweep['at'] is not None and now - _last_sweep['at'] < Config.SUGGESTION_SWEEP_INTERVAL:
+            return
+        _last_sweep['at'] = now
+    try:
+        expire_pending_suggestions(Config.SUGGESTION_PENDING_TIMEOUT)
+    except Exception as e:
+        print(f"Error expiring pending suggestions: {e}")
+
+def save_default_suggestions(analysis_ids, results, error=None):
+    """
+    Save the static suggestions of analyses whose suggestions could not be
+    generated: the queue was full, or their task failed with error
+    """
+    for analysis_id, result in zip(analysis_ids, results):
+        update_analysis_suggestions(analysis_id, merge_suggestions(DEFAULT_SUGGESTIONS, result['ats_issues']))
+        suggestion_notifier.notify(analysis_id)
+
+def complete_suggestions(analysis_id, resume_text, job_description, result, report, state):
+    """
+    Background task: generate the suggestions of an analysis saved with
+    its fast results and save them
+    """
+    suggestions = suggest_improvements(resume_text, job_description, result['matched_skills'],
+                                       result['missing_skills'], result['ats_issues'])
+    update_analysis_suggestions(analysis_id, suggestions)
+    suggestion_notifier.notify(analysis_id)
+
+def queue_suggestions(analysis_id, resume_text, job_description, result):
+    """
+    Generate the suggestions of a saved analysis in the background. If the
+    queue is full or the task fails the static suggestions are saved instead.
+    """
+    try:
+        suggestion_queue.submit(complete_suggestions, analysis_id, resume_text, job_description, result,
+                                on_failure=partial(save_default_suggestions, [analysis_id], [result]))
+    except QueueFullError:
+        save_default_suggestions([analysis_id], [result])
+
+def complete_suggestions_batch(analysis_ids, resume_texts, job_description, results, report, state):
+    """
+    Background task: generate the suggestions of several analyses of one
+    job, sharing Gemini requests, and save them
+    """
+    suggestions = suggest_improvements_many(resume_texts, job_description, results)
+    for analysis_id, analysis_suggestions in zip(analysis_ids, suggestions):
+        update_analysis_suggestions(analysis_id, analysis_suggestions)
+        suggestion_notifier.notify(analysis_id)
+
+def queue_suggestions_many(analysis_ids, resume_texts, job_description, results):
+    """
+    Generate the suggestions of saved analyses of one job in the background,
+    SUGGESTION_BATCH_SIZE analyses per task so they can share Gemini requests.
+    If the queue is full or a task fails its static suggestions are saved instead.
+    """
+    batch_size = Config.SUGGESTION_BATCH_SIZE
+    for start in range(0, len(analysis_ids), batch_size):
+        batch_ids = analysis_ids[start:start + batch_size]
+        batch_results = results[start:start + batch_size]
+        try:
+            suggestion_queue.submit(complete_suggestions_batch, batch_ids, resume_texts[start:start + batch_size],
+                                    job_description, batch_results,
+                                    on_failure=partial(save_default_suggestions, batch_ids, batch_results))
+        except QueueFullError:
+            save_default_suggestions(batch_ids, batch_results)
@@ -0,0 +1,115 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+import uuid
+
+class QueueFullError(Exception):
+    """Raised when a task is submitted while the queue is at capacity"""
+    pass
+
+class PermanentTaskError(Exception):
+    """Raised by a task for failures that retrying cannot fix"""
+    pass
+
+class TaskQueue:
+    """
+    Bounded in-process worker pool for background tasks.
+
+    At most max_workers tasks run at once and at most max_pending are
+    accepted (running or waiting); further submissions raise QueueFullError
+    so request bursts are rejected early instead of piling up. Failed tasks
+    are retried with exponential backoff. Task status is reported through
+    the on_update callback, so it can be stored where every process can
+    read it.
+    """
+    def __init__(self, max_workers=4, max_pending=100, max_retries=2, retry_delay=1.0, on_update=None):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.on_update = on_update
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+
+    def configure(self, max_workers=None, max_pending=None, max_retries=None, retry_delay=None, on_update=None):
+        """
+        Update settings; takes effect before the first task is submitted
+        """
+        if max_workers is not None:
+            self.max_workers = max_workers
+        if max_pending is not None:
+            self.max_pending = max_pending
+        if max_retries is not None:
+            self.max_retries = max_retries
+        if retry_delay is not None:
+            self.retry_delay = retry_delay
+        if on_update is not None:
+            self.on_update = on_update
+
+    def _start(self):
+        # Created lazily so that forked workers do not share the parent's threads
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='task')
+                self._slots = threading.BoundedSemaphore(self.max_pending)
+
+    def _update(self, task_id, **fields):
+        if self.on_update:
+            try:
+                self.on_update(task_id, fields)
+            except Exception as e:
+                print(f"Error updating task {task_id}: {e}")
+
+    def submit(self, fn, *args, task_id=None, on_failure=None, **kwargs):
+        """
+        Queue fn(*args, report=..., state=..., **kwargs) and return the task id.
+
+        fn receives report(progress, stage) to publish progress and a state
+        dict that is kept across retries, so completed steps can be skipped.
+        Its return value is merged into the task status as the result.
+        on_failure(error) is called once the last attempt has failed.
+        """
+        self._start()
+        if not self._slots.acquire(blocking=False):
+            raise QueueFullError('Task queue is full')
+
+        task_id = task_id or uuid.uuid4().hex
+        try:
+            self._executor.submit(self._run, task_id, fn, args, kwargs, on_failure)
+        except Exception:
+            self._slots.release()
+            raise
+        return task_id
+
+    def _run(self, task_id, fn, args, kwargs, on_failure=None):
+        state = {}
+
+        def report(progress, stage):
+            self._update(task_id, status='running', progress=progress, stage=stage)
+
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    self._update(task_id, status='running', attempts=attempt + 1)
+                    result = fn(*args, report=report, state=state, **kwargs) or {}
+                    self._update(task_id, status='completed', progress=100, stage='done', **result)
+                    return
+                except Exception as e:
+                    print(f"Error running task {task_id} (attempt {attempt + 1}): {e}")
+                    if attempt == self.max_retries or isinstance(e, PermanentTaskError):
+                        self._update(task_id, status='failed', error=str(e))
+                        if on_failure:
+                            try:
+                                on_failure(e)
+                            except Exception as failure_error:
+                                print(f"Error handling failure of task {task_id}: {failure_error}")
+                        return
+                    time.sleep(self.retry_delay * 2 ** attempt)
+        finally:
+            self._slots.release()
+
+analysis_queue = TaskQueue()
+
+# Gemini suggestions, generated after the fast analysis results are saved
+suggestion_queue = TaskQueue()
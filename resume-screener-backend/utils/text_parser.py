@@ -1,15 +1,50 @@
-
-from pdfminer.high_level import extract_text as extract_text_pdf
-import docx
+from utils.lazy import lazy_import
 import os
 
+# Loaded on first use; parser processes preload them (see utils.parser_pool)
+pdfminer_high_level = lazy_import('pdfminer.high_level')
+docx = lazy_import('docx')
+
+def read_pdf_text(file_path):
+    """
+    Read text from PDF file, raising on errors
+    """
+    return pdfminer_high_level.extract_text(file_path)
+
+def read_docx_text(file_path):
+    """
+    Read text from DOCX file, raising on errors
+    """
+    doc = docx.Document(file_path)
+    full_text = []
+    for para in doc.paragraphs:
+        full_text.append(para.text)
+    return '\n'.join(full_text)
+
+def read_txt_text(file_path):
+    """
+    Read text from TXT file, raising on errors
+    """
+    with open(file_path, 'r', encoding='utf-8') as file:
+        text = file.read()
+    return text
+
+# Text readers by file extension
+READERS = {
+    'pdf': read_pdf_text,
+    'docx': read_docx_text,
+    'txt': read_txt_text
+}
+
+def get_extension(file_path):
+    return file_path.rsplit('.', 1)[-1].lower() if '.' in os.path.basename(file_path) else ''
+
 def extract_text_from_pdf(file_path):
     """
     Extract text from PDF file
     """
     try:
-        text = extract_text_pdf(file_path)
-        return text
+        return read_pdf_text(file_path)
     except Exception as e:
         print(f"Error extracting text from PDF: {e}")
         return ""
@@ -19,11 +54,7 @@ def extract_text_from_docx(file_path):
     Extract text from DOCX file
     """
     try:
-        doc = docx.Document(file_path)
-        full_text = []
-        for para in doc.paragraphs:
-            full_text.append(para.text)
-        return '\n'.join(full_text)
+        return read_docx_text(file_path)
     except Exception as e:
         print(f"Error extracting text from DOCX: {e}")
         return ""
@@ -33,9 +64,21 @@ def extract_text_from_txt(file_path):
     Extract text from TXT file
     """
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            text = file.read()
-        return text
+        return read_txt_text(file_path)
     except Exception as e:
         print(f"Error extracting text from TXT: {e}")
         return ""
+
+def extract_text_from_file(file_path):
+    """
+    Extract text from a PDF, DOCX or TXT file based on its extension.
+    Runs in the calling process; use utils.parser_pool to isolate untrusted files.
+    """
+    extension = get_extension(file_path)
+    if extension == 'pdf':
+        return extract_text_from_pdf(file_path)
+    elif extension == 'docx':
+        return extract_text_from_docx(file_path)
+    elif extension == 'txt':
+        return extract_text_from_txt(file_path)
+    return ""
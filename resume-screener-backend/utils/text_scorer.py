@@ -0,0 +1,190 @@
+import hashlib
+import os
+import re
+import threading
+from utils.embedding_store import EmbeddingStore, hash_content
+from utils.lazy import lazy_import
+
+# Loaded on first use to keep app startup fast
+np = lazy_import('numpy')
+
+class TfidfScorer:
+    """
+    Text similarity from the shared TF-IDF job index (the default scorer).
+    Every scored resume is added to the index corpus.
+    """
+    name = 'tfidf'
+
+    def score_many(self, resume_texts, job_description, job_id=None):
+        """
+        Return the similarity of each resume to the job, between 0 and 1
+        """
+        from utils.job_index import get_job_index
+        from utils.nlp_analyzer import preprocess_text
+
+        processed_resumes = [preprocess_text(resume_text) for resume_text in resume_texts]
+        job_index = get_job_index()
+        try:
+            return job_index.score_many(processed_resumes, preprocess_text(job_description), job_id)
+        finally:
+            # Grow the corpus with every resume seen
+            job_index.add_resumes(processed_resumes)
+
+    def score_features(self, features, job_description, job_id=None):
+        """
+        Score resumes from their stored features (see extract_resume_features).
+        Returns (scores, missing); the term counts are always enough, so
+        missing is empty.
+        """
+        from utils.job_index import get_job_index
+        from utils.nlp_analyzer import preprocess_text
+
+        return get_job_index().score_term_counts(features, preprocess_text(job_description), job_id), []
+
+class HashingEncoder:
+    """
+    Deterministic stand-in for a sentence embedding model.
+
+    Each word and word pair is hashed to a signed position in a fixed-size
+    vector. Needs no model files, so it is used offline and in tests.
+    """
+    def __init__(self, dimensions=384):
+        self.dimensions = dimensions
+        self.name = f'hashing-{dimensions}'
+
+    def _position(self, token):
+        digest = int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'little')
+        return digest % self.dimensions, 1.0 if digest >> 63 else -1.0
+
+    def encode(self, texts):
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = re.findall(r'\w+', text.lower())
+            for token in words + [f'{a} {b}' for a, b in zip(words, words[1:])]:
+                position, sign = self._position(token)
+                vectors[row, position] += sign
+        return vectors
+
+class SentenceTransformerEncoder:
+    """
+    Sentence embedding model loaded from a local path, run on CPU in batches.
+    The model is loaded on first use.
+    """
+    def __init__(self, model_path, batch_size=32, device='cpu'):
+        self.model_path = model_path
+        self.batch_size = batch_size
+        self.device = device
+        self.name = os.path.basename(os.path.normpath(model_path))
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+
+                    self._model = SentenceTransformer(self.model_path, device=self.device)
+        return self._model
+
+    @property
+    def dimensions(self):
+        return self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts):
+        return self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        ).astype(np.float32)
+
+class EmbeddingScorer:
+    """
+    Text similarity as the cosine of resume and job embeddings.
+
+    Embeddings are cached by content hash in an EmbeddingStore, so each
+    distinct text is encoded once; only cache misses are sent to the
+    encoder, in batches.
+    """
+    name = 'embedding'
+
+    def __init__(self, encoder, store=None, batch_size=32):
+        self.encoder = encoder
+        self.store = store
+        self.batch_size = batch_size
+
+    def embed(self, texts):
+        """
+        Return unit-length float32 embeddings for texts, one row per text
+        """
+        keys = [hash_content(text) for text in texts]
+        if self.store is not None:
+            vectors, missing = self.store.get_many(keys)
+        else:
+            vectors, missing = np.zeros((len(texts), self.encoder.dimensions), dtype=np.float32), list(range(len(texts)))
+
+        # Encode each distinct missing text once
+        unique = {}
+        for i in missing:
+            unique.setdefault(keys[i], texts[i])
+        if unique:
+            unique_keys = list(unique)
+            unique_texts = list(unique.values())
+            encoded = np.vstack([
+                self.encoder.encode(unique_texts[start:start + self.batch_size])
+                for start in range(0, len(unique_texts), self.batch_size)
+            ])
+            norms = np.linalg.norm(encoded, axis=1, keepdims=True)
+            encoded = np.divide(encoded, norms, out=np.zeros_like(encoded), where=norms > 0)
+            if self.store is not None:
+                self.store.put_many(unique_keys, encoded)
+
+            rows = {key: row for row, key in enumerate(unique_keys)}
+            for i in missing:
+                vectors[i] = encoded[rows[keys[i]]]
+        return vectors
+
+    def score_many(self, resume_texts, job_description, job_id=None):
+        """
+        Return the similarity of each resume to the job, between 0 and 1
+        """
+        vectors = self.embed([job_description] + list(resume_texts))
+        return np.clip(vectors[1:] @ vectors[0], 0.0, 1.0)
+
+    def score_features(self, features, job_description, job_id=None):
+        """
+        Score resumes from their stored features (see extract_resume_features)
+        using cached embeddings only. Returns (scores, missing): the indices
+        of resumes whose embedding is not cached have a score of 0 and must
+        be scored from their text.
+        """
+        job_vector = self.embed([job_description])[0]
+        if self.store is None:
+            return np.zeros(len(features), dtype=np.float32), list(range(len(features)))
+        vectors, missing = self.store.get_many([feature['text_key'] for feature in features])
+        scores = np.clip(vectors @ job_vector, 0.0, 1.0)
+        scores[missing] = 0.0
+        return scores, missing
+
+def create_text_scorer(config):
+    """
+    Build the scorer selected by config.TEXT_SCORER: 'tfidf', 'embedding'
+    (a sentence-transformers model at EMBEDDING_MODEL_PATH) or 'hashing'
+    (the offline stand-in for the embedding model)
+    """
+    if config.TEXT_SCORER == 'tfidf':
+        return TfidfScorer()
+
+    if config.TEXT_SCORER == 'embedding':
+        encoder = SentenceTransformerEncoder(config.EMBEDDING_MODEL_PATH, config.EMBEDDING_BATCH_SIZE)
+    elif config.TEXT_SCORER == 'hashing':
+        encoder = HashingEncoder(config.HASHING_DIMENSIONS)
+    else:
+        raise ValueError(f'Unknown text scorer: {config.TEXT_SCORER}')
+
+    store = None
+    if config.EMBEDDING_CACHE_DIR:
+        store = EmbeddingStore(os.path.join(config.EMBEDDING_CACHE_DIR, encoder.name), encoder.dimensions)
+    return EmbeddingScorer(encoder, store, config.EMBEDDING_BATCH_SIZE)